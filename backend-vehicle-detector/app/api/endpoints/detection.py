@@ -1,20 +1,133 @@
 import os
 import json
-from typing import List, Optional
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Form
-from fastapi.responses import FileResponse
-from ...services.detection_service import detection_service
+import time
+import asyncio
+import logging
+from typing import AsyncIterator, List, Optional
+from fastapi import (
+    APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Form, Depends, Request, WebSocket,
+    WebSocketDisconnect, status
+)
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from ...services.batching import BatchQueueFull
+from ...services.detection_service import detection_service, INPUT_ERRORS, OUTPUT_PATTERN, VIDEO_EXTENSIONS
+from ...services.inference_executor import inference_executor, background_executor, InferenceQueueFull
+from ...services.job_queue import job_queue, JobQueueFull
+from ...services.job_worker import job_payload
+from ...services.upload_service import read_upload, save_upload, BufferedUpload, UploadTooLarge
+from ...services.archives import save_batch_upload
+from ...services.file_responses import file_response
+from ...services.stream_service import stream_manager, StreamLimitReached
+from ...services.task_events import TaskEvent
 from ...models.detection import (
-    DetectionResult, DetectionTask, DetectionStats,
-    VehicleClass, VehicleFilter
+    DetectionResult, DetectionTask, DetectionStats, BatchItem, BatchResult, FramePage,
+    VehicleClass, VehicleFilter, VideoOptions, RefilterRequest, RenderMode, InferenceOptions,
+    RegionOfInterest, StreamRequest, StreamStatus
 )
 from ...core.config import settings
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+def _remove_upload(file_path: str):
+    """Delete an upload unless it was already moved into the raw store"""
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+def _require_model():
+    """Reject work that needs the model until it is loaded"""
+    if not detection_service.ready:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model is not ready (state: {detection_service.state})",
+            headers={"Retry-After": "5"}
+        )
+
+def _parse_target_classes(target_classes: Optional[str]) -> Optional[List[VehicleClass]]:
+    """Parse target_classes from JSON string if provided"""
+    if not target_classes:
+        return None
+    try:
+        parsed_target_classes = json.loads(target_classes)
+        if not isinstance(parsed_target_classes, list):
+            raise ValueError("target_classes must be a list")
+        return [VehicleClass(cls) for cls in parsed_target_classes]
+    except (json.JSONDecodeError, ValueError) as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid target_classes format: {str(e)}"
+        )
+
+def _region_of_interest(roi: Optional[str], camera_profile: Optional[str]) -> Optional[RegionOfInterest]:
+    """ROI of a request; an explicit ROI overrides the one of the camera profile"""
+    if roi:
+        try:
+            return RegionOfInterest.model_validate_json(roi)
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid roi format: {str(e)}"
+            )
+    if camera_profile:
+        profile = detection_service.camera_profiles.get(camera_profile)
+        if profile is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown camera profile: {camera_profile}"
+            )
+        return profile.roi
+    return None
+
+async def _run_queued_image(
+    upload: BufferedUpload,
+    filter: VehicleFilter,
+    render: RenderMode,
+    inference_options: InferenceOptions
+) -> DetectionResult:
+    """Enqueue an image job and wait until a detector worker has finished it"""
+    task = detection_service.create_task(upload.filename)
+    try:
+        job_queue.enqueue(
+            task.task_id,
+            "image",
+            job_payload(
+                upload.filename, filter, render,
+                content_hash=upload.sha256,
+                inference_options=inference_options
+            ),
+            upload.data
+        )
+    except JobQueueFull:
+        detection_service.remove_task(task.task_id)
+        raise
+    
+    deadline = time.monotonic() + settings.JOB_WAIT_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        current = detection_service.get_task_status(task.task_id)
+        if current is None:
+            # Evicted or removed while the job was queued
+            raise HTTPException(
+                status_code=404,
+                detail="Task not found"
+            )
+        if current.status == "completed":
+            return current.result
+        if current.status == "failed":
+            if current.invalid_input:
+                raise HTTPException(
+                    status_code=400,
+                    detail=current.error
+                )
+            raise RuntimeError(current.error)
+        await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+    raise HTTPException(
+        status_code=504,
+        detail=f"Detection is still running, poll /status/{task.task_id} for the result"
+    )
 
-@router.post("/image", response_model=DetectionResult)
+@router.post("/image", response_model=DetectionResult, dependencies=[Depends(_require_model)])
 async def process_image(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     target_classes: Optional[str] = Form(
         None,
@@ -25,28 +138,38 @@ async def process_image(
         ge=0.0,
         le=1.0,
         description="Minimum confidence threshold for detection"
+    ),
+    render: RenderMode = Form(
+        RenderMode.EAGER,
+        description="eager renders the annotated output now, lazy on the first download, none returns detections only"
+    ),
+    imgsz: Optional[int] = Form(
+        None,
+        ge=32,
+        le=4096,
+        description="Model input size in pixels. If not provided, the deployment default is used."
+    ),
+    adaptive_imgsz: Optional[bool] = Form(
+        None,
+        description="Run small sources at their own resolution and lower video input size while the detector is backed up"
+    ),
+    roi: Optional[str] = Form(
+        None,
+        description='JSON region of interest, e.g. {"polygons": [[[0, 400], [1920, 400], [1920, 1080], [0, 1080]]]}'
+    ),
+    camera_profile: Optional[str] = Form(
+        None,
+        description="Name of a configured camera profile whose region of interest is used"
+    ),
+    tiled: Optional[bool] = Form(
+        None,
+        description="Split a large image into overlapping tiles to find small distant vehicles. If not provided, large images are tiled when the deployment enables it."
     )
 ):
     """
     Upload and process an image for vehicle detection with optional filtering
     """
-    # Parse target_classes from JSON string if provided
-    parsed_target_classes = None
-    if target_classes:
-        try:
-            parsed_target_classes = json.loads(target_classes)
-            if not isinstance(parsed_target_classes, list):
-                raise ValueError("target_classes must be a list")
-            parsed_target_classes = [VehicleClass(cls) for cls in parsed_target_classes]
-        except (json.JSONDecodeError, ValueError) as e:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid target_classes format: {str(e)}"
-            )
-    
-    # Debug logging
-    print("Received target_classes:", parsed_target_classes)
-    print("Received min_confidence:", min_confidence)
+    parsed_target_classes = _parse_target_classes(target_classes)
     
     # Validate file type
     if not file.content_type.startswith('image/'):
@@ -60,32 +183,59 @@ async def process_image(
         target_classes=set(parsed_target_classes) if parsed_target_classes is not None else None,
         min_confidence=min_confidence
     )
-    print("Created filter:", filter)
+    logger.debug("Image filter: %s", filter)
+    inference_options = InferenceOptions(
+        imgsz=imgsz,
+        adaptive_imgsz=adaptive_imgsz,
+        tiled=tiled,
+        roi=_region_of_interest(roi, camera_profile)
+    )
     
-    # Save uploaded file
-    file_path = os.path.join(settings.UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Images are small enough to keep in memory and are decoded from the bytes
+    try:
+        upload = await read_upload(file, settings.MAX_UPLOAD_SIZE)
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=413,
+            detail=str(e)
+        )
     
     try:
-        # Process image with filter
-        result = detection_service.process_file(file_path, filter)
-        print("Processing result:", result)
+        if job_queue is not None:
+            # A detector worker process runs the job; wait for its result
+            result = await _run_queued_image(upload, filter, render, inference_options)
+        else:
+            # Decode and post-process on the inference pool; the batch is awaited here
+            result = await detection_service.detect_image_data(
+                inference_executor.run, upload.data, upload.filename, filter,
+                content_hash=upload.sha256,
+                render=render,
+                inference_options=inference_options
+            )
+        logger.debug("Detected %d vehicles in %s", len(result.detections), result.filename)
         return result
+    except (InferenceQueueFull, BatchQueueFull, JobQueueFull) as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+    except INPUT_ERRORS as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
-        print("Processing error:", str(e))
+        logger.exception("Image processing failed")
         raise HTTPException(
             status_code=500,
             detail=str(e)
         )
-    finally:
-        # Cleanup uploaded file
-        background_tasks.add_task(os.remove, file_path)
 
-@router.post("/video", response_model=DetectionResult)
+@router.post("/video", response_model=DetectionTask, status_code=202, dependencies=[Depends(_require_model)])
 async def process_video(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     target_classes: Optional[List[VehicleClass]] = Form(
         None,
@@ -96,10 +246,49 @@ async def process_video(
         ge=0.0,
         le=1.0,
         description="Minimum confidence threshold for detection"
+    ),
+    frame_stride: int = Form(
+        1,
+        ge=1,
+        le=60,
+        description="Run full detection every K frames and interpolate boxes in between"
+    ),
+    adaptive_stride: bool = Form(
+        False,
+        description="Also run full detection when a scene change is detected"
+    ),
+    accuracy_audit: bool = Form(
+        False,
+        description="Compare interpolated boxes with full detection on sampled frames"
+    ),
+    render: RenderMode = Form(
+        RenderMode.EAGER,
+        description="eager renders the annotated output now, lazy on the first download, none returns detections only"
+    ),
+    imgsz: Optional[int] = Form(
+        None,
+        ge=32,
+        le=4096,
+        description="Model input size in pixels. If not provided, the deployment default is used."
+    ),
+    adaptive_imgsz: Optional[bool] = Form(
+        None,
+        description="Run small sources at their own resolution and lower video input size while the detector is backed up"
+    ),
+    roi: Optional[str] = Form(
+        None,
+        description='JSON region of interest, e.g. {"polygons": [[[0, 400], [1920, 400], [1920, 1080], [0, 1080]]]}'
+    ),
+    camera_profile: Optional[str] = Form(
+        None,
+        description="Name of a configured camera profile whose region of interest is used"
     )
 ):
     """
-    Upload and process a video for vehicle detection with optional filtering
+    Upload a video for vehicle detection with optional filtering.
+    
+    Processing runs in the background; poll /status/{task_id} for progress
+    and fetch /result/{task_id} once the task is completed.
     """
     # Validate file type
     if not file.content_type.startswith('video/'):
@@ -113,25 +302,190 @@ async def process_video(
         target_classes=set(target_classes) if target_classes is not None else None,
         min_confidence=min_confidence
     )
+    video_options = VideoOptions(
+        frame_stride=frame_stride,
+        adaptive=adaptive_stride,
+        accuracy_audit=accuracy_audit
+    )
+    inference_options = InferenceOptions(
+        imgsz=imgsz,
+        adaptive_imgsz=adaptive_imgsz,
+        roi=_region_of_interest(roi, camera_profile)
+    )
     
-    # Save uploaded file
-    file_path = os.path.join(settings.UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Stream uploaded file to disk
+    try:
+        upload = await save_upload(file, settings.MAX_VIDEO_UPLOAD_SIZE)
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=413,
+            detail=str(e)
+        )
+    file_path = upload.path
     
+    task = detection_service.create_task(upload.filename)
     try:
-        # Process video with filter
-        result = detection_service.process_file(file_path, filter)
-        return result
-    except Exception as e:
+        if job_queue is not None:
+            # A detector worker process picks the job up and removes the upload
+            job_queue.enqueue(task.task_id, "video", job_payload(
+                upload.filename, filter, render,
+                content_hash=upload.sha256,
+                file_path=file_path,
+                video_options=video_options,
+                inference_options=inference_options
+            ))
+            return task
+        # Process video with filter on the background pool
+        future = background_executor.submit(
+            detection_service.process_file, file_path, filter, task.task_id, video_options,
+            filename=upload.filename,
+            content_hash=upload.sha256,
+            render=render,
+            inference_options=inference_options
+        )
+    except (InferenceQueueFull, JobQueueFull) as e:
+        detection_service.remove_task(task.task_id)
+        _remove_upload(file_path)
         raise HTTPException(
-            status_code=500,
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+    
+    # Cleanup uploaded file once processing has finished
+    future.add_done_callback(lambda _: _remove_upload(file_path))
+    return task
+
+@router.post("/batch", response_model=DetectionTask, status_code=202, dependencies=[Depends(_require_model)])
+async def process_batch(
+    files: List[UploadFile] = File(..., description="Images, or one ZIP archive of images"),
+    target_classes: Optional[str] = Form(
+        None,
+        description="JSON string of vehicle classes to detect. If not provided, defaults to car and motorcycle."
+    ),
+    min_confidence: float = Form(
+        0.5,
+        ge=0.0,
+        le=1.0,
+        description="Minimum confidence threshold for detection"
+    ),
+    render: RenderMode = Form(
+        RenderMode.NONE,
+        description="eager renders the annotated outputs now, lazy on the first download, none returns detections only"
+    ),
+    imgsz: Optional[int] = Form(
+        None,
+        ge=32,
+        le=4096,
+        description="Model input size in pixels. If not provided, the deployment default is used."
+    ),
+    roi: Optional[str] = Form(
+        None,
+        description='JSON region of interest, e.g. {"polygons": [[[0, 400], [1920, 400], [1920, 1080], [0, 1080]]]}'
+    ),
+    camera_profile: Optional[str] = Form(
+        None,
+        description="Name of a configured camera profile whose region of interest is used"
+    ),
+    tiled: Optional[bool] = Form(
+        None,
+        description="Split large images into overlapping tiles. If not provided, large images are tiled when the deployment enables it."
+    )
+):
+    """
+    Upload many images, as separate files or one ZIP archive, for detection
+    as one batch task.
+    
+    Every image becomes a child task. Poll /status/{task_id} for progress
+    and fetch /batch/{task_id} for the aggregated statistics and per-image
+    results once the batch is completed.
+    """
+    parsed_target_classes = _parse_target_classes(target_classes)
+    filter = VehicleFilter(
+        target_classes=set(parsed_target_classes) if parsed_target_classes is not None else None,
+        min_confidence=min_confidence
+    )
+    inference_options = InferenceOptions(
+        imgsz=imgsz,
+        tiled=tiled,
+        roi=_region_of_interest(roi, camera_profile)
+    )
+    
+    # The batch is stored as one archive whose members are read one at a time
+    try:
+        upload = await save_batch_upload(files, settings.BATCH_JOB_MAX_UPLOAD_SIZE, settings.BATCH_JOB_MAX_FILES)
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=413,
             detail=str(e)
         )
-    finally:
-        # Cleanup uploaded file
-        background_tasks.add_task(os.remove, file_path)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    file_path = upload.path
+    
+    task = detection_service.create_task(upload.filename)
+    try:
+        if job_queue is not None:
+            # A detector worker process picks the job up and removes the archive
+            job_queue.enqueue(task.task_id, "batch", job_payload(
+                upload.filename, filter, render,
+                file_path=file_path,
+                inference_options=inference_options
+            ))
+            return task
+        future = background_executor.submit(
+            detection_service.process_batch, file_path, task.task_id, filter, render, inference_options
+        )
+    except (InferenceQueueFull, JobQueueFull) as e:
+        detection_service.remove_task(task.task_id)
+        _remove_upload(file_path)
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+    
+    # Cleanup the archive once processing has finished
+    future.add_done_callback(lambda _: _remove_upload(file_path))
+    return task
+
+@router.get("/batch/{task_id}", response_model=BatchResult)
+async def get_batch_result(task_id: str, offset: int = 0, limit: int = 100):
+    """
+    Get the aggregated statistics and a page of per-image results of a batch
+    task
+    """
+    task = detection_service.get_task_status(task_id)
+    if not task or task.batch is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Batch task not found"
+        )
+    offset = max(0, offset)
+    limit = min(max(1, limit), 1000)
+    items = []
+    for child_id in task.batch.child_task_ids[offset:offset + limit]:
+        child = detection_service.get_task_status(child_id)
+        if child is None:
+            continue
+        items.append(BatchItem(
+            task_id=child.task_id,
+            filename=child.filename,
+            status=child.status,
+            error=child.error,
+            result=child.result
+        ))
+    return BatchResult(
+        task_id=task.task_id,
+        status=task.status,
+        summary=task.batch,
+        items=items,
+        offset=offset,
+        limit=limit
+    )
 
 @router.get("/status/{task_id}", response_model=DetectionTask)
 async def get_task_status(task_id: str):
@@ -146,6 +500,81 @@ async def get_task_status(task_id: str):
         )
     return task
 
+async def _task_events(task_id: str) -> AsyncIterator[Optional[TaskEvent]]:
+    """
+    Events of a task until it finishes, starting with its current state.
+    Tasks run by detector worker processes only update the task store, so
+    the store is checked whenever no event arrived for a while; None marks
+    such an idle check without changes.
+    """
+    subscription = detection_service.events.subscribe(task_id)
+    try:
+        task = detection_service.get_task_status(task_id)
+        if not task:
+            return
+        event = detection_service.task_event(task)
+        last_update = event.updated_at
+        yield event
+        while not event.final:
+            event = await subscription.get(settings.TASK_EVENTS_POLL_SECONDS)
+            if event is None:
+                task = detection_service.get_task_status(task_id)
+                if not task:
+                    return
+                if task.updated_at == last_update:
+                    yield None
+                    continue
+                event = detection_service.task_event(task)
+            if event.updated_at is not None:
+                # Skip updates already sent, e.g. published before the first snapshot
+                if event.updated_at <= last_update:
+                    continue
+                last_update = event.updated_at
+            yield event
+    finally:
+        detection_service.events.unsubscribe(subscription)
+
+def _format_sse(event: Optional[TaskEvent]) -> str:
+    if event is None:
+        return ": keep-alive\n\n"
+    return f"event: {event.event}\ndata: {json.dumps(event.data)}\n\n"
+
+@router.get("/events/{task_id}")
+async def task_events(task_id: str):
+    """
+    Server-sent events of a task: status on every progress update, frames
+    with the tracked detections of each batch of video frames, and a final
+    completed (with result and statistics) or failed event
+    """
+    if not detection_service.get_task_status(task_id):
+        raise HTTPException(
+            status_code=404,
+            detail="Task not found"
+        )
+    return StreamingResponse(
+        (_format_sse(event) async for event in _task_events(task_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/ws/{task_id}")
+async def task_events_websocket(websocket: WebSocket, task_id: str):
+    """
+    The events of /events/{task_id} as JSON messages {"event": ..., "data": ...}
+    over a WebSocket, closed after the final event
+    """
+    if not detection_service.get_task_status(task_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Task not found")
+        return
+    await websocket.accept()
+    try:
+        async for event in _task_events(task_id):
+            if event is not None:
+                await websocket.send_json({"event": event.event, "data": event.data})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
 @router.get("/result/{task_id}", response_model=DetectionResult)
 async def get_task_result(task_id: str):
     """
@@ -162,24 +591,158 @@ async def get_task_result(task_id: str):
             status_code=400,
             detail=f"Task is not completed (status: {task.status})"
         )
+    if task.batch is not None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Results of batch tasks are served by /batch/{task_id}"
+        )
     return task.result
 
-@router.get("/download/{filename}")
-async def download_processed_file(filename: str):
+@router.get("/frames/{task_id}", response_model=FramePage)
+async def get_frames(
+    task_id: str,
+    start_frame: int = 0,
+    end_frame: Optional[int] = None,
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None,
+    limit: int = settings.FRAMES_PAGE_LIMIT,
+    skip_empty: bool = False
+):
     """
-    Download a processed image or video file
+    Get a page of the tracked detections of a video task by frame range
+    [start_frame, end_frame) or time window in seconds. Follow next_frame
+    as start_frame for the next page; skip_empty leaves out frames without
+    detections.
     """
-    file_path = os.path.join(settings.OUTPUT_DIR, filename)
-    if not os.path.exists(file_path):
+    task = detection_service.get_task_status(task_id)
+    if not task:
         raise HTTPException(
             status_code=404,
-            detail="File not found"
+            detail="Task not found"
         )
-    return FileResponse(
-        file_path,
-        media_type="application/octet-stream",
-        filename=filename
+    if task.status != "completed":
+        raise HTTPException(
+            status_code=400,
+            detail=f"Task is not completed (status: {task.status})"
+        )
+    try:
+        page = detection_service.get_frames(
+            task_id,
+            start_frame=start_frame,
+            end_frame=end_frame,
+            start_time=start_time,
+            end_time=end_time,
+            limit=min(max(1, limit), settings.FRAMES_MAX_PAGE_LIMIT),
+            skip_empty=skip_empty
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    if page is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Per-frame detections are not available for this task"
+        )
+    return page
+
+@router.post("/refilter/{task_id}", response_model=DetectionResult, dependencies=[Depends(_require_model)])
+async def refilter_task(task_id: str, request: RefilterRequest):
+    """
+    Re-apply a different filter to the stored raw detections of a completed
+    task without running the model again
+    """
+    try:
+        return await inference_executor.run(
+            detection_service.refilter_task, task_id, request.filter, request.render
+        )
+    except InferenceQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+    except LookupError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+
+async def _render_video_output(request: Request, filename: str):
+    """
+    Serve a deferred video output once its render on the background pool
+    has finished. Rendering takes minutes, so until then the client gets 202
+    and polls this URL again.
+    """
+    future = await asyncio.to_thread(
+        detection_service.render_in_background, background_executor.submit, filename
     )
+    if future is None:
+        raise HTTPException(
+            status_code=404,
+            detail="File not found"
+        )
+    if not future.done():
+        return JSONResponse(
+            status_code=202,
+            content={"status": "rendering", "detail": f"{filename} is being rendered", "url": str(request.url)},
+            headers={"Location": str(request.url), "Retry-After": "5"}
+        )
+    detection_service.forget_render(filename, future)
+    try:
+        file_path = future.result()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Rendering failed: {e}"
+        )
+    if file_path is None:
+        raise HTTPException(
+            status_code=404,
+            detail="File not found"
+        )
+    return file_response(request, file_path, filename)
+
+@router.api_route("/download/{filename}", methods=["GET", "HEAD"])
+async def download_processed_file(filename: str, request: Request):
+    """
+    Download a processed image or video file with its media type. Range
+    requests let players seek, and ETag/Last-Modified allow 304 responses.
+    Outputs of lazily rendered tasks are rendered on the first download;
+    videos render in the background and get 202 until they are ready.
+    """
+    # Only processed outputs are served, never other files kept in the output directory
+    if not OUTPUT_PATTERN.match(filename):
+        raise HTTPException(
+            status_code=404,
+            detail="File not found"
+        )
+    file_path = os.path.join(settings.OUTPUT_DIR, filename)
+    if not os.path.isfile(file_path):
+        # Deferred outputs are rendered with the model's class names
+        _require_model()
+        try:
+            if filename.lower().endswith(VIDEO_EXTENSIONS):
+                return await _render_video_output(request, filename)
+            file_path = await inference_executor.run(detection_service.ensure_output, filename)
+        except InferenceQueueFull as e:
+            raise HTTPException(
+                status_code=503,
+                detail=str(e),
+                headers={"Retry-After": "1"}
+            )
+        if file_path is None:
+            raise HTTPException(
+                status_code=404,
+                detail="File not found"
+            )
+    return file_response(request, file_path, filename)
 
 @router.get("/stats/{task_id}", response_model=DetectionStats)
 async def get_detection_stats(task_id: str):
@@ -197,8 +760,106 @@ async def get_detection_stats(task_id: str):
             status_code=400,
             detail=f"Task is not completed (status: {task.status})"
         )
+    return detection_service.task_stats(task)
+
+@router.post("/streams", response_model=StreamStatus, status_code=201, dependencies=[Depends(_require_model)])
+async def start_stream(request: StreamRequest):
+    """
+    Start detecting vehicles on a live stream (RTSP, HTTP MJPEG or a file
+    in the stream directory). Frames arriving while the detector is busy
+    are dropped, and the session keeps rolling vehicle counts by class.
+    """
+    source = request.source
+    roi = request.roi
+    if request.camera_profile:
+        profile = detection_service.camera_profiles.get(request.camera_profile)
+        if profile is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown camera profile: {request.camera_profile}"
+            )
+        source = source or profile.stream_url
+        roi = roi or profile.roi
+    if not source:
+        raise HTTPException(
+            status_code=400,
+            detail="A source or a camera profile with a stream URL is required"
+        )
     
-    return detection_service.get_detection_stats(
-        task.result.detections,
-        task.result.processing_time
-    ) 
\ No newline at end of file
+    try:
+        session = stream_manager.start(
+            source,
+            request.filter,
+            InferenceOptions(imgsz=request.imgsz, roi=roi),
+            request.on_end
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except StreamLimitReached as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
+    return session.status()
+
+@router.get("/streams", response_model=List[StreamStatus])
+async def list_streams():
+    """
+    List running and recently ended stream sessions
+    """
+    return [session.status() for session in stream_manager.list()]
+
+@router.get("/streams/{stream_id}", response_model=StreamStatus)
+async def get_stream(stream_id: str):
+    """
+    Get the state, frame rates and rolling counts of a stream session
+    """
+    session = stream_manager.get(stream_id)
+    if not session:
+        raise HTTPException(
+            status_code=404,
+            detail="Stream not found"
+        )
+    return session.status()
+
+@router.delete("/streams/{stream_id}", response_model=StreamStatus)
+async def stop_stream(stream_id: str):
+    """
+    Stop a stream session and return its final status
+    """
+    session = await asyncio.to_thread(stream_manager.stop, stream_id)
+    if not session:
+        raise HTTPException(
+            status_code=404,
+            detail="Stream not found"
+        )
+    return session.status()
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Get load metrics of the detection subsystems
+    """
+    return {
+        "state": detection_service.state,
+        "startup_timings": detection_service.startup_timings,
+        "worker_load_error": detection_service.worker_load_error,
+        "backend": detection_service.backend.to_dict() if detection_service.backend else None,
+        "executor": inference_executor.stats(),
+        "background_executor": background_executor.stats(),
+        "batching": detection_service.batcher.stats() if detection_service.batcher else None,
+        "input_size": detection_service.input_sizer.stats(),
+        "video_pipeline": detection_service.pipeline_metrics.snapshot(),
+        "result_cache": detection_service.result_cache.stats(),
+        "job_queue": job_queue.stats() if job_queue is not None else None,
+        "streams": stream_manager.stats(),
+        "task_events": detection_service.events.stats(),
+        "task_store": {
+            **detection_service.tasks.stats(),
+            "evicted": detection_service.task_evictor.evicted
+        }
+    }
@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import List, Literal, Union
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl, validator
 import secrets
@@ -14,11 +14,148 @@ class Settings(BaseSettings):
     MODEL_PATH: str = "models/yolov8n.pt"
     CONFIDENCE_THRESHOLD: float = 0.25
     IOU_THRESHOLD: float = 0.45
+    # The model always keeps only vehicle classes above CONFIDENCE_THRESHOLD
+    # and the request filter is applied afterwards, so stored detections can
+    # be re-filtered to any vehicle class or lower confidence later. True also
+    # runs the model with the request's classes and confidence: slightly
+    # faster, but /refilter then cannot widen the filter of those tasks
+    PUSH_FILTER_TO_MODEL: bool = False
+    
+    # Startup settings
+    LOAD_MODEL_IN_BACKGROUND: bool = True  # Serve docs and health checks while the model loads
+    WARMUP_IMGSZ: List[int] = [640]  # Input sizes every model instance runs once before serving
+    
+    # Input size settings
+    INFERENCE_IMGSZ: int = 640  # Model input size when a request does not set one
+    IMGSZ_MIN: int = 320
+    IMGSZ_MAX: int = 1280
+    ADAPTIVE_IMGSZ: bool = False  # Default of the per-request adaptive input size option
+    ADAPTIVE_IMGSZ_STEPS: List[int] = [640, 480, 320]  # Sizes videos step down through under load
+    ADAPTIVE_IMGSZ_BACKLOG: int = 4  # Waiting jobs at which videos run at the smallest step
+    
+    # Tiled inference settings for very large images
+    TILING_ENABLED: bool = False  # Tile large images unless the request says otherwise
+    TILE_MIN_IMAGE_SIZE: int = 2000  # Longest side from which images are tiled automatically
+    TILE_SIZE: int = 640
+    TILE_OVERLAP: float = 0.2  # Share of a tile overlapping its neighbours
+    TILE_MAX_TILES: int = 64  # Tiles grow beyond TILE_SIZE to stay within this
+    TILE_MERGE_THRESHOLD: float = 0.5  # Intersection over the smaller box that merges tile duplicates
+    TILE_FULL_FRAME: bool = True  # Also run the whole image so large vehicles are not split
+    
+    # Region of interest settings
+    CAMERA_PROFILES_PATH: str = "camera_profiles.json"  # Named camera settings, loaded at startup if present
+    ROI_CROP_MARGIN: int = 32  # Pixels kept around the ROI bounds so vehicles on its edge stay whole
+    
+    # Inference backend settings
+    INFERENCE_BACKEND: Literal["auto", "pytorch", "onnx", "openvino"] = "auto"
+    BACKEND_EXPORT_IMGSZ: int = 640
+    BACKEND_INT8: bool = False  # Quantize the OpenVINO export to INT8
+    BACKEND_INT8_DATA: str = "coco128.yaml"  # Calibration dataset for INT8
+    BACKEND_VERIFY: bool = True  # Compare exported backends with PyTorch before using them
+    BACKEND_VERIFY_MIN_IOU: float = 0.9
+    BACKEND_VERIFY_CONF_TOLERANCE: float = 0.05
+    
+    # Inference executor settings
+    INFERENCE_WORKERS: int = 2  # Worker threads decoding and post-processing image requests
+    INFERENCE_QUEUE_SIZE: int = 8  # Jobs allowed to wait before requests get 503
+    BACKGROUND_WORKERS: int = 2  # Threads running video and batch tasks, each with its own model instance
+    BACKGROUND_QUEUE_SIZE: int = 16  # Video and batch tasks allowed to wait before uploads get 503
+    
+    # Micro-batching settings for image requests
+    BATCH_MAX_SIZE: int = 8
+    BATCH_WINDOW_MS: float = 10.0  # How long the first image waits for others
+    BATCH_WORKERS: int = 1  # Batches that can run inference concurrently
+    BATCH_MAX_PENDING: int = 64  # Image inputs allowed to wait for a batch before requests get 503
+    
+    # Batch job settings (POST /batch)
+    BATCH_JOB_MAX_FILES: int = 10000
+    BATCH_JOB_MAX_UPLOAD_SIZE: int = 2 * 1024 * 1024 * 1024  # 2GB per archive
+    BATCH_JOB_PARALLELISM: int = 8  # Images of a batch in flight at once, grouped by the micro-batcher
+    BATCH_JOB_PROGRESS_EVERY: int = 25  # Images between progress updates of the batch task
+    
+    # Video pipeline settings
+    VIDEO_BATCH_SIZE: int = 4  # Frames per inference call
+    VIDEO_QUEUE_SIZE: int = 16  # Frames buffered between pipeline stages
+    SCENE_CHANGE_THRESHOLD: float = 30.0  # Mean gray level difference that forces a keyframe
+    STRIDE_AUDIT_EVERY: int = 10  # Audit one in N interpolated frames when requested
+    
+    # Vehicle tracking settings
+    TRACK_IOU_THRESHOLD: float = 0.3
+    TRACK_MAX_AGE: int = 30  # Frames a vehicle may go undetected before its track ends
+    TRACK_MIN_HITS: int = 3  # Frames a vehicle must be seen in to be counted
+    
+    # Task event push settings (SSE and WebSocket)
+    TASK_EVENTS_QUEUE_SIZE: int = 256  # Events buffered per client; the oldest are dropped when it falls behind
+    TASK_EVENTS_FRAME_BATCH: int = 10  # Video frames per detections event
+    TASK_EVENTS_POLL_SECONDS: float = 1.0  # Task store check for tasks run by other processes, and keep-alive period
+    
+    # Live stream settings
+    STREAM_MAX_SESSIONS: int = 4  # Sessions that can run at once
+    STREAM_ALLOWED_SCHEMES: List[str] = ["rtsp", "rtsps", "http", "https"]
+    # Hosts stream URLs may point at, e.g. ["10.0.5.21", "*.cameras.example.com"]; the server
+    # connects to them, so any other host is rejected. Camera profile stream URLs are always allowed
+    STREAM_ALLOWED_HOSTS: List[str] = []
+    STREAM_FILE_DIR: str = "streams"  # Video files that can be opened as live sources by name
+    STREAM_WINDOW_SECONDS: float = 60.0  # Period of the rolling vehicle counts
+    STREAM_RATE_WINDOW_SECONDS: float = 5.0  # Period over which source and achieved fps are measured
+    STREAM_OPEN_TIMEOUT_SECONDS: float = 10.0  # OpenCV opens sources one at a time, so a dead source delays others
+    STREAM_READ_TIMEOUT_SECONDS: float = 10.0
+    STREAM_RECONNECT_ATTEMPTS: int = 5  # Failed reconnects in a row before a session fails
+    STREAM_RECONNECT_DELAY_SECONDS: float = 2.0
+    STREAM_FOLLOW_POLL_SECONDS: float = 0.5  # How often a followed file is checked for new frames
+    STREAM_KEEP_FINISHED: int = 16  # Ended sessions kept for status queries
     
     # File storage settings
     UPLOAD_DIR: str = "uploads"
     OUTPUT_DIR: str = "outputs"
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
+    MAX_VIDEO_UPLOAD_SIZE: int = 500 * 1024 * 1024  # 500MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1MB read per chunk while streaming uploads
+    DOWNLOAD_CHUNK_SIZE: int = 256 * 1024  # Bytes sent per chunk of a range download
+    
+    # Processed video settings
+    VIDEO_FRAGMENTED_MP4: bool = False  # Rewrite .mp4 outputs with ffmpeg so playback starts before the download ends
+    FFMPEG_PATH: str = "ffmpeg"
+    # H.264 plays in browsers; ["-c:v", "copy"] only remuxes the OpenCV encoding
+    FFMPEG_VIDEO_ARGS: List[str] = ["-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p"]
+    FFMPEG_TIMEOUT_SECONDS: float = 600.0
+    
+    # Result cache settings
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_SIZE: int = 256  # Results kept in memory
+    RESULT_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    RESULT_CACHE_DIR: str = "outputs/cache"
+    RESULT_CACHE_MAX_FILES: int = 10000  # Results kept on disk; the oldest are deleted beyond this
+    RESULT_CACHE_SWEEP_INTERVAL_SECONDS: int = 10 * 60  # Minimum time between sweeps of the disk tier
+    
+    # Raw detection store settings
+    RAW_DETECTIONS_DIR: str = "outputs/raw"
+    # Keep every upload for TASK_TTL_SECONDS so any task can be re-rendered after a refilter.
+    # Uploads of render=lazy tasks are always kept until their output is rendered.
+    RETAIN_SOURCES: bool = False
+    
+    # Per-frame video detection store settings (GET /frames)
+    FRAME_STORE_DIR: str = "outputs/frames"
+    FRAME_STORE_CHUNK_ROWS: int = 65536  # Boxes buffered before they are appended to the file
+    FRAMES_PAGE_LIMIT: int = 100  # Frames per page when a request does not set a limit
+    FRAMES_MAX_PAGE_LIMIT: int = 1000
+    
+    # Task store settings
+    TASK_STORE_BACKEND: str = "sqlite"  # "sqlite" or "memory"
+    TASK_DB_PATH: str = "data/tasks.db"  # Kept out of OUTPUT_DIR, whose files are downloadable
+    TASK_CACHE_SIZE: int = 256  # Finished tasks kept in memory
+    TASK_TTL_SECONDS: int = 7 * 24 * 60 * 60  # Finished tasks and their files are removed after this
+    TASK_EVICT_INTERVAL_SECONDS: int = 600
+    
+    # Job queue settings (API processes enqueue, `python worker.py` processes run jobs)
+    JOB_QUEUE_ENABLED: bool = False  # False runs detection inside the API process
+    JOB_QUEUE_PATH: str = "data/jobs.db"  # Holds the uploads of queued image jobs; kept out of OUTPUT_DIR
+    JOB_QUEUE_MAX_DEPTH: int = 1000  # Queued jobs allowed before requests get 503
+    JOB_LEASE_SECONDS: float = 60.0  # Renewed while a job runs; expired leases are retried
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_POLL_INTERVAL_SECONDS: float = 0.2
+    JOB_WAIT_TIMEOUT_SECONDS: float = 60.0  # How long POST /image waits for its job
+    JOB_RETENTION_SECONDS: int = 24 * 60 * 60  # Finished jobs are purged after this
     
     # CORS settings
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = ["http://localhost:3000"]
@@ -46,6 +183,10 @@ def create_dirs(self):
         """Create necessary directories if they don't exist"""
         Path(self.UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
         Path(self.OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
+        Path(self.RESULT_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+        Path(self.RAW_DETECTIONS_DIR).mkdir(parents=True, exist_ok=True)
+        Path(self.FRAME_STORE_DIR).mkdir(parents=True, exist_ok=True)
+        Path(self.STREAM_FILE_DIR).mkdir(parents=True, exist_ok=True)
         Path("models").mkdir(parents=True, exist_ok=True)
 
 settings = Settings()
@@ -1,5 +1,5 @@
-from typing import List, Optional, Set
-from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Set, Tuple
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 from enum import Enum
 
@@ -11,6 +11,18 @@ class VehicleClass(str, Enum):
     TRUCK = "truck"
     BICYCLE = "bicycle"
 
+class RenderMode(str, Enum):
+    """When the annotated output of a task is produced"""
+    EAGER = "eager"  # Rendered while processing
+    LAZY = "lazy"    # Rendered on the first download
+    NONE = "none"    # Detections only, no annotated output
+
+class StreamEndMode(str, Enum):
+    """What a live session does when its file source runs out of frames"""
+    STOP = "stop"      # End the session
+    LOOP = "loop"      # Start the file again
+    FOLLOW = "follow"  # Wait for frames appended to a growing file
+
 class VehicleFilter(BaseModel):
     """Filter for vehicle detection"""
     target_classes: Optional[Set[VehicleClass]] = Field(
@@ -24,6 +36,76 @@ class VehicleFilter(BaseModel):
         description="Minimum confidence threshold for detection"
     )
 
+class VideoOptions(BaseModel):
+    """Frame sampling options for video processing"""
+    frame_stride: int = Field(
+        default=1,
+        ge=1,
+        le=60,
+        description="Run full detection every K frames and interpolate boxes in between"
+    )
+    adaptive: bool = Field(
+        default=False,
+        description="Also run full detection when a scene change is detected"
+    )
+    accuracy_audit: bool = Field(
+        default=False,
+        description="Run full detection on a sample of interpolated frames and report accuracy"
+    )
+
+class RegionOfInterest(BaseModel):
+    """Parts of the frame that can contain relevant vehicles"""
+    polygons: List[List[Tuple[float, float]]] = Field(
+        ...,
+        min_length=1,
+        description="Polygons as lists of [x, y] points; vehicles outside every polygon are ignored"
+    )
+    normalized: bool = Field(
+        False,
+        description="Points are fractions of the frame width and height instead of pixels"
+    )
+    
+    @field_validator("polygons")
+    @classmethod
+    def check_polygons(cls, v: List[List[Tuple[float, float]]]) -> List[List[Tuple[float, float]]]:
+        if any(len(polygon) < 3 for polygon in v):
+            raise ValueError("Each polygon needs at least 3 points")
+        return v
+
+class CameraProfile(BaseModel):
+    """Settings of a fixed camera installation"""
+    roi: Optional[RegionOfInterest] = Field(None, description="Region of interest of the camera")
+    stream_url: Optional[str] = Field(None, description="Live stream URL of the camera")
+
+class InferenceOptions(BaseModel):
+    """Model input size options of a detection request"""
+    imgsz: Optional[int] = Field(
+        None,
+        ge=32,
+        le=4096,
+        description="Model input size in pixels, rounded to a multiple of 32 and kept within the deployment limits"
+    )
+    adaptive_imgsz: Optional[bool] = Field(
+        None,
+        description="Run small sources at their own resolution and lower video input size while the detector is backed up"
+    )
+    tiled: Optional[bool] = Field(
+        None,
+        description="Run large images as overlapping tiles so small distant vehicles are found; null tiles automatically"
+    )
+    roi: Optional[RegionOfInterest] = Field(
+        None,
+        description="Only this region is run through the model and vehicles outside it are dropped"
+    )
+
+class RefilterRequest(BaseModel):
+    """Request to re-apply a filter to the stored detections of a task"""
+    filter: VehicleFilter = Field(default_factory=VehicleFilter, description="Filter to apply")
+    render: bool = Field(
+        False,
+        description="Render the annotated output now instead of on its first download"
+    )
+
 class BoundingBox(BaseModel):
     """Bounding box coordinates and confidence"""
     x1: float = Field(..., description="Top-left x coordinate")
@@ -33,27 +115,80 @@ class BoundingBox(BaseModel):
     confidence: float = Field(..., description="Detection confidence score")
     class_id: int = Field(..., description="Class ID of detected object")
     class_name: str = Field(..., description="Class name of detected object")
+    track_id: Optional[int] = Field(None, description="ID of the vehicle track in a video")
+
+class TrackSummary(BaseModel):
+    """Compact summary of one vehicle tracked across video frames"""
+    track_id: int = Field(..., description="Unique vehicle track identifier")
+    class_id: int = Field(..., description="Class ID of the tracked vehicle")
+    class_name: str = Field(..., description="Class name of the tracked vehicle")
+    first_frame: int = Field(..., description="First frame the vehicle was seen in")
+    last_frame: int = Field(..., description="Last frame the vehicle was seen in")
+    best_frame: int = Field(..., description="Frame of the most confident detection")
+    best_confidence: float = Field(..., description="Highest detection confidence of the track")
+    best_box: BoundingBox = Field(..., description="Most confident detection of the track")
+
+class StrideReport(BaseModel):
+    """Throughput/accuracy tradeoff of strided video detection"""
+    keyframes: int = Field(..., description="Frames that ran full detection")
+    interpolated_frames: int = Field(..., description="Frames whose boxes were interpolated")
+    audited_frames: int = Field(0, description="Interpolated frames compared against full detection")
+    precision: Optional[float] = Field(None, description="Share of interpolated boxes matching a detected box")
+    recall: Optional[float] = Field(None, description="Share of detected boxes matched by an interpolated box")
+    mean_iou: Optional[float] = Field(None, description="Mean IoU of matched box pairs")
 
 class DetectionResult(BaseModel):
     """Result of vehicle detection"""
     task_id: str = Field(..., description="Unique task identifier")
     filename: str = Field(..., description="Original filename")
-    processed_filename: str = Field(..., description="Filename of processed image/video")
-    detections: List[BoundingBox] = Field(default_factory=list, description="List of detections")
+    processed_filename: Optional[str] = Field(
+        ...,
+        description="Filename of processed image/video, or null if no annotated output was rendered"
+    )
+    detections: List[BoundingBox] = Field(
+        default_factory=list,
+        description="List of detections; for videos, the most confident box of each tracked vehicle"
+    )
+    tracks: List[TrackSummary] = Field(default_factory=list, description="Vehicle tracks of a video")
     processing_time: float = Field(..., description="Processing time in seconds")
     created_at: datetime = Field(default_factory=datetime.utcnow, description="Timestamp of creation")
     status: str = Field(..., description="Processing status: pending/processing/completed/failed")
     error: Optional[str] = Field(None, description="Error message if status is failed")
     filter: Optional[VehicleFilter] = Field(None, description="Filter applied to detections")
+    stride_report: Optional[StrideReport] = Field(None, description="Accuracy report of strided video detection")
+    cached: bool = Field(False, description="Whether the result was served from the result cache")
+    imgsz: Optional[int] = Field(None, description="Model input size the source was planned to run at")
+    reduced_frames: Optional[int] = Field(
+        None,
+        description="Video frames run at a smaller input size because the detector was backed up"
+    )
+    tiles: Optional[int] = Field(None, description="Number of tiles a large image was split into")
+    frame_count: Optional[int] = Field(None, description="Number of video frames; per-frame detections are at /frames")
+    fps: Optional[float] = Field(None, description="Frame rate of the video")
     
     class Config:
         json_encoders = {
             datetime: lambda v: v.isoformat()
         }
 
+class FrameDetections(BaseModel):
+    """Detections of one video frame"""
+    frame_index: int = Field(..., description="Index of the frame in the video")
+    timestamp: Optional[float] = Field(None, description="Time of the frame in seconds, if the frame rate is known")
+    detections: List[BoundingBox] = Field(default_factory=list, description="Tracked detections of the frame")
+
+class FramePage(BaseModel):
+    """A page of per-frame detections of a video task"""
+    task_id: str = Field(..., description="Task identifier")
+    frame_count: int = Field(..., description="Number of frames in the video")
+    fps: Optional[float] = Field(None, description="Frame rate of the video")
+    frames: List[FrameDetections] = Field(default_factory=list, description="Frames of the page in order")
+    next_frame: Optional[int] = Field(None, description="start_frame of the next page, or null after the last page")
+
 class DetectionStats(BaseModel):
     """Statistics of detected vehicles"""
     total_vehicles: int = Field(..., description="Total number of vehicles detected")
+    unique_vehicles: Optional[int] = Field(None, description="Number of distinct vehicles tracked in a video")
     by_class: dict = Field(..., description="Count of vehicles by class")
     processing_time: float = Field(..., description="Total processing time in seconds")
     
@@ -69,6 +204,17 @@ class Config:
             }
         }
 
+class BatchSummary(BaseModel):
+    """Progress and aggregated statistics of a batch task"""
+    total_files: int = Field(..., description="Number of images in the batch")
+    completed_files: int = Field(0, description="Images processed successfully")
+    failed_files: int = Field(0, description="Images that could not be processed")
+    stats: Optional[DetectionStats] = Field(None, description="Vehicle statistics over all images, once completed")
+    child_task_ids: List[str] = Field(
+        default_factory=list,
+        description="Task IDs of the images in archive order, once completed"
+    )
+
 class DetectionTask(BaseModel):
     """Task for vehicle detection"""
     task_id: str = Field(..., description="Unique task identifier")
@@ -76,10 +222,87 @@ class DetectionTask(BaseModel):
     status: str = Field(..., description="Task status: pending/processing/completed/failed")
     created_at: datetime = Field(default_factory=datetime.utcnow, description="Timestamp of creation")
     updated_at: datetime = Field(default_factory=datetime.utcnow, description="Timestamp of last update")
+    progress: float = Field(0.0, description="Processing progress in percent")
+    frames_processed: Optional[int] = Field(None, description="Number of video frames processed so far")
+    total_frames: Optional[int] = Field(None, description="Total number of video frames, if known")
+    fps: Optional[float] = Field(None, description="Processing throughput in frames per second")
+    eta_seconds: Optional[float] = Field(None, description="Estimated seconds until completion")
     result: Optional[DetectionResult] = Field(None, description="Detection result if completed")
     error: Optional[str] = Field(None, description="Error message if failed")
+    invalid_input: bool = Field(False, description="Whether the task failed because its input could not be processed")
+    parent_task_id: Optional[str] = Field(None, description="Batch task this image belongs to")
+    batch: Optional[BatchSummary] = Field(None, description="Progress and statistics of a batch task")
     
     class Config:
         json_encoders = {
             datetime: lambda v: v.isoformat()
-        } 
\ No newline at end of file
+        }
+
+class BatchItem(BaseModel):
+    """Outcome of one image of a batch"""
+    task_id: str = Field(..., description="Task identifier of the image")
+    filename: str = Field(..., description="Filename of the image in the batch")
+    status: str = Field(..., description="Task status of the image")
+    error: Optional[str] = Field(None, description="Error message if the image failed")
+    result: Optional[DetectionResult] = Field(None, description="Detection result of the image")
+
+class BatchResult(BaseModel):
+    """Aggregated statistics and a page of per-image results of a batch"""
+    task_id: str = Field(..., description="Batch task identifier")
+    status: str = Field(..., description="Batch task status")
+    summary: BatchSummary = Field(..., description="Progress and aggregated statistics")
+    items: List[BatchItem] = Field(default_factory=list, description="Per-image results of the requested page")
+    offset: int = Field(0, description="Index of the first returned image")
+    limit: int = Field(..., description="Maximum number of returned images")
+
+class StreamRequest(BaseModel):
+    """Request to start a live stream session"""
+    source: Optional[str] = Field(
+        None,
+        description="rtsp:// or http(s):// stream URL, or the name of a video file in the stream directory"
+    )
+    camera_profile: Optional[str] = Field(
+        None,
+        description="Camera profile whose stream URL and ROI are used unless given here"
+    )
+    filter: VehicleFilter = Field(default_factory=VehicleFilter, description="Vehicles to detect and count")
+    roi: Optional[RegionOfInterest] = Field(None, description="Region of interest of the stream")
+    imgsz: Optional[int] = Field(
+        None,
+        ge=32,
+        le=4096,
+        description="Model input size in pixels; the deployment default if not set"
+    )
+    on_end: StreamEndMode = Field(StreamEndMode.STOP, description="What to do when a file source ends")
+
+class StreamStatus(BaseModel):
+    """State, throughput and rolling vehicle counts of a live stream session"""
+    stream_id: str = Field(..., description="Unique session identifier")
+    source: str = Field(..., description="Stream source, without credentials")
+    state: str = Field(..., description="Session state: connecting/running/ended/stopped/failed")
+    error: Optional[str] = Field(None, description="Error message if failed")
+    started_at: datetime = Field(..., description="Timestamp of the start request")
+    stopped_at: Optional[datetime] = Field(None, description="Timestamp the session ended")
+    width: Optional[int] = Field(None, description="Frame width of the source")
+    height: Optional[int] = Field(None, description="Frame height of the source")
+    imgsz: Optional[int] = Field(None, description="Model input size used for the frames")
+    nominal_fps: Optional[float] = Field(None, description="Frame rate the source declares")
+    source_fps: float = Field(0.0, description="Frames per second currently arriving from the source")
+    achieved_fps: float = Field(0.0, description="Frames per second currently being detected")
+    frames_received: int = Field(0, description="Frames read from the source")
+    frames_processed: int = Field(0, description="Frames run through detection")
+    frames_dropped: int = Field(0, description="Frames replaced by a newer one before detection")
+    latency_ms: Optional[float] = Field(None, description="Time from reading the last processed frame to its detections")
+    reconnects: int = Field(0, description="Times the source was reopened after a failure")
+    window_seconds: float = Field(..., description="Period of the rolling counts")
+    current_counts: Dict[str, int] = Field(default_factory=dict, description="Vehicles by class in the last processed frame")
+    window_counts: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Distinct vehicles by class that appeared within the rolling window"
+    )
+    total_counts: Dict[str, int] = Field(default_factory=dict, description="Distinct vehicles by class since the start")
+    
+    class Config:
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
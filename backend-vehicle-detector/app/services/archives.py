@@ -0,0 +1,100 @@
+import asyncio
+import hashlib
+import os
+import uuid
+import zipfile
+from pathlib import Path
+from typing import List, Set
+from fastapi import UploadFile
+from ..core.config import settings
+from .upload_service import StoredUpload, UploadTooLarge, save_upload, safe_filename
+
+# Archive members with these extensions are processed as images
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff")
+
+def is_archive(file: UploadFile) -> bool:
+    return (file.filename or "").lower().endswith(".zip") or file.content_type in (
+        "application/zip", "application/x-zip-compressed"
+    )
+
+def image_members(archive: zipfile.ZipFile, max_files: int) -> List[zipfile.ZipInfo]:
+    """Image members of an archive in archive order; raises ValueError past max_files"""
+    members = [
+        info for info in archive.infolist()
+        if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)
+        and not Path(info.filename).name.startswith(".")
+    ]
+    if len(members) > max_files:
+        raise ValueError(f"Archive contains more than {max_files} images")
+    return members
+
+def read_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo, max_size: int) -> bytes:
+    """
+    Read one member into memory. The declared size is checked first and the
+    read is capped, so a forged header cannot inflate past the limit.
+    """
+    if info.file_size > max_size:
+        raise UploadTooLarge(f"{info.filename} exceeds the {max_size} byte upload limit")
+    with archive.open(info) as member:
+        data = member.read(max_size + 1)
+    if len(data) > max_size:
+        raise UploadTooLarge(f"{info.filename} exceeds the {max_size} byte upload limit")
+    return data
+
+def _unique_name(filename: str, used: Set[str]) -> str:
+    name = filename
+    stem, suffix = os.path.splitext(filename)
+    counter = 1
+    while name in used:
+        name = f"{stem}_{counter}{suffix}"
+        counter += 1
+    used.add(name)
+    return name
+
+async def save_batch_upload(
+    files: List[UploadFile],
+    max_size: int,
+    max_files: int,
+    directory: str = settings.UPLOAD_DIR
+) -> StoredUpload:
+    """
+    Store the files of a batch request as one ZIP archive.
+
+    A single uploaded archive is streamed to disk as it is. Separate images
+    are streamed chunk by chunk into a new uncompressed archive, so batches
+    are always processed from an archive and never held in memory.
+    """
+    if len(files) == 1 and is_archive(files[0]):
+        return await save_upload(files[0], max_size, directory)
+    if any(is_archive(file) for file in files):
+        raise ValueError("Upload either one ZIP archive or image files, not both")
+    if len(files) > max_files:
+        raise ValueError(f"A batch can contain at most {max_files} images")
+
+    path = os.path.join(directory, f"{uuid.uuid4().hex}_batch.zip")
+    digest = hashlib.sha256()
+    size = 0
+    used: Set[str] = set()
+    try:
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as archive:
+            for file in files:
+                name = _unique_name(safe_filename(file.filename), used)
+                member = archive.open(name, "w", force_zip64=True)
+                try:
+                    while True:
+                        chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        size += len(chunk)
+                        if size > max_size:
+                            raise UploadTooLarge(f"Batch exceeds the {max_size} byte upload limit")
+                        digest.update(chunk)
+                        await asyncio.to_thread(member.write, chunk)
+                finally:
+                    member.close()
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    return StoredUpload(path=path, filename="batch.zip", size=size, sha256=digest.hexdigest())
@@ -0,0 +1,168 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+class BatchQueueFull(Exception):
+    """Raised when too many inputs are already waiting for a batch"""
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram"""
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = list(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            index = len(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    index = i
+                    break
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counts per upper bucket bound plus count/sum/mean"""
+        with self._lock:
+            counts = {str(bound): n for bound, n in zip(self.buckets, self._counts)}
+            counts["+inf"] = self._counts[-1]
+            return {
+                "buckets": counts,
+                "count": self._count,
+                "sum": self._sum,
+                "mean": self._sum / self._count if self._count else 0.0
+            }
+
+class MicroBatcher:
+    """
+    Collects inference inputs arriving within a short window and runs them
+    as one batched call.
+
+    Inputs are grouped by a hashable key (the model call parameters), and only
+    inputs sharing a key are batched together. Each consumer thread runs its
+    own batches, so several batches can be in inference at once. An
+    initializer, e.g. loading the thread's model, runs in every consumer
+    thread before the batcher is returned.
+    """
+    def __init__(
+        self,
+        infer_batch: Callable[[Hashable, List[Any]], List[Any]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        num_workers: int = 1,
+        initializer: Optional[Callable[[], Any]] = None
+    ):
+        self._infer_batch = infer_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[Tuple[Hashable, Any, Future, float]]" = queue.Queue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self.batch_size_histogram = Histogram([1, 2, 4, 8, 16, 32, 64])
+        self.wait_time_histogram = Histogram([1, 2, 5, 10, 20, 50, 100, 250])  # ms
+        self._initializer = initializer
+        self._ready = threading.Barrier(num_workers + 1)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"micro-batcher-{i}", daemon=True)
+            for i in range(num_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        self._ready.wait()
+
+    def submit(self, key: Hashable, item: Any) -> Future:
+        """Queue one input and return a future for its result"""
+        future: Future = Future()
+        with self._pending_lock:
+            self._pending += 1
+        future.add_done_callback(self._done)
+        self._queue.put((key, item, future, time.perf_counter()))
+        return future
+
+    def _done(self, _: Future):
+        with self._pending_lock:
+            self._pending -= 1
+
+    @property
+    def pending(self) -> int:
+        """Inputs queued or in inference"""
+        with self._pending_lock:
+            return self._pending
+
+    def infer(self, key: Hashable, item: Any) -> Any:
+        """Queue one input and block until its result is ready"""
+        return self.submit(key, item).result()
+
+    def _next_request(self, carry: list, timeout: Optional[float]):
+        if carry:
+            return carry.pop(0)
+        return self._queue.get(timeout=timeout)
+
+    def _collect(self, carry: list) -> List[Tuple[Hashable, Any, Future, float]]:
+        """Block for the first input, then gather same-key inputs until the window closes"""
+        first = self._next_request(carry, None)
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        skipped = []
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 and not carry:
+                break
+            try:
+                request = self._next_request(carry, max(0.0, remaining))
+            except queue.Empty:
+                break
+            if request[0] == first[0]:
+                batch.append(request)
+            else:
+                skipped.append(request)
+        # Inputs with other parameters go first in this consumer's next batch
+        carry[:0] = skipped
+        return batch
+
+    def _run(self):
+        try:
+            if self._initializer:
+                self._initializer()
+        except Exception:
+            logger.exception("Micro-batcher initializer failed")
+        finally:
+            self._ready.wait()
+        carry: List[Tuple[Hashable, Any, Future, float]] = []
+        while True:
+            batch = self._collect(carry)
+            started = time.perf_counter()
+            self.batch_size_histogram.observe(len(batch))
+            for _, _, _, submitted in batch:
+                self.wait_time_histogram.observe((started - submitted) * 1000.0)
+
+            live = [request for request in batch if request[2].set_running_or_notify_cancel()]
+            if not live:
+                continue
+            try:
+                outputs = self._infer_batch(live[0][0], [item for _, item, _, _ in live])
+            except Exception as e:
+                for _, _, future, _ in live:
+                    future.set_exception(e)
+                continue
+            for (_, _, future, _), output in zip(live, outputs):
+                future.set_result(output)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch size and queue wait (ms) histograms"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "pending": self.pending,
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "wait_time_ms": self.wait_time_histogram.snapshot()
+        }
\ No newline at end of file
@@ -1,198 +1,588 @@
+import asyncio
+import hashlib
+import importlib
+import logging
+import math
 import os
+import re
+import threading
 import time
 import uuid
-from typing import List, Tuple, Dict, Optional, Set
+import zipfile
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, List, Tuple, Dict, Optional, Set
+from datetime import datetime
 from pathlib import Path
 import cv2
 import numpy as np
-import torch.serialization
-import torch.nn.modules.container
-import torch.nn.modules.conv
-import torch.nn.modules.batchnorm
-import torch.nn.modules.activation
-import torch.nn.modules.pooling
-import torch.nn.modules.upsampling
-import torch.nn.modules.dropout
-import torch.nn.modules.linear
-import torch.nn.modules.normalization
-import torch.nn.modules.padding
-import torch.nn.modules.flatten
-import torch.nn
-from ultralytics import YOLO
-from ultralytics.nn.tasks import DetectionModel
-from ultralytics.nn.modules.conv import Conv, Concat
-from ultralytics.nn.modules.block import C2f, Bottleneck, BottleneckCSP, SPP, SPPF, DFL
-from ultralytics.nn.modules.head import Detect
 from ..core.config import settings
+from .archives import image_members, read_member
+from .batching import BatchQueueFull, MicroBatcher
+from .detections import ALL_VEHICLES, ClassLookup, Detections
+from .input_size import InputSizer
+from .job_queue import job_queue
+from .model_backends import BackendInfo, add_safe_globals, load_model, model_names, select_backend
+from .interpolation import KeyframeScheduler, StrideAccuracy, interpolate_detections
+from .frame_store import FrameStore
+from .raw_store import RawDetectionStore, RawDetections
+from .rendering import draw_detections, finish_video, render_image, render_video
+from .result_cache import ResultCache, make_cache_key, settings_fingerprint
+from .roi import RegionMask, RegionOutsideFrame, load_camera_profiles
+from .task_events import TaskEvent, TaskEventBus
+from .task_store import TaskEvictor, TaskStore, create_task_store
+from .tiling import Tile, merge_tiles, tile_grid
+from .tracking import IoUTracker
+from .video_pipeline import PipelineMetrics, VideoPipeline
 from ..models.detection import (
-    DetectionResult, BoundingBox, DetectionTask, DetectionStats,
-    VehicleClass, VehicleFilter
+    DetectionResult, BoundingBox, DetectionTask, DetectionStats, BatchSummary, FrameDetections, FramePage,
+    VehicleFilter, VideoOptions, TrackSummary, RenderMode, InferenceOptions, CameraProfile
 )
 
-# Add required classes to safe globals
-torch.serialization.add_safe_globals([
-    DetectionModel,
-    Conv,
-    Concat,
-    C2f,
-    Bottleneck,
-    BottleneckCSP,
-    SPP,
-    SPPF,
-    DFL,
-    Detect,
-    torch.nn.modules.container.Sequential,
-    torch.nn.modules.container.ModuleList,
-    torch.nn.modules.container.ModuleDict,
-    torch.nn.modules.conv.Conv2d,
-    torch.nn.modules.conv.ConvTranspose2d,
-    torch.nn.modules.batchnorm.BatchNorm2d,
-    torch.nn.modules.activation.SiLU,
-    torch.nn.modules.activation.ReLU,
-    torch.nn.modules.activation.LeakyReLU,
-    torch.nn.modules.activation.Hardswish,
-    torch.nn.modules.pooling.MaxPool2d,
-    torch.nn.modules.pooling.AdaptiveAvgPool2d,
-    torch.nn.modules.pooling.AvgPool2d,
-    torch.nn.modules.upsampling.Upsample,
-    torch.nn.modules.dropout.Dropout,
-    torch.nn.modules.dropout.Dropout2d,
-    torch.nn.modules.linear.Linear,
-    torch.nn.modules.normalization.LayerNorm,
-    torch.nn.modules.normalization.GroupNorm,
-    torch.nn.modules.padding.ZeroPad2d,
-    torch.nn.modules.flatten.Flatten,
-    torch.nn.AdaptiveMaxPool2d,
-])
+if TYPE_CHECKING:
+    from ultralytics import YOLO
+
+logger = logging.getLogger(__name__)
+
+# Model confidence, NMS IoU, the class ids the model may return and the input size
+ModelParams = Tuple[float, float, Tuple[int, ...], int]
+# Detections and extra result fields of one processed file
+DetectOutput = Tuple[List[BoundingBox], Dict[str, Any]]
+# Deferred outputs are named after the task whose raw detections they show
+LAZY_OUTPUT_PATTERN = re.compile(r"^processed_([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})_")
+# Videos are told apart from images by their extension
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov")
+# Every processed output, including re-filtered ones named processed_<task id>.<ext>
+OUTPUT_PATTERN = re.compile(r"^processed_[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}[_.]")
+
+class UnreadableImage(ValueError):
+    """Raised when an uploaded image cannot be decoded"""
+
+# Failures caused by the uploaded input rather than the service
+INPUT_ERRORS = (UnreadableImage, RegionOutsideFrame)
+
+@dataclass
+class PreparedImage:
+    """A decoded image and the model inputs it needs, ready for the micro-batcher"""
+    img: np.ndarray
+    region: Optional[RegionMask]
+    params: ModelParams
+    imgsz: int
+    inputs: List[Tuple[ModelParams, np.ndarray]]
+    tiles: Optional[List[Tile]] = None  # Grid of a tiled image
+    boxes: Optional[List[Tile]] = None  # Area of the image each input covers when tiled
+
+@dataclass
+class DetectionRun:
+    """A detection task between the result cache lookup and its result"""
+    task_id: str
+    filename: str
+    filter: Optional[VehicleFilter]
+    render: RenderMode
+    start_time: float
+    cache_key: Optional[str] = None
+    output_filename: Optional[str] = None
+    result: Optional[DetectionResult] = None  # Set when served from the result cache
+    image: Optional[PreparedImage] = None
 
 class DetectionService:
+    """
+    Runs detection tasks. Constructing the service is cheap; the model is
+    loaded and warmed up by load(), which the API runs in its lifespan hook
+    so health checks and docs are served while it is in progress.
+    """
     def __init__(self):
-        self.model = YOLO(settings.MODEL_PATH)
-        self.tasks: Dict[str, DetectionTask] = {}
-        self._class_mapping = {
-            "car": VehicleClass.CAR,
-            "motorcycle": VehicleClass.MOTORCYCLE,
-            "bus": VehicleClass.BUS,
-            "truck": VehicleClass.TRUCK,
-            "bicycle": VehicleClass.BICYCLE
-        }
+        # YOLO predictors keep per-call state, so every inference worker
+        # thread gets its own model instance
+        self._local = threading.local()
+        self.state = "starting"  # starting, loading, ready or failed
+        self.load_error: Optional[str] = None
+        self.worker_load_error: Optional[str] = None  # Last failure to load a worker thread's model
+        self.startup_timings: Dict[str, float] = {}
+        self.backend: Optional[BackendInfo] = None
+        self.batcher: Optional[MicroBatcher] = None
+        self.model_id: Optional[str] = None
+        self.pipeline_metrics = PipelineMetrics()
+        # Task updates are pushed to SSE and WebSocket clients of this process
+        self.events = TaskEventBus(settings.TASK_EVENTS_QUEUE_SIZE)
+        self.raw_store = RawDetectionStore(settings.RAW_DETECTIONS_DIR, settings.FRAME_STORE_CHUNK_ROWS)
+        self.frame_store = FrameStore(settings.FRAME_STORE_DIR, settings.FRAME_STORE_CHUNK_ROWS)
+        self.result_cache = ResultCache(
+            max_entries=settings.RESULT_CACHE_SIZE,
+            ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+            directory=settings.RESULT_CACHE_DIR,
+            is_available=self._output_available,
+            max_files=settings.RESULT_CACHE_MAX_FILES,
+            sweep_interval_seconds=settings.RESULT_CACHE_SWEEP_INTERVAL_SECONDS
+        )
+        self._result_settings = settings_fingerprint()
+        self._render_locks: Dict[str, threading.Lock] = {}
+        self._background_renders: Dict[str, Future] = {}
+        self._render_locks_guard = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._inference_lock = threading.Lock()
+        self.tasks: TaskStore = create_task_store()
+        self.task_evictor = TaskEvictor(
+            self.tasks,
+            ttl_seconds=settings.TASK_TTL_SECONDS,
+            interval_seconds=settings.TASK_EVICT_INTERVAL_SECONDS,
+            on_evict=self._delete_task_files
+        )
+        # Input sizes shrink under load once jobs wait for a worker; the
+        # executor registers its queue when it is created
+        self.input_sizer = InputSizer(
+            settings.INFERENCE_IMGSZ,
+            min_size=settings.IMGSZ_MIN,
+            max_size=settings.IMGSZ_MAX,
+            steps=settings.ADAPTIVE_IMGSZ_STEPS,
+            backlog_limit=settings.ADAPTIVE_IMGSZ_BACKLOG
+        )
+        if job_queue is not None:
+            self.input_sizer.add_backlog_source(job_queue.queued)
+        self.camera_profiles: Dict[str, CameraProfile] = load_camera_profiles(settings.CAMERA_PROFILES_PATH)
+        # Most requests use the default filter, so its model parameters are computed once
+        self._default_filter = VehicleFilter()
+    
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+    
+    def load(self, warm_up_workers: Optional[Callable[[], None]] = None, inference: bool = True):
+        """
+        Select the backend, load and warm up the model and start the batch
+        workers; warm_up_workers prepares other worker pools before the
+        service reports ready. Without inference only the class names are
+        read, for API processes whose jobs detector workers run; the model
+        is then started on first use by a live stream. Later calls return
+        immediately.
+        """
+        with self._load_lock:
+            if self.state in ("loading", "ready"):
+                return
+            self.state = "loading"
+            try:
+                torch = self._timed("import_torch", lambda: importlib.import_module("torch"))
+                # The intra-op thread count is one process-wide setting, so it is set once;
+                # each model call may use this many threads, so the calls that can run
+                # at the same time together use about one thread per core
+                torch.set_num_threads(max(1, (os.cpu_count() or 1) // self._concurrent_model_calls()))
+                self._timed("import_ultralytics", lambda: importlib.import_module("ultralytics"))
+                add_safe_globals()
+                if inference:
+                    self.start_inference()
+                else:
+                    # The weights are only read for their class table and released again
+                    self._set_names(self._timed("load_names", lambda: load_model(settings.MODEL_PATH)))
+                if warm_up_workers:
+                    self._timed("warm_up_workers", warm_up_workers)
+                self.state = "ready"
+            except Exception as e:
+                self.state = "failed"
+                self.load_error = str(e)
+                logger.exception("Model loading failed")
+                raise
+    
+    def start_inference(self):
+        """Select the backend, load and warm up the model and start the batch workers once"""
+        with self._inference_lock:
+            if self.batcher is not None:
+                return
+            # Exported ONNX/OpenVINO weights are used when they match PyTorch
+            self.backend = self._timed("select_backend", lambda: select_backend(settings.MODEL_PATH))
+            model = self._timed("load_model", lambda: load_model(self.backend.path))
+            self._set_names(model)
+            self._timed("warm_up", lambda: self._warm_up(model))
+            self._local.model = model
+            # Cached results are only valid for the exact weights that produced them
+            model_stat = os.stat(self.backend.path) if os.path.exists(self.backend.path) else None
+            self.model_id = f"{self.backend.path}:{model_stat.st_size}:{model_stat.st_mtime_ns}" \
+                if model_stat else self.backend.path
+            self.batcher = self._timed("start_batch_workers", lambda: MicroBatcher(
+                self._infer_batch,
+                max_batch_size=settings.BATCH_MAX_SIZE,
+                max_wait_ms=settings.BATCH_WINDOW_MS,
+                num_workers=settings.BATCH_WORKERS,
+                initializer=self.load_worker_model
+            ))
+    
+    def _set_names(self, model: "YOLO"):
+        # Class tables are built once so filtering is pure array work
+        self.names: Dict[int, str] = model_names(model)
+        self.class_lookup = ClassLookup(self.names)
+        self._default_params = self._build_model_params(self._default_filter, self.input_sizer.default_size)
+    
+    @staticmethod
+    def _concurrent_model_calls() -> int:
+        """Model calls that can run at once: image batches plus videos on the background workers"""
+        return settings.BATCH_WORKERS + settings.BACKGROUND_WORKERS
+    
+    def _timed(self, name: str, fn: Callable[[], Any]) -> Any:
+        """Run one startup step and record how long it took"""
+        started = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            self.startup_timings[name] = time.perf_counter() - started
+    
+    def _warm_up(self, model: "YOLO"):
+        """Run the model once at every warm-up size so kernels are initialized before the first request"""
+        for size in settings.WARMUP_IMGSZ:
+            imgsz = self.input_sizer.clamp(size)
+            model(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz, verbose=False)
+    
+    @property
+    def model(self) -> "YOLO":
+        """Model instance owned by the calling thread"""
+        model = getattr(self._local, "model", None)
+        if model is None:
+            model = self.load_worker_model()
+        return model
+    
+    def load_worker_model(self) -> "YOLO":
+        """
+        Load and warm up the model for the calling thread. A failure is kept
+        in worker_load_error; the thread tries again on its next job.
+        """
+        if self.backend is None:
+            raise RuntimeError("Model is not loaded yet")
+        try:
+            model = load_model(self.backend.path)
+            self._warm_up(model)
+        except Exception as e:
+            self.worker_load_error = str(e)
+            raise
+        self.worker_load_error = None
+        self._local.model = model
+        return model
+    
+    def _infer_batch(self, params: ModelParams, images: List[np.ndarray]) -> list:
+        """Run one batched model call on decoded images sharing the same parameters"""
+        conf, iou, classes, imgsz = params
+        return self.model(images, conf=conf, iou=iou, classes=list(classes), imgsz=imgsz, verbose=False)
+    
+    def _filter_params(self, filter: VehicleFilter, imgsz: int) -> ModelParams:
+        target = frozenset(filter.target_classes) if filter.target_classes is not None else None
+        return (
+            max(settings.CONFIDENCE_THRESHOLD, filter.min_confidence),
+            settings.IOU_THRESHOLD,
+            tuple(self.class_lookup.class_ids(target)),
+            imgsz
+        )
+    
+    def _build_model_params(self, filter: VehicleFilter, imgsz: int) -> ModelParams:
+        return self._filter_params(filter if settings.PUSH_FILTER_TO_MODEL else ALL_VEHICLES, imgsz)
+    
+    def _model_params(self, filter: Optional[VehicleFilter] = None, imgsz: Optional[int] = None) -> ModelParams:
+        """
+        Confidence, IoU, class ids and input size to run the model with for a
+        filter, so NMS only considers boxes the filter can keep
+        """
+        imgsz = imgsz or self.input_sizer.default_size
+        if (filter is None or filter == self._default_filter) and imgsz == self.input_sizer.default_size:
+            return self._default_params
+        return self._build_model_params(filter or self._default_filter, imgsz)
+    
+    @staticmethod
+    def _adaptive(options: Optional[InferenceOptions]) -> bool:
+        """Whether a request uses adaptive input sizing"""
+        if options is None or options.adaptive_imgsz is None:
+            return settings.ADAPTIVE_IMGSZ
+        return options.adaptive_imgsz
         
-    def _create_task(self, filename: str) -> DetectionTask:
+    def create_task(self, filename: str, parent_task_id: Optional[str] = None) -> DetectionTask:
         """Create a new detection task"""
         task_id = str(uuid.uuid4())
         task = DetectionTask(
             task_id=task_id,
             filename=filename,
-            status="pending"
+            status="pending",
+            parent_task_id=parent_task_id
         )
-        self.tasks[task_id] = task
+        self.tasks.save(task)
+        self.task_evictor.maybe_sweep()
         return task
     
+    def remove_task(self, task_id: str):
+        """Forget a task that was never started"""
+        self.tasks.delete(task_id)
+    
+    def _delete_task_files(self, task: DetectionTask):
+        """Remove the stored files of an evicted task"""
+        self.raw_store.delete(task.task_id)
+        self.frame_store.delete(task.task_id)
+        output = task.result.processed_filename if task.result else None
+        # Cache hits point at the output of the task that produced it; only the owner removes it
+        if output and task.task_id in output:
+            try:
+                os.remove(os.path.join(settings.OUTPUT_DIR, output))
+            except OSError:
+                pass
+    
+    def _update_task(self, task_id: str, **fields: Any) -> Optional[DetectionTask]:
+        """Apply field changes to a stored task and save it"""
+        task = self.tasks.get(task_id)
+        if not task:
+            return None
+        task = task.model_copy(update={**fields, "updated_at": datetime.utcnow()})
+        self.tasks.save(task)
+        if self.events.has_subscribers(task_id):
+            self.events.publish(task_id, self.task_event(task))
+        return task
+    
+    def task_event(self, task: DetectionTask) -> TaskEvent:
+        """Push event for the current state of a task; finished tasks include their statistics"""
+        if task.status == "completed":
+            stats = self.task_stats(task)
+            return TaskEvent("completed", {
+                "task": task.model_dump(mode="json"),
+                "stats": stats.model_dump(mode="json") if stats else None
+            }, task.updated_at)
+        # Progress events leave out the result, which only exists once completed
+        return TaskEvent(
+            "failed" if task.status == "failed" else "status",
+            {"task": task.model_dump(mode="json", exclude={"result"})},
+            task.updated_at
+        )
+    
+    def _publish_frames(self, task_id: str, frames: List[Dict[str, Any]]):
+        """Push buffered per-frame detections of a running video"""
+        if frames:
+            self.events.publish(task_id, TaskEvent("frames", {"frames": list(frames)}))
+            frames.clear()
+    
     def _update_task_status(self, task_id: str, status: str, error: Optional[str] = None):
         """Update task status"""
-        if task_id in self.tasks:
-            task = self.tasks[task_id]
-            task.status = status
-            task.updated_at = time.time()
-            if error:
-                task.error = error
+        fields = {"status": status}
+        if error:
+            fields["error"] = error
+        self._update_task(task_id, **fields)
+    
+    def _fail_run(self, task_id: str, error: Exception):
+        """Mark a task failed, recording whether its input was at fault"""
+        self._update_task(
+            task_id,
+            status="failed",
+            error=str(error),
+            invalid_input=isinstance(error, INPUT_ERRORS)
+        )
+    
+    def fail_task(self, task_id: str, error: str):
+        """Mark a task failed from outside the detection run, e.g. a lost worker"""
+        self._update_task_status(task_id, "failed", error)
+    
+    def _update_task_progress(
+        self,
+        task_id: str,
+        frames_processed: int,
+        total_frames: int,
+        started_at: float
+    ):
+        """Update frame progress, throughput and ETA of a running task"""
+        elapsed = time.time() - started_at
+        fps = frames_processed / elapsed if elapsed > 0 else 0.0
+        fields = {
+            "frames_processed": frames_processed,
+            "total_frames": total_frames or None,
+            "fps": fps
+        }
+        if total_frames > 0:
+            fields["progress"] = min(100.0, frames_processed / total_frames * 100)
+            if fps > 0:
+                fields["eta_seconds"] = max(0, total_frames - frames_processed) / fps
+        self._update_task(task_id, **fields)
     
     def _filter_detections(
         self,
-        detections: List[BoundingBox],
+        detections: Detections,
         filter: Optional[VehicleFilter] = None
-    ) -> List[BoundingBox]:
+    ) -> Detections:
         """Filter detections based on vehicle class and confidence"""
-        if not filter:
-            filter = VehicleFilter()  # Use default filter
-            
-        filtered_detections = []
-        for det in detections:
-            # Convert class name to VehicleClass enum
-            try:
-                vehicle_class = self._class_mapping[det.class_name.lower()]
-            except KeyError:
-                continue  # Skip unknown classes
-                
-            # Apply filters
-            if (filter.target_classes is None or vehicle_class in filter.target_classes) and \
-               det.confidence >= filter.min_confidence:
-                filtered_detections.append(det)
-                
-        return filtered_detections
+        return self.class_lookup.filter(detections, filter)
+
+    def _extract_detections(self, results) -> Detections:
+        """Convert one ultralytics result into columnar detections"""
+        return Detections.from_results(results)
+    
+    def _vehicle_detections(self, detections: Detections) -> Detections:
+        """Keep every vehicle detection regardless of the request filter"""
+        return self.class_lookup.vehicles(detections)
+    
+    def _detect_frames(self, frames: List[np.ndarray], params: ModelParams) -> List[Detections]:
+        """Run one batched model call over video frames and return their raw vehicle detections"""
+        results = self._infer_batch(params, frames)
+        return [
+            self._vehicle_detections(self._extract_detections(frame_results))
+            for frame_results in results
+        ]
 
     def _process_image(
         self,
-        image_path: str,
-        filter: Optional[VehicleFilter] = None
-    ) -> Tuple[List[BoundingBox], str]:
-        """Process a single image and return filtered detections and output path"""
-        # Run inference
-        results = self.model(
-            image_path,
-            conf=settings.CONFIDENCE_THRESHOLD,
-            iou=settings.IOU_THRESHOLD
-        )[0]
-        
-        # Process detections
-        detections = []
-        for box in results.boxes:
-            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-            detections.append(BoundingBox(
-                x1=float(x1),
-                y1=float(y1),
-                x2=float(x2),
-                y2=float(y2),
-                confidence=float(box.conf[0]),
-                class_id=int(box.cls[0]),
-                class_name=results.names[int(box.cls[0])]
-            ))
+        img: np.ndarray,
+        output_filename: Optional[str],
+        filter: Optional[VehicleFilter] = None,
+        task_id: Optional[str] = None,
+        render: bool = True,
+        inference: Optional[InferenceOptions] = None
+    ) -> DetectOutput:
+        """Process a decoded image and return filtered detections and the input size used"""
+        prepared = self._prepare_image(img, filter, inference)
+        # Run inference, batched with other images arriving at the same time
+        futures = [self.batcher.submit(params, source) for params, source in prepared.inputs]
+        outputs = [future.result() for future in futures]
+        return self._finish_image(prepared, outputs, output_filename, filter, task_id, render)
+    
+    def _prepare_image(
+        self,
+        img: np.ndarray,
+        filter: Optional[VehicleFilter] = None,
+        inference: Optional[InferenceOptions] = None
+    ) -> PreparedImage:
+        """Crop a decoded image to its region of interest and choose its model inputs"""
+        inference = inference or InferenceOptions()
+        height, width = img.shape[:2]
+        # Only the region of interest is run through the model
+        region = self._region(inference, width, height)
+        source = region.crop(img) if region else img
+        height, width = source.shape[:2]
+        imgsz = self.input_sizer.for_source(inference.imgsz, width, height, self._adaptive(inference))
+        params = self._model_params(filter, imgsz)
+        tiles = self._tiles(width, height, inference)
+        if not tiles:
+            return PreparedImage(img, region, params, imgsz, [(params, source)])
+        inputs, boxes = self._tile_inputs(source, tiles, filter, params)
+        return PreparedImage(img, region, params, imgsz, inputs, tiles, boxes)
+    
+    def _finish_image(
+        self,
+        prepared: PreparedImage,
+        outputs: list,
+        output_filename: Optional[str],
+        filter: Optional[VehicleFilter] = None,
+        task_id: Optional[str] = None,
+        render: bool = True
+    ) -> DetectOutput:
+        """Turn the model outputs of a prepared image into filtered detections, optionally drawn"""
+        parts = [self._vehicle_detections(self._extract_detections(output)) for output in outputs]
+        if prepared.tiles:
+            raw_detections = merge_tiles(parts, prepared.boxes, settings.TILE_MERGE_THRESHOLD)
+        else:
+            raw_detections = parts[0]
+        if prepared.region:
+            raw_detections = prepared.region.restore(raw_detections)
         
-        # Apply filters
-        filtered_detections = self._filter_detections(detections, filter)
+        # Keep raw detections so the task can be re-filtered later, then apply filters
+        if task_id:
+            recorder = self.raw_store.recorder(task_id, self.names)
+            recorder.add(0, raw_detections)
+            recorder.close(
+                is_video=False,
+                frame_count=1,
+                **self._coverage(prepared.params),
+                **self._render_meta(filter, output_filename)
+            )
+        filtered_detections = self._filter_detections(raw_detections, filter)
         
-        # Draw filtered detections on image
-        img = cv2.imread(image_path)
-        for det in filtered_detections:
-            # Use different colors for different vehicle classes
-            color = {
-                VehicleClass.CAR: (0, 255, 0),      # Green
-                VehicleClass.MOTORCYCLE: (255, 0, 0), # Blue
-                VehicleClass.BUS: (0, 0, 255),      # Red
-                VehicleClass.TRUCK: (255, 255, 0),   # Cyan
-                VehicleClass.BICYCLE: (255, 0, 255)  # Magenta
-            }.get(self._class_mapping[det.class_name.lower()], (0, 255, 0))
+        if render and output_filename:
+            # Draw filtered detections on image
+            draw_detections(prepared.img, filtered_detections, self.names)
             
-            cv2.rectangle(
-                img,
-                (int(det.x1), int(det.y1)),
-                (int(det.x2), int(det.y2)),
-                color,
-                2
-            )
-            cv2.putText(
-                img,
-                f"{det.class_name} {det.confidence:.2f}",
-                (int(det.x1), int(det.y1) - 10),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                color,
-                2
-            )
+            # Save processed image
+            output_path = os.path.join(settings.OUTPUT_DIR, output_filename)
+            cv2.imwrite(output_path, prepared.img)
+        
+        return filtered_detections.to_boxes(self.names), {
+            "imgsz": prepared.imgsz,
+            "tiles": len(prepared.tiles) if prepared.tiles else None
+        }
+    
+    @staticmethod
+    def _region(inference: InferenceOptions, width: int, height: int) -> Optional[RegionMask]:
+        """Region of interest of a request resolved for the frame size"""
+        if inference.roi is None:
+            return None
+        return RegionMask(inference.roi, width, height, settings.ROI_CROP_MARGIN)
+    
+    def _tiles(self, width: int, height: int, inference: InferenceOptions) -> Optional[List[Tile]]:
+        """Tiles to split an image into, or None to run it whole"""
+        tiled = inference.tiled
+        if tiled is None:
+            tiled = settings.TILING_ENABLED and max(width, height) >= settings.TILE_MIN_IMAGE_SIZE
+        if not tiled or max(width, height) <= settings.TILE_SIZE:
+            return None
+        return tile_grid(width, height, settings.TILE_SIZE, settings.TILE_OVERLAP, settings.TILE_MAX_TILES)
+    
+    def _tile_inputs(
+        self,
+        img: np.ndarray,
+        tiles: List[Tile],
+        filter: Optional[VehicleFilter],
+        params: ModelParams
+    ) -> Tuple[List[Tuple[ModelParams, np.ndarray]], List[Tile]]:
+        """
+        Model inputs of overlapping tiles at their native resolution and the
+        area each covers, for merging the boxes into image coordinates. The
+        tiles go through the micro-batcher, so they run as batches on all
+        batch workers at once.
+        """
+        x1, y1, x2, y2 = tiles[0]
+        tile_params = self._model_params(filter, self.input_sizer.clamp(max(x2 - x1, y2 - y1)))
+        inputs = [(tile_params, np.ascontiguousarray(img[y1:y2, x1:x2])) for x1, y1, x2, y2 in tiles]
+        boxes = list(tiles)
+        if settings.TILE_FULL_FRAME:
+            # The downscaled whole image keeps vehicles larger than a tile intact
+            inputs.append((params, img))
+            boxes.append((0, 0, img.shape[1], img.shape[0]))
+        return inputs, boxes
+    
+    def frame_detector(
+        self,
+        width: int,
+        height: int,
+        filter: Optional[VehicleFilter] = None,
+        inference: Optional[InferenceOptions] = None
+    ) -> Tuple[Callable[[np.ndarray], Detections], int]:
+        """
+        Detection function for single frames of a live source and the input
+        size it uses. Frames go through the micro-batcher, so concurrent
+        streams and image requests share batches.
+        """
+        # API processes that leave detection to job workers start the model for their first stream
+        self.start_inference()
+        inference = inference or InferenceOptions()
+        region = self._region(inference, width, height)
+        source_width, source_height = region.size if region else (width, height)
+        imgsz = self.input_sizer.for_source(inference.imgsz, source_width, source_height, self._adaptive(inference))
+        params = self._model_params(filter, imgsz)
         
-        # Save processed image
-        output_filename = f"processed_{Path(image_path).name}"
-        output_path = os.path.join(settings.OUTPUT_DIR, output_filename)
-        cv2.imwrite(output_path, img)
+        def detect(frame: np.ndarray) -> Detections:
+            results = self.batcher.infer(params, region.crop(frame) if region else frame)
+            detections = self._vehicle_detections(self._extract_detections(results))
+            if region:
+                detections = region.restore(detections)
+            return self._filter_detections(detections, filter)
         
-        return filtered_detections, output_filename
+        return detect, imgsz
     
     def _process_video(
         self,
         video_path: str,
-        filter: Optional[VehicleFilter] = None
-    ) -> Tuple[List[BoundingBox], str]:
-        """Process a video and return filtered detections and output path"""
+        output_filename: Optional[str],
+        filter: Optional[VehicleFilter] = None,
+        task_id: Optional[str] = None,
+        options: Optional[VideoOptions] = None,
+        render: bool = True,
+        inference: Optional[InferenceOptions] = None
+    ) -> DetectOutput:
+        """
+        Process a video and return the best detection of each tracked vehicle
+        and extra result fields (tracks, stride report, input size). Without
+        rendering the annotate and encode stages are skipped entirely.
+        """
+        options = options or VideoOptions()
+        inference = inference or InferenceOptions()
+        started_at = time.time()
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             raise ValueError("Could not open video file")
@@ -200,147 +590,768 @@ def _process_video(
         # Get video properties
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
+        source_fps = cap.get(cv2.CAP_PROP_FPS)
+        fps = int(source_fps)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         
         # Create output video writer
-        output_filename = f"processed_{Path(video_path).name}"
-        output_path = os.path.join(settings.OUTPUT_DIR, output_filename)
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+        out = None
+        if render and output_filename:
+            output_path = os.path.join(settings.OUTPUT_DIR, output_filename)
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
         
-        all_detections = []
-        frame_count = 0
+        def on_progress(frame_count: int):
+            # Update task progress every 10 frames
+            if task_id and frame_count % 10 == 0:
+                self._update_task_progress(task_id, frame_count, total_frames, started_at)
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            # Run inference on frame
-            results = self.model(
-                frame,
-                conf=settings.CONFIDENCE_THRESHOLD,
-                iou=settings.IOU_THRESHOLD
-            )[0]
-            
-            # Process detections
-            frame_detections = []
-            for box in results.boxes:
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                det = BoundingBox(
-                    x1=float(x1),
-                    y1=float(y1),
-                    x2=float(x2),
-                    y2=float(y2),
-                    confidence=float(box.conf[0]),
-                    class_id=int(box.cls[0]),
-                    class_name=results.names[int(box.cls[0])]
-                )
-                frame_detections.append(det)
-            
-            # Apply filters
-            filtered_detections = self._filter_detections(frame_detections, filter)
-            all_detections.extend(filtered_detections)
-            
-            # Draw filtered detections on frame
-            for det in filtered_detections:
-                # Use different colors for different vehicle classes
-                color = {
-                    VehicleClass.CAR: (0, 255, 0),      # Green
-                    VehicleClass.MOTORCYCLE: (255, 0, 0), # Blue
-                    VehicleClass.BUS: (0, 0, 255),      # Red
-                    VehicleClass.TRUCK: (255, 255, 0),   # Cyan
-                    VehicleClass.BICYCLE: (255, 0, 255)  # Magenta
-                }.get(self._class_mapping[det.class_name.lower()], (0, 255, 0))
-                
-                cv2.rectangle(
-                    frame,
-                    (int(det.x1), int(det.y1)),
-                    (int(det.x2), int(det.y2)),
-                    color,
-                    2
-                )
-                cv2.putText(
-                    frame,
-                    f"{det.class_name} {det.confidence:.2f}",
-                    (int(det.x1), int(det.y1) - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5,
-                    color,
-                    2
-                )
-            
-            # Write processed frame
-            out.write(frame)
-            frame_count += 1
-            
-            # Update task progress
-            if frame_count % 10 == 0:  # Update every 10 frames
-                progress = (frame_count / total_frames) * 100
-                self._update_task_status(
-                    task_id,
-                    f"processing ({progress:.1f}%)"
+        # Only keyframes run the model when striding; other frames are interpolated
+        strided = options.frame_stride > 1 or options.adaptive
+        scheduler = KeyframeScheduler(
+            options.frame_stride,
+            options.adaptive,
+            settings.SCENE_CHANGE_THRESHOLD
+        ) if strided else None
+        accuracy = StrideAccuracy() if strided and options.accuracy_audit else None
+        tracker = self.create_tracker()
+        adaptive = self._adaptive(inference)
+        region = self._region(inference, width, height)
+        source_width, source_height = region.size if region else (width, height)
+        imgsz = self.input_sizer.for_source(inference.imgsz, source_width, source_height, adaptive)
+        params = self._model_params(filter, imgsz)
+        reduced_frames = 0
+        # Tracked detections waiting to be pushed to subscribers of the task
+        pending_frames: List[Dict[str, Any]] = []
+        # Raw detections are streamed to disk for re-filtering, and tracked
+        # ones for paginated reads, so no frame stays in memory
+        recorder = self.raw_store.recorder(task_id, self.names) if task_id else None
+        frame_writer = self.frame_store.writer(task_id) if task_id else None
+        
+        def detect_batch(frames: List[np.ndarray]) -> List[Detections]:
+            # Frames run smaller while jobs are waiting, so the backlog drains faster
+            nonlocal reduced_frames
+            size = self.input_sizer.under_load(imgsz, len(frames)) if adaptive else imgsz
+            if size < imgsz:
+                reduced_frames += len(frames)
+            if not region:
+                return self._detect_frames(frames, params[:3] + (size,))
+            detections = self._detect_frames([region.crop(frame) for frame in frames], params[:3] + (size,))
+            return [region.restore(frame_detections) for frame_detections in detections]
+        
+        def track(frame_index: int, detections: Detections) -> Detections:
+            # Raw boxes are recorded before the request filter is applied
+            if recorder:
+                recorder.add(frame_index, detections)
+            tracked = tracker.update(frame_index, self._filter_detections(detections, filter))
+            if frame_writer:
+                frame_writer.add(frame_index, tracked)
+            if task_id and self.events.has_subscribers(task_id):
+                pending_frames.append({
+                    "frame_index": frame_index,
+                    "detections": [box.model_dump() for box in tracked.to_boxes(self.names)]
+                })
+                if len(pending_frames) >= settings.TASK_EVENTS_FRAME_BATCH:
+                    self._publish_frames(task_id, pending_frames)
+            return tracked
+        
+        # Decode, inference, drawing and encoding overlap in a staged pipeline
+        pipeline = VideoPipeline(
+            detect_batch=detect_batch,
+            annotate=partial(draw_detections, names=self.names),
+            batch_size=settings.VIDEO_BATCH_SIZE,
+            queue_size=settings.VIDEO_QUEUE_SIZE,
+            on_progress=on_progress,
+            scheduler=scheduler,
+            interpolate=interpolate_detections,
+            accuracy=accuracy,
+            audit_every=settings.STRIDE_AUDIT_EVERY,
+            track=track
+        )
+        try:
+            frame_count = pipeline.run(cap, out)
+            if recorder:
+                recorder.close(
+                    is_video=True,
+                    frame_count=frame_count,
+                    fps=fps,
+                    width=width,
+                    height=height,
+                    **self._coverage(params),
+                    **self._render_meta(filter, output_filename)
                 )
+            if frame_writer:
+                frame_writer.close(frame_count, source_fps)
+        except BaseException:
+            if recorder:
+                recorder.discard()
+            if frame_writer:
+                frame_writer.discard()
+            raise
+        finally:
+            self.pipeline_metrics.add(list(pipeline.stages.values()))
+            # Cleanup
+            cap.release()
+            if out is not None:
+                out.release()
+        if out is not None:
+            finish_video(output_path)
+        if task_id:
+            self._publish_frames(task_id, pending_frames)
+        tracks = tracker.summaries()
         
-        # Cleanup
-        cap.release()
-        out.release()
+        if task_id:
+            # Container frame counts are estimates, so report what was decoded
+            self._update_task_progress(task_id, frame_count, frame_count, started_at)
         
-        return all_detections, output_filename
+        report = None
+        if strided:
+            report = (accuracy or StrideAccuracy()).report(
+                pipeline.keyframes,
+                pipeline.interpolated_frames
+            )
+        
+        # One box per vehicle keeps the result small regardless of video length
+        best_detections = [track.best_box for track in tracks]
+        return best_detections, {
+            "tracks": tracks,
+            "stride_report": report,
+            "imgsz": imgsz,
+            "reduced_frames": reduced_frames if adaptive else None,
+            "frame_count": frame_count,
+            "fps": source_fps or None
+        }
     
     def process_file(
         self,
         file_path: str,
-        filter: Optional[VehicleFilter] = None
+        filter: Optional[VehicleFilter] = None,
+        task_id: Optional[str] = None,
+        video_options: Optional[VideoOptions] = None,
+        filename: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        render: RenderMode = RenderMode.EAGER,
+        inference_options: Optional[InferenceOptions] = None
+    ) -> DetectionResult:
+        """
+        Process an image or video file with optional filtering.
+        
+        When the content hash is known, results are served from and stored in
+        the result cache.
+        """
+        # Determine if file is image or video
+        is_video = file_path.lower().endswith(VIDEO_EXTENSIONS)
+        
+        def detect(task_id: str, output_filename: Optional[str], render_now: bool) -> DetectOutput:
+            if is_video:
+                return self._process_video(
+                    file_path, output_filename, filter, task_id, video_options, render_now, inference_options
+                )
+            img = cv2.imread(file_path)
+            if img is None:
+                raise UnreadableImage("Could not read image file")
+            return self._process_image(img, output_filename, filter, task_id, render_now, inference_options)
+        
+        return self._run_detection(
+            filename or Path(file_path).name,
+            filter,
+            task_id,
+            video_options if is_video else None,
+            content_hash,
+            render,
+            inference_options,
+            detect,
+            # Keep the upload so the task can be re-rendered without it
+            lambda task_id: self.raw_store.retain_source(task_id, file_path)
+        )
+    
+    def process_image_data(
+        self,
+        data: bytes,
+        filename: str,
+        filter: Optional[VehicleFilter] = None,
+        task_id: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        render: RenderMode = RenderMode.EAGER,
+        inference_options: Optional[InferenceOptions] = None
     ) -> DetectionResult:
-        """Process an image or video file with optional filtering"""
+        """
+        Process an image held in memory. It is decoded once and the same array
+        feeds the model and the annotator; only the output touches disk.
+        """
+        def detect(task_id: str, output_filename: Optional[str], render_now: bool) -> DetectOutput:
+            return self._process_image(
+                self._decode_image(data), output_filename, filter, task_id, render_now, inference_options
+            )
+        
+        return self._run_detection(
+            filename,
+            filter,
+            task_id,
+            None,
+            content_hash,
+            render,
+            inference_options,
+            detect,
+            lambda task_id: self.raw_store.save_source(task_id, data, Path(filename).suffix)
+        )
+    
+    async def detect_image_data(
+        self,
+        run_blocking: Callable[..., Awaitable[Any]],
+        data: bytes,
+        filename: str,
+        filter: Optional[VehicleFilter] = None,
+        content_hash: Optional[str] = None,
+        render: RenderMode = RenderMode.EAGER,
+        inference_options: Optional[InferenceOptions] = None
+    ) -> DetectionResult:
+        """
+        process_image_data for the event loop. Decoding and post-processing
+        go through run_blocking (a worker pool), but the wait for the
+        micro-batch is awaited, so images share batches of up to
+        BATCH_MAX_SIZE without holding a worker thread each.
+        """
+        if self.batcher.pending >= settings.BATCH_MAX_PENDING:
+            raise BatchQueueFull(f"Micro-batch queue is full ({settings.BATCH_MAX_PENDING} inputs waiting)")
+        run = await run_blocking(self._begin_image, data, filename, filter, content_hash, render, inference_options)
+        if run.result is not None:
+            return run.result
+        try:
+            outputs = await asyncio.gather(*(
+                asyncio.wrap_future(self.batcher.submit(params, source))
+                for params, source in run.image.inputs
+            ))
+            return await run_blocking(self._complete_image, run, data, outputs)
+        except Exception as e:
+            self._fail_run(run.task_id, e)
+            raise
+    
+    def _begin_image(
+        self,
+        data: bytes,
+        filename: str,
+        filter: Optional[VehicleFilter],
+        content_hash: Optional[str],
+        render: RenderMode,
+        inference_options: Optional[InferenceOptions]
+    ) -> DetectionRun:
+        """Start an image task and decode and prepare the image unless its result is cached"""
+        run = self._start_run(filename, filter, None, None, content_hash, render, inference_options)
+        if run.result is None:
+            try:
+                run.image = self._prepare_image(self._decode_image(data), filter, inference_options)
+            except Exception as e:
+                self._fail_run(run.task_id, e)
+                raise
+        return run
+    
+    def _complete_image(self, run: DetectionRun, data: bytes, outputs: list) -> DetectionResult:
+        """Post-process the model outputs of a prepared image and record the result"""
+        detections, extra = self._finish_image(
+            run.image, outputs, run.output_filename, run.filter, run.task_id, run.render == RenderMode.EAGER
+        )
+        return self._finish_run(
+            run, detections, extra,
+            lambda task_id: self.raw_store.save_source(task_id, data, Path(run.filename).suffix)
+        )
+    
+    @staticmethod
+    def _decode_image(data: bytes) -> np.ndarray:
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise UnreadableImage("Could not read image file")
+        return img
+    
+    def _run_detection(
+        self,
+        filename: str,
+        filter: Optional[VehicleFilter],
+        task_id: Optional[str],
+        video_options: Optional[VideoOptions],
+        content_hash: Optional[str],
+        render: RenderMode,
+        inference_options: Optional[InferenceOptions],
+        detect: Callable[[str, Optional[str], bool], DetectOutput],
+        retain_source: Callable[[str], Any]
+    ) -> DetectionResult:
+        """Run a detection task through the result cache and record its result"""
+        run = self._start_run(filename, filter, task_id, video_options, content_hash, render, inference_options)
+        if run.result is not None:
+            return run.result
+        try:
+            detections, extra = detect(run.task_id, run.output_filename, run.render == RenderMode.EAGER)
+            return self._finish_run(run, detections, extra, retain_source)
+        except Exception as e:
+            self._fail_run(run.task_id, e)
+            raise
+    
+    def _start_run(
+        self,
+        filename: str,
+        filter: Optional[VehicleFilter],
+        task_id: Optional[str],
+        video_options: Optional[VideoOptions],
+        content_hash: Optional[str],
+        render: RenderMode,
+        inference_options: Optional[InferenceOptions]
+    ) -> DetectionRun:
+        """Mark the task processing and complete it from the result cache if possible"""
         start_time = time.time()
-        task = self._create_task(Path(file_path).name)
-        task_id = task.task_id
+        if task_id is None:
+            task_id = self.create_task(filename).task_id
+        run = DetectionRun(task_id, filename, filter, render, start_time)
         
         try:
             self._update_task_status(task_id, "processing")
             
-            # Determine if file is image or video
-            is_video = file_path.lower().endswith(('.mp4', '.avi', '.mov'))
+            if content_hash and settings.RESULT_CACHE_ENABLED:
+                run.cache_key = self._cache_key(content_hash, filter, video_options, render, inference_options)
+                cached = self.result_cache.get(run.cache_key)
+                if cached is not None:
+                    self.raw_store.link(cached.task_id, task_id)
+                    self.frame_store.link(cached.task_id, task_id)
+                    run.result = self._complete_task(task_id, cached.model_copy(update={
+                        "task_id": task_id,
+                        "filename": filename,
+                        "processing_time": time.time() - start_time,
+                        "created_at": datetime.utcnow(),
+                        "cached": True
+                    }))
+                    return run
             
-            if is_video:
-                detections, output_filename = self._process_video(file_path, filter)
-            else:
-                detections, output_filename = self._process_image(file_path, filter)
+            if render != RenderMode.NONE:
+                run.output_filename = f"processed_{task_id}_{filename}"
+            return run
+        except Exception as e:
+            self._update_task_status(task_id, "failed", str(e))
+            raise
+    
+    def _finish_run(
+        self,
+        run: DetectionRun,
+        detections: List[BoundingBox],
+        extra: Dict[str, Any],
+        retain_source: Callable[[str], Any]
+    ) -> DetectionResult:
+        """Record the result of a detection run, cache it and complete the task"""
+        # Calculate processing time
+        processing_time = time.time() - run.start_time
+        
+        # Create result
+        result = DetectionResult(
+            task_id=run.task_id,
+            filename=run.filename,
+            processed_filename=run.output_filename,
+            detections=detections,
+            processing_time=processing_time,
+            status="completed",
+            filter=run.filter,
+            **extra
+        )
+        
+        # Results degraded by load shedding are not reused for later requests
+        if run.cache_key and not result.reduced_frames:
+            self.result_cache.put(run.cache_key, result)
+        # Deferred rendering needs the source later
+        if settings.RETAIN_SOURCES or run.render == RenderMode.LAZY:
+            retain_source(run.task_id)
+        
+        return self._complete_task(run.task_id, result)
+    
+    def process_batch(
+        self,
+        archive_path: str,
+        task_id: str,
+        filter: Optional[VehicleFilter] = None,
+        render: RenderMode = RenderMode.NONE,
+        inference_options: Optional[InferenceOptions] = None
+    ) -> BatchSummary:
+        """
+        Process every image of a ZIP archive as a child task of a batch task.
+        
+        Members are read one at a time and decoded in memory, never extracted
+        to disk. Up to BATCH_JOB_PARALLELISM images are in flight at once, so
+        the micro-batcher groups their model calls. A failing image fails
+        only its own child task.
+        """
+        start_time = time.time()
+        try:
+            self._update_task_status(task_id, "processing")
+            with zipfile.ZipFile(archive_path) as archive:
+                members = image_members(archive, settings.BATCH_JOB_MAX_FILES)
+                summary = BatchSummary(total_files=len(members))
+                by_class: Counter = Counter()
+                child_task_ids: List[str] = []
+                
+                def collect(futures: Set[Future]):
+                    for future in futures:
+                        try:
+                            result = future.result()
+                        except Exception:
+                            # The child task has been marked failed already
+                            summary.failed_files += 1
+                            continue
+                        summary.completed_files += 1
+                        by_class.update(detection.class_name for detection in result.detections)
+                        done = summary.completed_files + summary.failed_files
+                        if done % settings.BATCH_JOB_PROGRESS_EVERY == 0:
+                            self._update_task(task_id, progress=done / len(members) * 100, batch=summary.model_copy())
+                
+                self._update_task(task_id, batch=summary.model_copy())
+                with ThreadPoolExecutor(settings.BATCH_JOB_PARALLELISM, thread_name_prefix="batch") as pool:
+                    pending: Set[Future] = set()
+                    for info in members:
+                        filename = Path(info.filename).name
+                        child = self.create_task(filename, parent_task_id=task_id)
+                        child_task_ids.append(child.task_id)
+                        try:
+                            data = read_member(archive, info, settings.MAX_UPLOAD_SIZE)
+                        except Exception as e:
+                            self._update_task_status(child.task_id, "failed", str(e))
+                            summary.failed_files += 1
+                            continue
+                        pending.add(pool.submit(
+                            self.process_image_data, data, filename, filter, child.task_id,
+                            content_hash=hashlib.sha256(data).hexdigest(),
+                            render=render,
+                            inference_options=inference_options
+                        ))
+                        # Bound the decoded members held in memory
+                        if len(pending) >= settings.BATCH_JOB_PARALLELISM * 2:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            collect(done)
+                    collect(wait(pending).done)
             
-            # Calculate processing time
-            processing_time = time.time() - start_time
+            summary.child_task_ids = child_task_ids
+            summary.stats = DetectionStats(
+                total_vehicles=sum(by_class.values()),
+                by_class=dict(by_class),
+                processing_time=time.time() - start_time
+            )
+            self._update_task(task_id, status="completed", progress=100.0, batch=summary)
+            return summary
+        except Exception as e:
+            self._update_task_status(task_id, "failed", str(e))
+            raise
+    
+    def create_tracker(self, keep_finished: bool = True) -> IoUTracker:
+        return IoUTracker(
+            self.names,
+            iou_threshold=settings.TRACK_IOU_THRESHOLD,
+            max_age=settings.TRACK_MAX_AGE,
+            min_hits=settings.TRACK_MIN_HITS,
+            keep_finished=keep_finished
+        )
+    
+    def refilter_task(
+        self,
+        task_id: str,
+        filter: Optional[VehicleFilter] = None,
+        render: bool = False
+    ) -> DetectionResult:
+        """
+        Apply a different filter to the stored raw detections of a completed
+        task without running the model. The result belongs to a new task whose
+        annotated output is rendered on its first download, or right away if
+        render is set; without a retained source there is no output.
+        """
+        start_time = time.time()
+        source_task = self.tasks.get(task_id)
+        if not source_task:
+            raise LookupError("Task not found")
+        if source_task.status != "completed" or not source_task.result:
+            raise ValueError(f"Task is not completed (status: {source_task.status})")
+        raw = self.raw_store.load(task_id)
+        if raw is None:
+            raise LookupError("Raw detections are no longer available for this task")
+        source = self.raw_store.source_path(task_id)
+        if render and not source:
+            raise LookupError("Source file is no longer available for this task")
+        
+        filter = filter or VehicleFilter()
+        if not self._covers(raw.meta, self._filter_params(filter, self.input_sizer.default_size)):
+            raise ValueError("Stored detections do not cover this filter; run detection again")
+        task = self.create_task(source_task.filename)
+        try:
+            self._update_task_status(task.task_id, "processing")
+            frame_detections, detections, extra = self._replay(raw, filter)
+            if raw.meta.get("is_video"):
+                self.frame_store.save(task.task_id, frame_detections, raw.meta.get("fps"))
+            
+            output_filename = f"processed_{task.task_id}_{source_task.filename}" if source else None
+            if render:
+                self._render(raw, source, frame_detections, os.path.join(settings.OUTPUT_DIR, output_filename))
             
-            # Create result
+            # The new task renders with its own filter, so it gets its own metadata
+            self.raw_store.link(task_id, task.task_id, **self._render_meta(filter, output_filename))
             result = DetectionResult(
-                task_id=task_id,
-                filename=Path(file_path).name,
+                task_id=task.task_id,
+                filename=source_task.filename,
                 processed_filename=output_filename,
                 detections=detections,
-                processing_time=processing_time,
+                processing_time=time.time() - start_time,
                 status="completed",
-                filter=filter
+                filter=filter,
+                **extra
             )
-            
-            # Update task with result
-            task.result = result
-            self._update_task_status(task_id, "completed")
-            
-            return result
-            
+            return self._complete_task(task.task_id, result)
         except Exception as e:
-            self._update_task_status(task_id, "failed", str(e))
+            self._update_task_status(task.task_id, "failed", str(e))
             raise
     
+    def _replay(
+        self,
+        raw: RawDetections,
+        filter: VehicleFilter
+    ) -> Tuple[List[Detections], List[BoundingBox], Dict[str, Any]]:
+        """Filter stored raw detections and re-run tracking for videos"""
+        frame_detections = raw.frame_detections(filter)
+        if not raw.meta.get("is_video"):
+            detections = frame_detections[0].to_boxes(self.names) if frame_detections else []
+            return frame_detections, detections, {}
+        tracker = self.create_tracker()
+        frame_detections = [
+            tracker.update(index, detections)
+            for index, detections in enumerate(frame_detections)
+        ]
+        tracks = tracker.summaries()
+        return frame_detections, [track.best_box for track in tracks], {
+            "tracks": tracks,
+            "frame_count": raw.frame_count,
+            "fps": raw.meta.get("fps") or None
+        }
+    
+    def _render(self, raw: RawDetections, source: str, frame_detections: List[Detections], output_path: str):
+        if raw.meta.get("is_video"):
+            render_video(source, output_path, frame_detections, self.names)
+        else:
+            render_image(source, output_path, frame_detections[0], self.names)
+    
+    def ensure_output(self, filename: str) -> Optional[str]:
+        """
+        Path of a processed output file. Deferred outputs are rendered from the
+        task's raw detections and source on first access and kept afterwards.
+        Returns None if the file does not exist and cannot be rendered.
+        """
+        path = os.path.join(settings.OUTPUT_DIR, filename)
+        if os.path.isfile(path):
+            return path
+        deferred = self._deferred_output(filename)
+        if deferred is None:
+            return None
+        task_id, raw, source = deferred
+        
+        with self._render_locks_guard:
+            lock = self._render_locks.setdefault(filename, threading.Lock())
+        with lock:
+            if not os.path.exists(path):
+                filter = VehicleFilter.model_validate(raw.meta["filter"])
+                frame_detections, _, _ = self._replay(raw, filter)
+                # Render next to the final file, keeping the extension for the encoder
+                tmp_path = os.path.join(settings.OUTPUT_DIR, f"rendering_{filename}")
+                self._render(raw, source, frame_detections, tmp_path)
+                os.replace(tmp_path, path)
+                if not settings.RETAIN_SOURCES:
+                    self.raw_store.delete_source(task_id)
+        with self._render_locks_guard:
+            self._render_locks.pop(filename, None)
+        return path
+    
+    def _deferred_output(self, filename: str) -> Optional[Tuple[str, RawDetections, str]]:
+        """Task id, raw detections and source a deferred output is rendered from, or None"""
+        match = LAZY_OUTPUT_PATTERN.match(filename)
+        if not match:
+            return None
+        task_id = match.group(1)
+        raw = self.raw_store.load(task_id)
+        source = self.raw_store.source_path(task_id)
+        if raw is None or source is None or raw.meta.get("output_filename") != filename:
+            return None
+        return task_id, raw, source
+    
+    def render_in_background(self, submit: Callable[..., Future], filename: str) -> Optional[Future]:
+        """
+        Start rendering a deferred output with submit, or return the render
+        already running. A failed render is returned until forget_render is
+        called, so its error can be reported. Returns None if the output does
+        not exist and cannot be rendered.
+        """
+        with self._render_locks_guard:
+            future = self._background_renders.get(filename)
+        if future is not None:
+            return future
+        if self._deferred_output(filename) is None:
+            return None
+        with self._render_locks_guard:
+            future = self._background_renders.get(filename)
+            if future is not None:
+                return future
+            future = submit(self.ensure_output, filename)
+            self._background_renders[filename] = future
+        future.add_done_callback(partial(self._background_render_done, filename))
+        return future
+    
+    def forget_render(self, filename: str, future: Future):
+        """Drop a finished background render once its outcome was reported"""
+        with self._render_locks_guard:
+            if self._background_renders.get(filename) is future:
+                del self._background_renders[filename]
+    
+    def _background_render_done(self, filename: str, future: Future):
+        if future.cancelled() or future.exception() is None:
+            self.forget_render(filename, future)
+            return
+        logger.error("Rendering %s failed", filename, exc_info=future.exception())
+    
+    def _output_available(self, result: DetectionResult) -> bool:
+        """Whether a cached result's output exists or can still be rendered"""
+        if result.processed_filename is None:
+            return True
+        if os.path.exists(os.path.join(settings.OUTPUT_DIR, result.processed_filename)):
+            return True
+        match = LAZY_OUTPUT_PATTERN.match(result.processed_filename)
+        return bool(match) and self.raw_store.exists(match.group(1)) \
+            and self.raw_store.source_path(match.group(1)) is not None
+    
+    @staticmethod
+    def _render_meta(filter: Optional[VehicleFilter], output_filename: Optional[str]) -> Dict[str, Any]:
+        """Raw store metadata needed to render the output later"""
+        return {
+            "filter": (filter or VehicleFilter()).model_dump(mode="json"),
+            "output_filename": output_filename
+        }
+    
+    @staticmethod
+    def _coverage(params: ModelParams) -> Dict[str, Any]:
+        """Raw store metadata describing which detections the model kept"""
+        conf, _, classes, imgsz = params
+        return {"model_conf": conf, "model_classes": list(classes), "imgsz": imgsz}
+    
+    @staticmethod
+    def _covers(meta: Dict[str, Any], params: ModelParams) -> bool:
+        """Whether stored detections contain everything a filter would keep"""
+        conf, _, classes, _ = params
+        if "model_classes" not in meta:
+            return True
+        return conf >= meta["model_conf"] and set(classes) <= set(meta["model_classes"])
+    
+    def _complete_task(self, task_id: str, result: DetectionResult) -> DetectionResult:
+        """Attach the result to its task and mark it completed"""
+        self._update_task(task_id, status="completed", result=result, progress=100.0)
+        return result
+    
+    def _cache_key(
+        self,
+        content_hash: str,
+        filter: Optional[VehicleFilter],
+        video_options: Optional[VideoOptions],
+        render: RenderMode = RenderMode.EAGER,
+        inference_options: Optional[InferenceOptions] = None
+    ) -> str:
+        """Result cache key covering everything that changes the output"""
+        filter = filter or VehicleFilter()
+        inference_options = inference_options or InferenceOptions()
+        return make_cache_key(
+            content=content_hash,
+            model=self.model_id,
+            settings=self._result_settings,
+            target_classes=sorted(filter.target_classes) if filter.target_classes is not None else None,
+            min_confidence=filter.min_confidence,
+            conf=settings.CONFIDENCE_THRESHOLD,
+            iou=settings.IOU_THRESHOLD,
+            video=video_options.model_dump() if video_options else None,
+            render=render.value,
+            imgsz=self.input_sizer.clamp(inference_options.imgsz),
+            adaptive_imgsz=self._adaptive(inference_options),
+            tiled=inference_options.tiled,
+            roi=inference_options.roi.model_dump() if inference_options.roi else None
+        )
+    
     def get_task_status(self, task_id: str) -> Optional[DetectionTask]:
         """Get status of a detection task"""
         return self.tasks.get(task_id)
     
-    def get_detection_stats(self, detections: List[BoundingBox], processing_time: float) -> DetectionStats:
-        """Calculate statistics from detections"""
+    def get_frames(
+        self,
+        task_id: str,
+        start_frame: int = 0,
+        end_frame: Optional[int] = None,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        limit: int = settings.FRAMES_PAGE_LIMIT,
+        skip_empty: bool = False
+    ) -> Optional[FramePage]:
+        """
+        One page of the stored per-frame detections of a video task within a
+        frame range or time window, or None if the task has none. Only the
+        page is read from the memory-mapped store.
+        """
+        reader = self.frame_store.open(task_id)
+        if reader is None:
+            return None
+        if start_time is not None or end_time is not None:
+            if not reader.fps:
+                raise ValueError("The frame rate of this video is unknown; select frames by index")
+            if start_time is not None:
+                start_frame = max(start_frame, math.floor(start_time * reader.fps))
+            if end_time is not None:
+                time_end = math.ceil(end_time * reader.fps)
+                end_frame = time_end if end_frame is None else min(end_frame, time_end)
+        start = min(max(0, start_frame), reader.frame_count)
+        end = reader.frame_count if end_frame is None else min(max(start, end_frame), reader.frame_count)
+        
+        if skip_empty:
+            indexes, next_frame = reader.non_empty(start, end, limit)
+        else:
+            indexes = np.arange(start, min(end, start + limit))
+            next_frame = start + limit if start + limit < end else None
+        
+        return FramePage(
+            task_id=task_id,
+            frame_count=reader.frame_count,
+            fps=reader.fps,
+            frames=[
+                FrameDetections(
+                    frame_index=index,
+                    timestamp=index / reader.fps if reader.fps else None,
+                    detections=detections.to_boxes(self.names)
+                )
+                for index, detections in reader.frames(indexes)
+            ],
+            next_frame=next_frame
+        )
+    
+    def task_stats(self, task: DetectionTask) -> Optional[DetectionStats]:
+        """Statistics of a completed task, or of all images of a batch"""
+        if task.batch is not None:
+            return task.batch.stats
+        if task.result is None:
+            return None
+        return self.get_detection_stats(
+            task.result.detections,
+            task.result.processing_time,
+            task.result.tracks
+        )
+    
+    def get_detection_stats(
+        self,
+        detections: List[BoundingBox],
+        processing_time: float,
+        tracks: Optional[List[TrackSummary]] = None
+    ) -> DetectionStats:
+        """Calculate statistics from detections, counting tracked vehicles once"""
         by_class = {}
+        if tracks:
+            for track in tracks:
+                by_class[track.class_name] = by_class.get(track.class_name, 0) + 1
+            return DetectionStats(
+                total_vehicles=len(tracks),
+                unique_vehicles=len(tracks),
+                by_class=by_class,
+                processing_time=processing_time
+            )
+        
         for det in detections:
             by_class[det.class_name] = by_class.get(det.class_name, 0) + 1
         
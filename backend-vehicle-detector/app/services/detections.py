@@ -0,0 +1,148 @@
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Sequence, Union
+import numpy as np
+from ..models.detection import BoundingBox, VehicleClass, VehicleFilter
+
+# Every vehicle class at any confidence
+ALL_VEHICLES = VehicleFilter(target_classes=None, min_confidence=0.0)
+
+@dataclass
+class Detections:
+    """
+    Columnar detections of one image or frame.
+
+    The hot path works on these arrays; pydantic BoundingBox objects are only
+    created at the API boundary with to_boxes().
+    """
+    boxes: np.ndarray        # float32 (N, 4) xyxy
+    confidences: np.ndarray  # float32 (N,)
+    class_ids: np.ndarray    # int32 (N,)
+    track_ids: Optional[np.ndarray] = None  # int32 (N,), -1 while unconfirmed
+
+    def __len__(self) -> int:
+        return len(self.confidences)
+
+    @classmethod
+    def empty(cls) -> "Detections":
+        return cls(
+            boxes=np.zeros((0, 4), dtype=np.float32),
+            confidences=np.zeros(0, dtype=np.float32),
+            class_ids=np.zeros(0, dtype=np.int32)
+        )
+
+    @classmethod
+    def from_results(cls, results) -> "Detections":
+        """Move an ultralytics result to NumPy with a single device transfer"""
+        data = results.boxes.data.cpu().numpy()
+        return cls(
+            boxes=np.ascontiguousarray(data[:, :4], dtype=np.float32),
+            confidences=data[:, -2].astype(np.float32),
+            class_ids=data[:, -1].astype(np.int32)
+        )
+
+    @classmethod
+    def from_boxes(cls, detections: Sequence[BoundingBox]) -> "Detections":
+        if not detections:
+            return cls.empty()
+        return cls(
+            boxes=np.array([[d.x1, d.y1, d.x2, d.y2] for d in detections], dtype=np.float32),
+            confidences=np.array([d.confidence for d in detections], dtype=np.float32),
+            class_ids=np.array([d.class_id for d in detections], dtype=np.int32)
+        )
+
+    @classmethod
+    def concat(cls, parts: Sequence["Detections"]) -> "Detections":
+        """Stack several sets of detections into one"""
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.empty()
+        return cls(
+            boxes=np.concatenate([part.boxes for part in parts]),
+            confidences=np.concatenate([part.confidences for part in parts]),
+            class_ids=np.concatenate([part.class_ids for part in parts])
+        )
+
+    def select(self, index: Union[np.ndarray, slice]) -> "Detections":
+        """Subset by boolean mask or index array"""
+        return Detections(
+            boxes=self.boxes[index],
+            confidences=self.confidences[index],
+            class_ids=self.class_ids[index],
+            track_ids=self.track_ids[index] if self.track_ids is not None else None
+        )
+
+    def to_boxes(self, names: Dict[int, str]) -> List[BoundingBox]:
+        """Materialize pydantic boxes for the API response"""
+        boxes = self.boxes.tolist()
+        confidences = self.confidences.tolist()
+        class_ids = self.class_ids.tolist()
+        track_ids = self.track_ids.tolist() if self.track_ids is not None else [None] * len(self)
+        return [
+            BoundingBox(
+                x1=box[0],
+                y1=box[1],
+                x2=box[2],
+                y2=box[3],
+                confidence=confidence,
+                class_id=class_id,
+                class_name=names[class_id],
+                track_id=track_id if track_id is not None and track_id >= 0 else None
+            )
+            for box, confidence, class_id, track_id in zip(boxes, confidences, class_ids, track_ids)
+        ]
+
+class ClassLookup:
+    """
+    Precomputed class-id tables for a model's class names.
+
+    Filtering is a table lookup plus a confidence comparison over whole
+    arrays instead of per-box dict lookups on lowercased names.
+    """
+    def __init__(self, names: Dict[int, str]):
+        self.names = names
+        size = max(names, default=-1) + 1
+        self.vehicle_classes: List[Optional[VehicleClass]] = [None] * size
+        for class_id, name in names.items():
+            try:
+                self.vehicle_classes[class_id] = VehicleClass(name.lower())
+            except ValueError:
+                pass
+        self._tables: Dict[Optional[FrozenSet[VehicleClass]], np.ndarray] = {}
+        self._default_filter = VehicleFilter()
+
+    def allowed(self, target_classes: Optional[FrozenSet[VehicleClass]]) -> np.ndarray:
+        """Boolean table indexed by class id; None allows every vehicle class"""
+        table = self._tables.get(target_classes)
+        if table is None:
+            table = np.array([
+                vehicle_class is not None and (target_classes is None or vehicle_class in target_classes)
+                for vehicle_class in self.vehicle_classes
+            ], dtype=bool)
+            self._tables[target_classes] = table
+        return table
+
+    def class_ids(self, target_classes: Optional[FrozenSet[VehicleClass]]) -> List[int]:
+        """Model class ids of the given vehicle classes"""
+        return np.flatnonzero(self.allowed(target_classes)).tolist()
+
+    def mask(
+        self,
+        class_ids: np.ndarray,
+        confidences: np.ndarray,
+        filter: Optional[VehicleFilter] = None
+    ) -> np.ndarray:
+        """Rows kept by a filter (the default filter if None)"""
+        filter = filter or self._default_filter
+        target = frozenset(filter.target_classes) if filter.target_classes is not None else None
+        table = self.allowed(target)
+        known = class_ids < len(table)
+        keep = np.zeros(len(class_ids), dtype=bool)
+        keep[known] = table[class_ids[known]]
+        return keep & (confidences >= filter.min_confidence)
+
+    def filter(self, detections: Detections, filter: Optional[VehicleFilter] = None) -> Detections:
+        return detections.select(self.mask(detections.class_ids, detections.confidences, filter))
+
+    def vehicles(self, detections: Detections) -> Detections:
+        """Keep every vehicle class at any confidence"""
+        return self.filter(detections, ALL_VEHICLES)
\ No newline at end of file
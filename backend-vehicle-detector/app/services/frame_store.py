@@ -0,0 +1,213 @@
+import json
+import os
+import shutil
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .detections import Detections
+
+# One stored box; the frame it belongs to is given by the offset table
+FRAME_ROW = np.dtype([
+    ("box", "<f4", (4,)),
+    ("confidence", "<f4"),
+    ("class_id", "<i2"),
+    ("track_id", "<i4")
+])
+
+# Frames of the offset table checked at a time when looking for non-empty frames
+SCAN_CHUNK_FRAMES = 4096
+
+def _link_file(src: str, dst: str):
+    """Hardlink a file if it exists, copying it where links are not supported"""
+    if not os.path.exists(src):
+        return
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+class FrameWriter:
+    """
+    Appends the tracked detections of a video frame by frame. Rows are
+    written in chunks as they arrive, so memory stays bounded however long
+    the video is, and close() writes the frame offset table.
+    """
+    def __init__(self, rows_path: str, index_path: str, meta_path: str, chunk_rows: int):
+        self._paths = (rows_path, index_path, meta_path)
+        self._chunk_rows = chunk_rows
+        self._file = open(f"{rows_path}.tmp", "wb")
+        self._chunk: List[np.ndarray] = []
+        self._buffered = 0
+        self._counts = array("I")  # Boxes per frame
+
+    def add(self, frame_index: int, detections: Detections):
+        # Frames without a call are stored as empty
+        while len(self._counts) < frame_index:
+            self._counts.append(0)
+        self._counts.append(len(detections))
+        if not len(detections):
+            return
+        rows = np.empty(len(detections), dtype=FRAME_ROW)
+        rows["box"] = detections.boxes
+        rows["confidence"] = detections.confidences
+        rows["class_id"] = detections.class_ids
+        rows["track_id"] = detections.track_ids if detections.track_ids is not None else -1
+        self._chunk.append(rows)
+        self._buffered += len(rows)
+        if self._buffered >= self._chunk_rows:
+            self._flush()
+
+    def _flush(self):
+        if self._chunk:
+            np.concatenate(self._chunk).tofile(self._file)
+            self._chunk = []
+            self._buffered = 0
+
+    def close(self, frame_count: int, fps: Optional[float], **meta: Any):
+        """
+        Write the remaining rows and the offset table and publish the files.
+        Keyword arguments are stored with the frame count and rate.
+        """
+        rows_path, index_path, meta_path = self._paths
+        self._flush()
+        self._file.close()
+        while len(self._counts) < frame_count:
+            self._counts.append(0)
+        offsets = np.zeros(len(self._counts) + 1, dtype=np.int64)
+        np.cumsum(np.frombuffer(self._counts, dtype=np.uint32), out=offsets[1:])
+        np.save(f"{index_path}.tmp.npy", offsets)
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump({**meta, "frame_count": len(self._counts), "fps": fps or None}, f)
+        # The meta file goes last, so a task only has frames once all files are complete
+        os.replace(f"{rows_path}.tmp", rows_path)
+        os.replace(f"{index_path}.tmp.npy", index_path)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    def discard(self):
+        self._file.close()
+        for path in (f"{self._paths[0]}.tmp", f"{self._paths[1]}.tmp.npy", f"{self._paths[2]}.tmp"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+class FrameReader:
+    """
+    Memory-mapped view of the stored frames of a task. Reading a frame
+    range only touches its slice of the offset table and of the rows.
+    """
+    def __init__(self, rows_path: str, index_path: str, meta: Dict[str, Any]):
+        self.meta = meta
+        self.frame_count: int = meta["frame_count"]
+        self.fps: Optional[float] = meta.get("fps")
+        self.offsets = np.load(index_path, mmap_mode="r")
+        # An empty file cannot be mapped
+        self.rows = np.memmap(rows_path, dtype=FRAME_ROW, mode="r") \
+            if os.path.getsize(rows_path) else np.zeros(0, dtype=FRAME_ROW)
+
+    def non_empty(
+        self,
+        start: int,
+        end: int,
+        limit: int,
+        chunk_frames: int = SCAN_CHUNK_FRAMES
+    ) -> Tuple[np.ndarray, Optional[int]]:
+        """
+        Indexes of the first `limit` frames in [start, end) that have
+        detections, and the next such frame to resume from (None if there
+        is none). The offset table is scanned in chunks and the scan stops
+        once the page is full, so early pages of long videos stay cheap.
+        """
+        found: List[np.ndarray] = []
+        count = 0
+        for chunk_start in range(start, end, chunk_frames):
+            chunk_end = min(end, chunk_start + chunk_frames)
+            matches = np.flatnonzero(np.diff(self.offsets[chunk_start:chunk_end + 1])) + chunk_start
+            found.append(matches)
+            count += len(matches)
+            # One match beyond the page gives the cursor
+            if count > limit:
+                break
+        indexes = np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+        next_frame = int(indexes[limit]) if len(indexes) > limit else None
+        return indexes[:limit], next_frame
+
+    def frames(self, indexes: np.ndarray) -> List[Tuple[int, Detections]]:
+        """Detections of ascending frame indexes, read as one contiguous slice"""
+        if len(indexes) == 0:
+            return []
+        first = int(self.offsets[indexes[0]])
+        rows = np.array(self.rows[first:int(self.offsets[indexes[-1] + 1])])
+        frames = []
+        for index in indexes.tolist():
+            frame_rows = rows[int(self.offsets[index]) - first:int(self.offsets[index + 1]) - first]
+            frames.append((index, Detections(
+                boxes=frame_rows["box"],
+                confidences=frame_rows["confidence"],
+                class_ids=frame_rows["class_id"].astype(np.int32),
+                track_ids=frame_rows["track_id"]
+            )))
+        return frames
+
+class FrameStore:
+    """
+    Per-frame detections of video tasks in a seekable layout: fixed-size
+    rows in frame order, an offset table with the first row of every frame
+    and a small JSON file with the frame count and rate.
+    """
+    def __init__(self, directory: str, chunk_rows: int):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+
+    def _paths(self, task_id: str) -> Tuple[str, str, str]:
+        base = os.path.join(self.directory, task_id)
+        return f"{base}.frames", f"{base}.index.npy", f"{base}.json"
+
+    def writer(self, task_id: str) -> FrameWriter:
+        return FrameWriter(*self._paths(task_id), chunk_rows=self.chunk_rows)
+
+    def save(self, task_id: str, frame_detections: List[Detections], fps: Optional[float]):
+        writer = self.writer(task_id)
+        try:
+            for index, detections in enumerate(frame_detections):
+                writer.add(index, detections)
+            writer.close(len(frame_detections), fps)
+        except BaseException:
+            writer.discard()
+            raise
+
+    def exists(self, task_id: str) -> bool:
+        return os.path.exists(self._paths(task_id)[2])
+
+    def open(self, task_id: str) -> Optional[FrameReader]:
+        rows_path, index_path, meta_path = self._paths(task_id)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return FrameReader(rows_path, index_path, meta)
+
+    def link(self, src_task_id: str, dst_task_id: str, **meta: Any):
+        """
+        Share the stored frames of one task with another. Metadata given as
+        keyword arguments replaces that of the source task in a copy.
+        """
+        src_paths, dst_paths = self._paths(src_task_id), self._paths(dst_task_id)
+        # The meta file goes last, as in FrameWriter.close
+        for src, dst in zip(src_paths[:2], dst_paths[:2]):
+            _link_file(src, dst)
+        if not meta:
+            _link_file(src_paths[2], dst_paths[2])
+        elif os.path.exists(src_paths[2]):
+            with open(src_paths[2]) as f:
+                stored = json.load(f)
+            with open(f"{dst_paths[2]}.tmp", "w") as f:
+                json.dump({**stored, **meta}, f)
+            os.replace(f"{dst_paths[2]}.tmp", dst_paths[2])
+
+    def delete(self, task_id: str):
+        for path in self._paths(task_id):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
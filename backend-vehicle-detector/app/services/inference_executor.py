@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from ..core.config import settings
+from .detection_service import detection_service
+
+logger = logging.getLogger(__name__)
+
+class InferenceQueueFull(Exception):
+    """Raised when the executor cannot admit more work"""
+
+class InferenceExecutor:
+    """Bounded worker pool that runs blocking detection work off the event loop"""
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        initializer: Optional[Callable[[], None]] = None,
+        name: str = "inference"
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.name = name
+        self._initializer = initializer
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=name,
+            initializer=self._init_worker
+        )
+        # Every submitted job holds one slot until it finishes, so at most
+        # max_workers jobs run and max_queue jobs wait
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+        self._initializer_failures = 0
+
+    def _init_worker(self):
+        """
+        Prepare a worker thread, e.g. load its model. An exception escaping
+        here would break the pool for good, so it is logged instead and the
+        thread's jobs report the error when they need what failed to load.
+        """
+        try:
+            if self._initializer:
+                self._initializer()
+        except Exception:
+            logger.exception("%s worker initializer failed", self.name.capitalize())
+            with self._lock:
+                self._initializer_failures += 1
+
+    def _release(self, _: Future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Submit a job or raise InferenceQueueFull if the queue is saturated"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise InferenceQueueFull(
+                f"{self.name.capitalize()} queue is full ({self.max_queue} jobs waiting)"
+            )
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a job on the pool and await its result"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def warm_up(self):
+        """
+        Start every worker thread now so their initializers run before the
+        first request instead of during it
+        """
+        barrier = threading.Barrier(self.max_workers)
+        # Each job holds its thread until all have started, so every job lands on its own thread
+        futures = [self._executor.submit(barrier.wait) for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a free worker"""
+        with self._lock:
+            return max(0, self._in_flight - self.max_workers)
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of executor load"""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.max_workers),
+                "rejected": self._rejected,
+                "initializer_failures": self._initializer_failures
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and wait for running jobs"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+# Create singleton instances. Image requests run the model on the
+# micro-batcher's threads, so their workers load no model
+inference_executor = InferenceExecutor(
+    max_workers=settings.INFERENCE_WORKERS,
+    max_queue=settings.INFERENCE_QUEUE_SIZE
+)
+# Videos and batches run for minutes, so they get their own pool and never
+# hold the workers of interactive image requests; video workers run the
+# model on their own thread
+background_executor = InferenceExecutor(
+    max_workers=settings.BACKGROUND_WORKERS,
+    max_queue=settings.BACKGROUND_QUEUE_SIZE,
+    initializer=detection_service.load_worker_model,
+    name="background"
+)
+
+def warm_up_executors():
+    """Start the threads of both pools, loading the models of background workers"""
+    inference_executor.warm_up()
+    background_executor.warm_up()
+
+def shutdown_executors():
+    inference_executor.shutdown()
+    background_executor.shutdown()
+
+# Videos lower their input size while jobs wait for a worker
+detection_service.input_sizer.add_backlog_source(lambda: inference_executor.queue_depth)
+detection_service.input_sizer.add_backlog_source(lambda: background_executor.queue_depth)
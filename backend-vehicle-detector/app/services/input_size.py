@@ -0,0 +1,107 @@
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# YOLO input sizes must be a multiple of the largest model stride
+SIZE_STRIDE = 32
+
+def round_size(size: int) -> int:
+    """Round an input size up to a multiple of the model stride"""
+    return max(SIZE_STRIDE, int(math.ceil(size / SIZE_STRIDE)) * SIZE_STRIDE)
+
+class InputSizer:
+    """
+    Chooses the model input size (imgsz) of each inference call.
+
+    Requested sizes are clamped to the deployment limits. In adaptive mode
+    sources smaller than the requested size run at their own resolution
+    instead of being upscaled, and video frames step down through the
+    configured sizes while jobs are waiting for a worker, trading accuracy
+    for latency under peak load.
+    """
+    def __init__(
+        self,
+        default_size: int,
+        min_size: int,
+        max_size: int,
+        steps: Sequence[int],
+        backlog_limit: int,
+        refresh_seconds: float = 1.0
+    ):
+        self.min_size = round_size(min_size)
+        self.max_size = max(self.min_size, round_size(max_size))
+        self.default_size = self.clamp(default_size)
+        self.steps = sorted({self.clamp(step) for step in steps}, reverse=True)
+        self.backlog_limit = max(1, backlog_limit)
+        self.refresh_seconds = refresh_seconds
+        self._backlog_sources: List[Callable[[], int]] = []
+        self._backlog = 0
+        self._backlog_at = 0.0
+        self._lock = threading.Lock()
+        self._counters = {"reduced_calls": 0, "reduced_frames": 0}
+
+    def add_backlog_source(self, source: Callable[[], int]):
+        """Register a callable returning the number of jobs waiting for a worker"""
+        self._backlog_sources.append(source)
+
+    def clamp(self, size: Optional[int]) -> int:
+        """Requested size rounded to the model stride and kept within the limits"""
+        if size is None:
+            return self.default_size
+        return min(self.max_size, max(self.min_size, round_size(size)))
+
+    def for_source(self, size: Optional[int], width: int, height: int, adaptive: bool) -> int:
+        """Input size for a source; adaptive mode never upscales small sources"""
+        size = self.clamp(size)
+        if adaptive and width > 0 and height > 0:
+            size = min(size, self.clamp(max(width, height)))
+        return size
+
+    def backlog(self) -> int:
+        """Jobs waiting across all sources, refreshed at most once per interval"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._backlog_at < self.refresh_seconds:
+                return self._backlog
+            self._backlog_at = now
+        backlog = 0
+        for source in self._backlog_sources:
+            try:
+                backlog += source()
+            except Exception:
+                logger.exception("Backlog source failed")
+        with self._lock:
+            self._backlog = backlog
+        return backlog
+
+    def under_load(self, size: int, frames: int = 1) -> int:
+        """
+        Size to run frames at given the current backlog. The full backlog
+        limit selects the smallest step below the planned size.
+        """
+        choices = [size] + [step for step in self.steps if step < size]
+        if len(choices) == 1:
+            return size
+        level = min(1.0, self.backlog() / self.backlog_limit)
+        reduced = choices[int(level * (len(choices) - 1))]
+        if reduced < size:
+            with self._lock:
+                self._counters["reduced_calls"] += 1
+                self._counters["reduced_frames"] += frames
+        return reduced
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "default": self.default_size,
+                "min": self.min_size,
+                "max": self.max_size,
+                "steps": self.steps,
+                "backlog": self._backlog,
+                "backlog_limit": self.backlog_limit,
+                **self._counters
+            }
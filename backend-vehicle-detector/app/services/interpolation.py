@@ -0,0 +1,149 @@
+import threading
+from typing import Optional, Tuple
+import cv2
+import numpy as np
+from ..models.detection import StrideReport
+from .detections import Detections
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy boxes"""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+def match_detections(
+    a: Detections,
+    b: Detections,
+    iou_threshold: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Greedily match same-class boxes by IoU.
+
+    Returns the matched row indices of each side, their IoUs, and the
+    unmatched row indices of each side.
+    """
+    ious = iou_matrix(a.boxes, b.boxes)
+    ious = np.where(a.class_ids[:, None] == b.class_ids[None, :], ious, 0.0)
+    rows, cols = np.nonzero(ious >= iou_threshold)
+    # Highest IoU pairs first; only candidate pairs are visited
+    order = np.argsort(-ious[rows, cols], kind="stable")
+    used_a = np.zeros(len(a), dtype=bool)
+    used_b = np.zeros(len(b), dtype=bool)
+    matched_a, matched_b = [], []
+    for i, j in zip(rows[order].tolist(), cols[order].tolist()):
+        if used_a[i] or used_b[j]:
+            continue
+        used_a[i] = used_b[j] = True
+        matched_a.append(i)
+        matched_b.append(j)
+    matched_a = np.asarray(matched_a, dtype=np.int64)
+    matched_b = np.asarray(matched_b, dtype=np.int64)
+    return (
+        matched_a,
+        matched_b,
+        ious[matched_a, matched_b],
+        np.flatnonzero(~used_a),
+        np.flatnonzero(~used_b)
+    )
+
+def interpolate_detections(
+    start: Detections,
+    end: Detections,
+    t: float,
+    iou_threshold: float = 0.3
+) -> Detections:
+    """
+    Estimate the boxes of a frame between two keyframes.
+
+    Matched boxes move linearly from start to end. Boxes seen on only one
+    keyframe are kept on the half of the gap closest to that keyframe.
+    """
+    matched_start, matched_end, _, unmatched_start, unmatched_end = match_detections(
+        start, end, iou_threshold
+    )
+    a, b = start.select(matched_start), end.select(matched_end)
+    lonely = start.select(unmatched_start) if t < 0.5 else end.select(unmatched_end)
+    return Detections(
+        boxes=np.concatenate([a.boxes + (b.boxes - a.boxes) * t, lonely.boxes]).astype(np.float32),
+        confidences=np.concatenate([
+            a.confidences + (b.confidences - a.confidences) * t,
+            lonely.confidences
+        ]).astype(np.float32),
+        class_ids=np.concatenate([a.class_ids, lonely.class_ids])
+    )
+
+class KeyframeScheduler:
+    """
+    Decides which frames run full detection.
+
+    Every frame_stride-th frame is a keyframe. In adaptive mode a frame also
+    becomes a keyframe when it differs from the last keyframe by more than
+    scene_change_threshold (mean absolute difference of a small grayscale
+    thumbnail, 0-255).
+    """
+    def __init__(self, frame_stride: int, adaptive: bool, scene_change_threshold: float):
+        self.frame_stride = max(1, frame_stride)
+        self.adaptive = adaptive
+        self.scene_change_threshold = scene_change_threshold
+        self._since_keyframe = 0
+        self._thumbnail: Optional[np.ndarray] = None
+
+    @staticmethod
+    def _thumb(frame: np.ndarray) -> np.ndarray:
+        small = cv2.resize(frame, (64, 36), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+    def is_keyframe(self, frame: np.ndarray) -> bool:
+        """Must be called once per frame, in order"""
+        keyframe = self._thumbnail is None or self._since_keyframe + 1 >= self.frame_stride
+        thumb = None
+        if not keyframe and self.adaptive:
+            thumb = self._thumb(frame)
+            keyframe = float(np.abs(thumb - self._thumbnail).mean()) > self.scene_change_threshold
+        if keyframe:
+            self._thumbnail = thumb if thumb is not None else self._thumb(frame)
+            self._since_keyframe = 0
+        else:
+            self._since_keyframe += 1
+        return keyframe
+
+class StrideAccuracy:
+    """Compares interpolated boxes against full detection on audited frames"""
+    def __init__(self, iou_threshold: float = 0.5):
+        self.iou_threshold = iou_threshold
+        self._lock = threading.Lock()
+        self.audited_frames = 0
+        self.true_positives = 0
+        self.false_positives = 0
+        self.false_negatives = 0
+        self._iou_sum = 0.0
+
+    def add(self, interpolated: Detections, detected: Detections):
+        _, _, ious, unmatched_interpolated, unmatched_detected = match_detections(
+            interpolated, detected, self.iou_threshold
+        )
+        with self._lock:
+            self.audited_frames += 1
+            self.true_positives += len(ious)
+            self.false_positives += len(unmatched_interpolated)
+            self.false_negatives += len(unmatched_detected)
+            self._iou_sum += float(ious.sum())
+
+    def report(self, keyframes: int, interpolated_frames: int) -> StrideReport:
+        tp, fp, fn = self.true_positives, self.false_positives, self.false_negatives
+        return StrideReport(
+            keyframes=keyframes,
+            interpolated_frames=interpolated_frames,
+            audited_frames=self.audited_frames,
+            precision=tp / (tp + fp) if tp + fp else None,
+            recall=tp / (tp + fn) if tp + fn else None,
+            mean_iou=self._iou_sum / tp if tp else None
+        )
\ No newline at end of file
@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from ..core.config import settings
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are waiting"""
+
+@dataclass
+class Job:
+    """A claimed unit of work"""
+    id: int
+    task_id: str
+    kind: str  # "image", "video" or "batch"
+    payload: Dict[str, Any]
+    data: Optional[bytes]
+    attempts: int
+
+class SQLiteJobQueue:
+    """
+    Durable job queue in a local SQLite file.
+
+    API processes enqueue jobs and detector worker processes claim them.
+    A claim is a lease: a worker that dies without finishing its job lets
+    the lease run out and the job is handed to another worker, up to
+    max_attempts times. Small payloads such as image bytes are stored
+    inline; videos are referenced by path on the shared upload directory.
+    """
+    def __init__(self, path: str, max_depth: int, lease_seconds: float, max_attempts: int):
+        self.path = path
+        self.max_depth = max_depth
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    task_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    data BLOB,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    lease_expires REAL,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_status_id ON jobs (status, id);
+                CREATE INDEX IF NOT EXISTS idx_jobs_task_id ON jobs (task_id);
+            """)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode so claims can take the write lock explicitly
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, task_id: str, kind: str, payload: Dict[str, Any], data: Optional[bytes] = None) -> int:
+        """Add a job; raises JobQueueFull when max_depth jobs are already queued"""
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= self.max_depth:
+                raise JobQueueFull("Detection queue is full, please retry shortly")
+            job_id = conn.execute(
+                "INSERT INTO jobs (task_id, kind, payload, data, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (task_id, kind, json.dumps(payload), data, now, now)
+            ).lastrowid
+            conn.execute("COMMIT")
+            return job_id
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def claim(self, worker: str) -> Optional[Job]:
+        """Lease the oldest available job to a worker"""
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # A running job with an expired lease lost its worker and is retried
+            row = conn.execute(
+                "SELECT id, task_id, kind, payload, data, attempts FROM jobs "
+                "WHERE status = 'queued' OR (status = 'running' AND lease_expires < ? AND attempts < ?) "
+                "ORDER BY id LIMIT 1",
+                (now, self.max_attempts)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, "
+                "lease_expires = ?, updated_at = ? WHERE id = ?",
+                (worker, now + self.lease_seconds, now, row[0])
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return Job(
+            id=row[0],
+            task_id=row[1],
+            kind=row[2],
+            payload=json.loads(row[3]),
+            data=row[4],
+            attempts=row[5] + 1
+        )
+
+    def reap(self) -> List[str]:
+        """Fail jobs that lost their worker max_attempts times; returns their task IDs"""
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, task_id FROM jobs WHERE status = 'running' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET status = 'failed', error = 'Worker lost too many times', "
+                "data = NULL, lease_expires = NULL, updated_at = ? WHERE id = ?",
+                [(now, row[0]) for row in rows]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [row[1] for row in rows]
+
+    def renew(self, job_id: int, worker: str):
+        """Extend the lease of a job that is still being processed"""
+        self._connection().execute(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (time.time() + self.lease_seconds, time.time(), job_id, worker)
+        )
+
+    def finish(self, job_id: int, error: Optional[str] = None):
+        """Mark a job done or failed; its inline data is dropped"""
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, error = ?, data = NULL, lease_expires = NULL, updated_at = ? WHERE id = ?",
+            ("failed" if error else "done", error, time.time(), job_id)
+        )
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs last updated before the given UNIX time"""
+        return self._connection().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+            (older_than,)
+        ).rowcount
+
+    def queued(self) -> int:
+        """Number of jobs waiting for a worker"""
+        return self._connection().execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {"max_depth": self.max_depth, **{status: count for status, count in rows}}
+
+def create_job_queue() -> SQLiteJobQueue:
+    if settings.TASK_STORE_BACKEND != "sqlite":
+        raise ValueError("The job queue needs TASK_STORE_BACKEND=sqlite so workers and the API share tasks")
+    os.makedirs(os.path.dirname(settings.JOB_QUEUE_PATH) or ".", exist_ok=True)
+    return SQLiteJobQueue(
+        settings.JOB_QUEUE_PATH,
+        max_depth=settings.JOB_QUEUE_MAX_DEPTH,
+        lease_seconds=settings.JOB_LEASE_SECONDS,
+        max_attempts=settings.JOB_MAX_ATTEMPTS
+    )
+
+# Create singleton instance; None when jobs run in-process
+job_queue = create_job_queue() if settings.JOB_QUEUE_ENABLED else None
\ No newline at end of file
@@ -0,0 +1,121 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+from ..core.config import settings
+from ..models.detection import InferenceOptions, RenderMode, VehicleFilter, VideoOptions
+from .job_queue import Job, SQLiteJobQueue
+
+logger = logging.getLogger(__name__)
+
+def job_payload(
+    filename: str,
+    filter: Optional[VehicleFilter],
+    render: RenderMode,
+    content_hash: Optional[str] = None,
+    file_path: Optional[str] = None,
+    video_options: Optional[VideoOptions] = None,
+    inference_options: Optional[InferenceOptions] = None
+) -> Dict[str, Any]:
+    """JSON payload describing a detection job"""
+    return {
+        "filename": filename,
+        "filter": filter.model_dump(mode="json") if filter else None,
+        "render": render.value,
+        "content_hash": content_hash,
+        "file_path": file_path,
+        "video_options": video_options.model_dump() if video_options else None,
+        "inference_options": inference_options.model_dump() if inference_options else None
+    }
+
+class JobWorker:
+    """
+    Claims jobs from the queue and runs them through the detection service.
+
+    The lease of the running job is renewed in the background, so long
+    videos are not handed to another worker while still being processed.
+    """
+    def __init__(self, queue: SQLiteJobQueue, service, name: Optional[str] = None):
+        self.queue = queue
+        self.service = service
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.processed = 0
+        self.failed = 0
+
+    def run(self, stop: threading.Event):
+        """Process jobs until stop is set; the current job always finishes"""
+        last_reap = 0.0
+        while not stop.is_set():
+            if time.time() - last_reap > self.queue.lease_seconds:
+                last_reap = time.time()
+                self._reap()
+            job = self.queue.claim(self.name)
+            if job is None:
+                stop.wait(settings.JOB_POLL_INTERVAL_SECONDS)
+                continue
+            self.run_job(job)
+
+    def _reap(self):
+        for task_id in self.queue.reap():
+            self.service.fail_task(task_id, "Detector worker was lost while processing")
+        self.queue.purge(time.time() - settings.JOB_RETENTION_SECONDS)
+
+    def run_job(self, job: Job):
+        logger.info("Worker %s running job %s (%s, attempt %d)", self.name, job.id, job.kind, job.attempts)
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, done), daemon=True)
+        heartbeat.start()
+        try:
+            self._process(job)
+            self.queue.finish(job.id)
+            self.processed += 1
+        except Exception as e:
+            # The detection service has already marked the task failed
+            logger.exception("Job %s failed", job.id)
+            self.queue.finish(job.id, str(e))
+            self.failed += 1
+        finally:
+            done.set()
+            heartbeat.join()
+
+    def _heartbeat(self, job: Job, done: threading.Event):
+        while not done.wait(self.queue.lease_seconds / 3):
+            self.queue.renew(job.id, self.name)
+
+    def _process(self, job: Job):
+        payload = job.payload
+        filter = VehicleFilter.model_validate(payload["filter"]) if payload.get("filter") else None
+        render = RenderMode(payload.get("render", RenderMode.EAGER.value))
+        inference_options = InferenceOptions.model_validate(payload["inference_options"]) \
+            if payload.get("inference_options") else None
+        if job.kind == "image":
+            self.service.process_image_data(
+                job.data, payload["filename"], filter,
+                task_id=job.task_id,
+                content_hash=payload.get("content_hash"),
+                render=render,
+                inference_options=inference_options
+            )
+            return
+
+        file_path = payload["file_path"]
+        try:
+            if job.kind == "batch":
+                self.service.process_batch(file_path, job.task_id, filter, render, inference_options)
+                return
+            video_options = VideoOptions.model_validate(payload["video_options"]) \
+                if payload.get("video_options") else None
+            self.service.process_file(
+                file_path, filter, job.task_id, video_options,
+                filename=payload["filename"],
+                content_hash=payload.get("content_hash"),
+                render=render,
+                inference_options=inference_options
+            )
+        finally:
+            # Cleanup uploaded file unless it was moved into the raw store
+            if os.path.exists(file_path):
+                os.remove(file_path)
@@ -0,0 +1,279 @@
+import importlib.util
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+import cv2
+import numpy as np
+from ..core.config import settings
+from .detections import Detections
+from .interpolation import match_detections
+
+if TYPE_CHECKING:
+    from ultralytics import YOLO
+
+logger = logging.getLogger(__name__)
+
+# Package each backend needs at runtime
+BACKEND_PACKAGES = {
+    "pytorch": "torch",
+    "onnx": "onnxruntime",
+    "openvino": "openvino"
+}
+# Fastest first on CPU-only nodes
+AUTO_ORDER = ("openvino", "onnx", "pytorch")
+
+_safe_globals_added = False
+
+def add_safe_globals():
+    """
+    Allow the classes stored in YOLO .pt checkpoints to be unpickled by
+    torch. Imported here rather than at module import, because torch and
+    ultralytics take seconds to import.
+    """
+    global _safe_globals_added
+    if _safe_globals_added:
+        return
+    import torch.serialization
+    import torch.nn.modules.container
+    import torch.nn.modules.conv
+    import torch.nn.modules.batchnorm
+    import torch.nn.modules.activation
+    import torch.nn.modules.pooling
+    import torch.nn.modules.upsampling
+    import torch.nn.modules.dropout
+    import torch.nn.modules.linear
+    import torch.nn.modules.normalization
+    import torch.nn.modules.padding
+    import torch.nn.modules.flatten
+    import torch.nn
+    from ultralytics.nn.tasks import DetectionModel
+    from ultralytics.nn.modules.conv import Conv, Concat
+    from ultralytics.nn.modules.block import C2f, Bottleneck, BottleneckCSP, SPP, SPPF, DFL
+    from ultralytics.nn.modules.head import Detect
+
+    # Add required classes to safe globals
+    torch.serialization.add_safe_globals([
+        DetectionModel,
+        Conv,
+        Concat,
+        C2f,
+        Bottleneck,
+        BottleneckCSP,
+        SPP,
+        SPPF,
+        DFL,
+        Detect,
+        torch.nn.modules.container.Sequential,
+        torch.nn.modules.container.ModuleList,
+        torch.nn.modules.container.ModuleDict,
+        torch.nn.modules.conv.Conv2d,
+        torch.nn.modules.conv.ConvTranspose2d,
+        torch.nn.modules.batchnorm.BatchNorm2d,
+        torch.nn.modules.activation.SiLU,
+        torch.nn.modules.activation.ReLU,
+        torch.nn.modules.activation.LeakyReLU,
+        torch.nn.modules.activation.Hardswish,
+        torch.nn.modules.pooling.MaxPool2d,
+        torch.nn.modules.pooling.AdaptiveAvgPool2d,
+        torch.nn.modules.pooling.AvgPool2d,
+        torch.nn.modules.upsampling.Upsample,
+        torch.nn.modules.dropout.Dropout,
+        torch.nn.modules.dropout.Dropout2d,
+        torch.nn.modules.linear.Linear,
+        torch.nn.modules.normalization.LayerNorm,
+        torch.nn.modules.normalization.GroupNorm,
+        torch.nn.modules.padding.ZeroPad2d,
+        torch.nn.modules.flatten.Flatten,
+        torch.nn.AdaptiveMaxPool2d,
+    ])
+    _safe_globals_added = True
+
+def load_model(path: str) -> "YOLO":
+    """Load a detection model from .pt weights or an exported model"""
+    from ultralytics import YOLO
+    add_safe_globals()
+    return YOLO(path, task="detect")
+
+@dataclass
+class BackendInfo:
+    """The weights a backend runs and how they compare with PyTorch"""
+    name: str
+    path: str
+    verified: Optional[bool] = None
+    verification: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def backend_available(name: str) -> bool:
+    """Whether the runtime of a backend is installed"""
+    return importlib.util.find_spec(BACKEND_PACKAGES[name]) is not None
+
+def exported_path(model_path: str, backend: str, int8: bool = False) -> str:
+    """Where ultralytics writes the export of a model for a backend"""
+    path = Path(model_path)
+    if backend == "pytorch":
+        return model_path
+    if backend == "onnx":
+        return str(path.with_suffix(".onnx"))
+    if backend == "openvino":
+        suffix = "_int8_openvino_model" if int8 else "_openvino_model"
+        return str(path.with_name(f"{path.stem}{suffix}"))
+    raise ValueError(f"Unknown inference backend: {backend}")
+
+def export_model(model_path: str, backend: str, int8: bool = False) -> str:
+    """
+    Export the PyTorch weights for a backend once and reuse the files after.
+
+    Exports use a dynamic input shape so batching and per-request input
+    sizes keep working.
+    """
+    path = exported_path(model_path, backend, int8)
+    if os.path.exists(path):
+        return path
+    if not backend_available(backend):
+        # ultralytics would try to pip install the runtime; never do that at startup
+        raise RuntimeError(f"{BACKEND_PACKAGES[backend]} is not installed")
+    logger.info("Exporting %s for %s", model_path, backend)
+    options = {"format": backend, "imgsz": settings.BACKEND_EXPORT_IMGSZ, "dynamic": True}
+    if backend == "openvino" and int8:
+        options.update(int8=True, data=settings.BACKEND_INT8_DATA)
+    load_model(model_path).export(**options)
+    if not os.path.exists(path):
+        raise RuntimeError(f"Export did not produce {path}")
+    return path
+
+def model_names(model: "YOLO") -> Dict[int, str]:
+    """Class names of a loaded model; exported models only know them once their predictor is set up"""
+    if model.names is None:
+        model(np.zeros((64, 64, 3), dtype=np.uint8), verbose=False)
+        return dict(model.predictor.model.names)
+    return dict(model.names)
+
+def reference_images() -> List[np.ndarray]:
+    """Sample images shipped with ultralytics used for checks and benchmarks"""
+    from ultralytics.utils import ASSETS
+    images = [cv2.imread(str(ASSETS / name)) for name in ("bus.jpg", "zidane.jpg")]
+    return [image for image in images if image is not None]
+
+def _predict(model: "YOLO", images: List[np.ndarray]) -> List[Detections]:
+    results = model(
+        images,
+        conf=settings.CONFIDENCE_THRESHOLD,
+        iou=settings.IOU_THRESHOLD,
+        imgsz=settings.BACKEND_EXPORT_IMGSZ,
+        verbose=False
+    )
+    return [Detections.from_results(result) for result in results]
+
+def compare_backends(reference: "YOLO", candidate: "YOLO", images: List[np.ndarray]) -> Dict[str, Any]:
+    """
+    Compare the detections of two models on the same images.
+
+    Boxes are paired by class and IoU. The candidate is equivalent when
+    every box above the tolerance band has a partner with at least
+    BACKEND_VERIFY_MIN_IOU IoU and a confidence within
+    BACKEND_VERIFY_CONF_TOLERANCE.
+    """
+    tolerance = settings.BACKEND_VERIFY_CONF_TOLERANCE
+    # Boxes near the confidence threshold may legitimately flip either way
+    floor = settings.CONFIDENCE_THRESHOLD + tolerance
+    matched = missing = extra = 0
+    min_iou = 1.0
+    max_conf_diff = 0.0
+    for expected, actual in zip(_predict(reference, images), _predict(candidate, images)):
+        expected_idx, actual_idx, ious, unmatched_expected, unmatched_actual = match_detections(
+            expected, actual, settings.BACKEND_VERIFY_MIN_IOU
+        )
+        matched += len(ious)
+        missing += int((expected.confidences[unmatched_expected] >= floor).sum())
+        extra += int((actual.confidences[unmatched_actual] >= floor).sum())
+        if len(ious):
+            min_iou = min(min_iou, float(ious.min()))
+            max_conf_diff = max(max_conf_diff, float(np.abs(
+                expected.confidences[expected_idx] - actual.confidences[actual_idx]
+            ).max()))
+    return {
+        "images": len(images),
+        "matched": matched,
+        "missing": missing,
+        "extra": extra,
+        "min_iou": min_iou if matched else None,
+        "max_conf_diff": max_conf_diff,
+        "equivalent": missing == 0 and extra == 0 and max_conf_diff <= tolerance
+    }
+
+def prepare_backend(model_path: str, name: str, reference: Optional["YOLO"] = None) -> BackendInfo:
+    """Export a backend if needed and verify it against the PyTorch model"""
+    int8 = settings.BACKEND_INT8 and name == "openvino"
+    info = BackendInfo(name=name, path=exported_path(model_path, name, int8))
+    if name == "pytorch":
+        return info
+    try:
+        info.path = export_model(model_path, name, int8)
+        if settings.BACKEND_VERIFY:
+            images = reference_images()
+            info.verification = compare_backends(reference or load_model(model_path), load_model(info.path), images)
+            info.verified = info.verification["equivalent"]
+    except Exception as e:
+        info.error = str(e)
+    return info
+
+def select_backend(model_path: str) -> BackendInfo:
+    """
+    Pick the inference backend from INFERENCE_BACKEND.
+
+    "auto" takes the first installed backend of AUTO_ORDER whose export
+    succeeded and, when verification is on, matched PyTorch. An explicitly
+    requested backend that cannot be prepared falls back to PyTorch.
+    """
+    requested = settings.INFERENCE_BACKEND
+    if requested == "pytorch" or not model_path.endswith(".pt"):
+        # Already exported weights are used as given
+        return BackendInfo(name="pytorch" if model_path.endswith(".pt") else "exported", path=model_path)
+    candidates = AUTO_ORDER if requested == "auto" else (requested,)
+    reference = None
+    for name in candidates:
+        if name == "pytorch":
+            break
+        if not backend_available(name):
+            if requested != "auto":
+                logger.warning("Inference backend %s is not installed, using pytorch", name)
+            continue
+        if reference is None:
+            reference = load_model(model_path)
+        info = prepare_backend(model_path, name, reference)
+        if info.error is None and info.verified is not False:
+            logger.info("Using %s inference backend (%s)", name, info.path)
+            return info
+        logger.warning("Inference backend %s rejected: %s", name, info.error or info.verification)
+    return BackendInfo(name="pytorch", path=model_path)
+
+def benchmark(
+    paths: Dict[str, str],
+    images: Optional[List[np.ndarray]] = None,
+    batch_size: int = 1,
+    runs: int = 10
+) -> Dict[str, Dict[str, float]]:
+    """Throughput of each backend on the same images, after one warm-up call"""
+    images = images or reference_images()
+    batch = [images[i % len(images)] for i in range(batch_size)]
+    report = {}
+    for name, path in paths.items():
+        model = load_model(path)
+        _predict(model, batch)
+        started = time.perf_counter()
+        for _ in range(runs):
+            _predict(model, batch)
+        elapsed = time.perf_counter() - started
+        report[name] = {
+            "batch_size": batch_size,
+            "runs": runs,
+            "ms_per_batch": elapsed / runs * 1000,
+            "images_per_second": runs * batch_size / elapsed if elapsed > 0 else 0.0
+        }
+    return report
\ No newline at end of file
@@ -0,0 +1,147 @@
+import glob
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+import numpy as np
+from ..models.detection import VehicleFilter
+from .detections import ClassLookup, Detections
+from .frame_store import FrameStore, FrameWriter
+
+@dataclass
+class RawDetections:
+    """Unfiltered detections of a task in columnar form, one row per box"""
+    frames: np.ndarray       # int32 frame index (0 for images)
+    boxes: np.ndarray        # float32 (N, 4) xyxy
+    confidences: np.ndarray  # float32
+    class_ids: np.ndarray    # int16
+    names: Dict[int, str]
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def frame_count(self) -> int:
+        return int(self.meta.get("frame_count", 1))
+
+    def mask(self, filter: Optional[VehicleFilter] = None) -> np.ndarray:
+        """Boolean row mask selecting the boxes a filter keeps"""
+        return ClassLookup(self.names).mask(self.class_ids, self.confidences, filter)
+
+    def frame_detections(self, filter: Optional[VehicleFilter] = None) -> List[Detections]:
+        """Filtered detections grouped by frame"""
+        keep = self.mask(filter)
+        frames = self.frames[keep]
+        # Rows are recorded in frame order, so each frame is one contiguous slice
+        bounds = np.searchsorted(frames, np.arange(self.frame_count + 1))
+        kept = Detections(
+            boxes=self.boxes[keep],
+            confidences=self.confidences[keep],
+            class_ids=self.class_ids[keep].astype(np.int32)
+        )
+        return [
+            kept.select(slice(bounds[i], bounds[i + 1]))
+            for i in range(self.frame_count)
+        ]
+
+class RawDetectionRecorder:
+    """
+    Streams the detections of a task to the store frame by frame, so memory
+    stays bounded however long the video is. Frames must arrive in order.
+    """
+    def __init__(self, writer: FrameWriter, names: Dict[int, str]):
+        self._writer = writer
+        self._names = names
+        self._class_ids: Set[int] = set()
+
+    def add(self, frame_index: int, detections: Detections) -> Detections:
+        """Record one frame and return its detections unchanged"""
+        self._writer.add(frame_index, detections)
+        self._class_ids.update(np.unique(detections.class_ids).tolist())
+        return detections
+
+    def close(self, frame_count: int, **meta: Any):
+        """Publish the recorded frames with the task's metadata"""
+        names = {str(class_id): self._names[class_id] for class_id in sorted(self._class_ids)}
+        self._writer.close(frame_count, meta.pop("fps", None), names=names, **meta)
+
+    def discard(self):
+        self._writer.discard()
+
+class RawDetectionStore:
+    """
+    Persists raw detections (and optionally the source file) per task so a
+    task can be re-filtered and re-rendered without running the model.
+    Detections use the frame store layout, so they are written as they
+    arrive and read back through a memory map.
+    """
+    def __init__(self, directory: str, chunk_rows: int):
+        self.directory = directory
+        self._frames = FrameStore(directory, chunk_rows)
+
+    def recorder(self, task_id: str, names: Dict[int, str]) -> RawDetectionRecorder:
+        return RawDetectionRecorder(self._frames.writer(task_id), names)
+
+    def exists(self, task_id: str) -> bool:
+        return self._frames.exists(task_id)
+
+    def load(self, task_id: str) -> Optional[RawDetections]:
+        reader = self._frames.open(task_id)
+        if reader is None:
+            return None
+        meta = dict(reader.meta)
+        names = meta.pop("names", {})
+        return RawDetections(
+            frames=np.repeat(
+                np.arange(reader.frame_count, dtype=np.int32),
+                np.diff(reader.offsets)
+            ),
+            boxes=reader.rows["box"],
+            confidences=reader.rows["confidence"],
+            class_ids=reader.rows["class_id"],
+            names={int(k): v for k, v in names.items()},
+            meta=meta
+        )
+
+    def retain_source(self, task_id: str, file_path: str) -> str:
+        """Move an uploaded file into the store as the task's source"""
+        path = os.path.join(self.directory, f"{task_id}.source{Path(file_path).suffix}")
+        shutil.move(file_path, path)
+        return path
+
+    def save_source(self, task_id: str, data: bytes, suffix: str) -> str:
+        """Write an in-memory upload into the store as the task's source"""
+        path = os.path.join(self.directory, f"{task_id}.source{suffix}")
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def source_path(self, task_id: str) -> Optional[str]:
+        matches = glob.glob(os.path.join(self.directory, f"{glob.escape(task_id)}.source*"))
+        return matches[0] if matches else None
+
+    def link(self, src_task_id: str, dst_task_id: str, **meta: Any):
+        """
+        Share the raw detections and source of one task with another. Metadata
+        given as keyword arguments replaces that of the source task in a copy.
+        """
+        self._frames.link(src_task_id, dst_task_id, **meta)
+        source = self.source_path(src_task_id)
+        if not source:
+            return
+        dst = os.path.join(self.directory, f"{dst_task_id}.source{Path(source).suffix}")
+        try:
+            os.link(source, dst)
+        except OSError:
+            shutil.copyfile(source, dst)
+
+    def delete_source(self, task_id: str):
+        """Remove the task's source, keeping its raw detections"""
+        for path in glob.glob(os.path.join(self.directory, f"{glob.escape(task_id)}.source*")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def delete(self, task_id: str):
+        self._frames.delete(task_id)
+        self.delete_source(task_id)
\ No newline at end of file
@@ -0,0 +1,125 @@
+import logging
+import os
+import shutil
+import subprocess
+from typing import Dict, List
+import cv2
+import numpy as np
+from ..core.config import settings
+from ..models.detection import VehicleClass
+from .detections import Detections
+
+logger = logging.getLogger(__name__)
+
+# Use different colors for different vehicle classes (BGR)
+CLASS_COLORS = {
+    VehicleClass.CAR: (0, 255, 0),        # Green
+    VehicleClass.MOTORCYCLE: (255, 0, 0), # Blue
+    VehicleClass.BUS: (0, 0, 255),        # Red
+    VehicleClass.TRUCK: (255, 255, 0),    # Cyan
+    VehicleClass.BICYCLE: (255, 0, 255)   # Magenta
+}
+DEFAULT_COLOR = (0, 255, 0)
+
+def class_color(class_name: str) -> tuple:
+    """Drawing color for a detected class name"""
+    try:
+        return CLASS_COLORS[VehicleClass(class_name.lower())]
+    except ValueError:
+        return DEFAULT_COLOR
+
+def label(class_name: str, confidence: float, track_id: int = -1) -> str:
+    """Text drawn above a box"""
+    if track_id >= 0:
+        return f"{class_name} #{track_id} {confidence:.2f}"
+    return f"{class_name} {confidence:.2f}"
+
+def draw_detections(img: np.ndarray, detections: Detections, names: Dict[int, str]) -> np.ndarray:
+    """Draw boxes and labels onto an image in place and return it"""
+    boxes = detections.boxes.astype(np.int32).tolist()
+    confidences = detections.confidences.tolist()
+    class_ids = detections.class_ids.tolist()
+    track_ids = detections.track_ids.tolist() if detections.track_ids is not None else [-1] * len(detections)
+    for (x1, y1, x2, y2), confidence, class_id, track_id in zip(boxes, confidences, class_ids, track_ids):
+        class_name = names[class_id]
+        color = class_color(class_name)
+        cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(
+            img,
+            label(class_name, confidence, track_id),
+            (x1, y1 - 10),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.5,
+            color,
+            2
+        )
+    return img
+
+def render_image(source_path: str, output_path: str, detections: Detections, names: Dict[int, str]):
+    """Draw detections onto a copy of a source image"""
+    img = cv2.imread(source_path)
+    if img is None:
+        raise ValueError("Could not read image file")
+    cv2.imwrite(output_path, draw_detections(img, detections, names))
+
+def render_video(
+    source_path: str,
+    output_path: str,
+    frame_detections: List[Detections],
+    names: Dict[int, str]
+):
+    """Re-encode a source video with per-frame detections drawn on it"""
+    cap = cv2.VideoCapture(source_path)
+    if not cap.isOpened():
+        raise ValueError("Could not open video file")
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = int(cap.get(cv2.CAP_PROP_FPS))
+    out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    try:
+        index = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if index < len(frame_detections):
+                draw_detections(frame, frame_detections[index], names)
+            out.write(frame)
+            index += 1
+    finally:
+        cap.release()
+        out.release()
+    finish_video(output_path)
+
+def finish_video(path: str):
+    """
+    Rewrite an encoded .mp4 as fragmented MP4 with ffmpeg when enabled, so
+    players can start before the whole file has arrived. The OpenCV output
+    is kept if ffmpeg is missing or fails.
+    """
+    root, ext = os.path.splitext(path)
+    if not settings.VIDEO_FRAGMENTED_MP4 or ext.lower() not in (".mp4", ".m4v"):
+        return
+    ffmpeg = shutil.which(settings.FFMPEG_PATH)
+    if ffmpeg is None:
+        logger.warning("ffmpeg not found at %s, keeping %s unfragmented", settings.FFMPEG_PATH, path)
+        return
+    tmp_path = f"{root}.fragmented{ext}"
+    try:
+        subprocess.run(
+            [
+                ffmpeg, "-y", "-loglevel", "error", "-i", path,
+                *settings.FFMPEG_VIDEO_ARGS,
+                "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+                "-f", "mp4", tmp_path
+            ],
+            check=True,
+            capture_output=True,
+            timeout=settings.FFMPEG_TIMEOUT_SECONDS
+        )
+        os.replace(tmp_path, path)
+    except (OSError, subprocess.SubprocessError) as e:
+        stderr = getattr(e, "stderr", None)
+        logger.warning("Could not fragment %s: %s", path, stderr.decode(errors="replace").strip() if stderr else e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from ..core.config import settings
+from ..models.detection import DetectionResult
+
+# Deployment settings that change detection results or outputs. The disk tier
+# outlives the process, so a change to any of them must miss old entries
+RESULT_SETTINGS = (
+    "PUSH_FILTER_TO_MODEL",
+    "ROI_CROP_MARGIN",
+    "TILING_ENABLED",
+    "TILE_MIN_IMAGE_SIZE",
+    "TILE_SIZE",
+    "TILE_OVERLAP",
+    "TILE_MAX_TILES",
+    "TILE_MERGE_THRESHOLD",
+    "TILE_FULL_FRAME",
+    "TRACK_IOU_THRESHOLD",
+    "TRACK_MAX_AGE",
+    "TRACK_MIN_HITS",
+    "SCENE_CHANGE_THRESHOLD",
+    "STRIDE_AUDIT_EVERY",
+    "VIDEO_FRAGMENTED_MP4",
+    "FFMPEG_VIDEO_ARGS"
+)
+
+def make_cache_key(**parts: Any) -> str:
+    """Stable digest of the inputs that determine a detection result"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def settings_fingerprint() -> str:
+    """Digest of the current values of RESULT_SETTINGS"""
+    return make_cache_key(**{name: getattr(settings, name) for name in RESULT_SETTINGS})
+
+class ResultCache:
+    """
+    Two-tier cache of detection results keyed by content and parameters.
+
+    The memory tier is an LRU with a TTL. Every entry is also written as a
+    small JSON file next to the processed outputs, so results survive a
+    restart and are shared by all workers using the same OUTPUT_DIR. An
+    entry is only a hit while its processed output is still available, which
+    by default means the file exists.
+
+    The disk tier is swept after writes, at most once per sweep interval:
+    expired files are deleted, then the oldest ones beyond max_files.
+    """
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        directory: str,
+        is_available: Optional[Callable[[DetectionResult], bool]] = None,
+        max_files: Optional[int] = None,
+        sweep_interval_seconds: float = 0.0
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.directory = directory
+        self.is_available = is_available or self._output_exists
+        self.max_files = max_files
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._entries: "OrderedDict[str, Tuple[float, DetectionResult]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._counters = {
+            "hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "files_removed": 0
+        }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    @staticmethod
+    def _output_exists(result: DetectionResult) -> bool:
+        if result.processed_filename is None:
+            return True
+        return os.path.exists(os.path.join(settings.OUTPUT_DIR, result.processed_filename))
+
+    def _count(self, *names: str):
+        with self._lock:
+            for name in names:
+                self._counters[name] += 1
+
+    def _remember(self, key: str, expires_at: float, result: DetectionResult):
+        with self._lock:
+            self._entries[key] = (expires_at, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def _load(self, key: str) -> Optional[Tuple[float, DetectionResult]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            return entry["expires_at"], DetectionResult.model_validate(entry["result"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def get(self, key: str) -> Optional[DetectionResult]:
+        """Return the cached result or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        tier = "memory_hits"
+        if entry is None:
+            entry = self._load(key)
+            tier = "disk_hits"
+
+        if entry is None or entry[0] < now or not self.is_available(entry[1]):
+            if entry is not None:
+                self.invalidate(key)
+            self._count("misses")
+            return None
+
+        if tier == "disk_hits":
+            self._remember(key, *entry)
+        self._count("hits", tier)
+        return entry[1]
+
+    def put(self, key: str, result: DetectionResult):
+        """Store a result in both tiers"""
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, expires_at, result)
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "expires_at": expires_at,
+                "result": result.model_dump(mode="json")
+            }))
+        os.replace(tmp_path, self._path(key))
+        self.maybe_sweep()
+
+    def invalidate(self, key: str):
+        """Drop an entry from both tiers"""
+        with self._lock:
+            self._entries.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def maybe_sweep(self):
+        now = time.time()
+        if now - self._last_sweep < self.sweep_interval_seconds or not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = now
+            self.sweep(now)
+        finally:
+            self._sweep_lock.release()
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """
+        Delete expired files of the disk tier, then the oldest beyond
+        max_files, and return how many were removed. Files are dated by their
+        modification time, which put sets, so none of them has to be parsed;
+        temporary files left by an interrupted put expire the same way.
+        """
+        now = now or time.time()
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        files.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass
+        expired = [path for mtime, path in files if mtime + self.ttl_seconds < now]
+        files = sorted((mtime, path) for mtime, path in files if mtime + self.ttl_seconds >= now)
+        if self.max_files is not None and len(files) > self.max_files:
+            expired += [path for _, path in files[:len(files) - self.max_files]]
+
+        removed = 0
+        for path in expired:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._counters["files_removed"] += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters"""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "hit_rate": self._counters["hits"] / lookups if lookups else 0.0
+            }
\ No newline at end of file
@@ -0,0 +1,89 @@
+import json
+import math
+import os
+from typing import Dict, Tuple
+import numpy as np
+from ..models.detection import CameraProfile, RegionOfInterest
+from .detections import Detections
+
+class RegionOutsideFrame(ValueError):
+    """Raised when a region of interest does not overlap the frame it is applied to"""
+
+def load_camera_profiles(path: str) -> Dict[str, CameraProfile]:
+    """Read named camera profiles from a JSON object; a missing file means none"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        data = json.load(f)
+    return {name: CameraProfile.model_validate(profile) for name, profile in data.items()}
+
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Even-odd ray casting of (N, 2) points against one (M, 2) polygon, all edges at once"""
+    x = points[:, None, 0]
+    y = points[:, None, 1]
+    xi, yi = polygon[None, :, 0], polygon[None, :, 1]
+    xj, yj = np.roll(polygon[:, 0], -1)[None, :], np.roll(polygon[:, 1], -1)[None, :]
+    spans = (yi > y) != (yj > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_cross = xi + (y - yi) * (xj - xi) / (yj - yi)
+    crossings = spans & (x < x_cross)
+    return crossings.sum(axis=1) % 2 == 1
+
+class RegionMask:
+    """
+    A region of interest resolved for one frame size.
+
+    Frames are cropped to the bounds of the polygons (plus a margin) before
+    inference, and detections are shifted back and kept only when their
+    anchor point, the bottom centre where a vehicle meets the road, lies in
+    one of the polygons.
+    """
+    def __init__(self, roi: RegionOfInterest, width: int, height: int, margin: int):
+        scale = np.array([width, height] if roi.normalized else [1.0, 1.0], dtype=np.float32)
+        self.polygons = [np.asarray(polygon, dtype=np.float32) * scale for polygon in roi.polygons]
+        points = np.concatenate(self.polygons)
+        x1 = max(0, math.floor(points[:, 0].min()) - margin)
+        y1 = max(0, math.floor(points[:, 1].min()) - margin)
+        x2 = min(width, math.ceil(points[:, 0].max()) + margin)
+        y2 = min(height, math.ceil(points[:, 1].max()) + margin)
+        if x2 <= x1 or y2 <= y1:
+            raise RegionOutsideFrame(f"Region of interest is outside the {width}x{height} frame")
+        self.bounds: Tuple[int, int, int, int] = (x1, y1, x2, y2)
+        self.full_frame = self.bounds == (0, 0, width, height)
+        self._offset = np.array([x1, y1, x1, y1], dtype=np.float32)
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Width and height of the cropped input"""
+        x1, y1, x2, y2 = self.bounds
+        return x2 - x1, y2 - y1
+
+    def crop(self, img: np.ndarray) -> np.ndarray:
+        if self.full_frame:
+            return img
+        x1, y1, x2, y2 = self.bounds
+        return np.ascontiguousarray(img[y1:y2, x1:x2])
+
+    def contains(self, detections: Detections) -> np.ndarray:
+        """Rows whose anchor point is inside the region"""
+        anchors = np.stack([
+            (detections.boxes[:, 0] + detections.boxes[:, 2]) / 2,
+            detections.boxes[:, 3]
+        ], axis=1)
+        inside = np.zeros(len(detections), dtype=bool)
+        for polygon in self.polygons:
+            inside |= points_in_polygon(anchors, polygon)
+        return inside
+
+    def restore(self, detections: Detections) -> Detections:
+        """Move detections of a cropped input to frame coordinates and drop those outside the region"""
+        if len(detections) == 0:
+            return detections
+        if not self.full_frame:
+            detections = Detections(
+                boxes=detections.boxes + self._offset,
+                confidences=detections.confidences,
+                class_ids=detections.class_ids,
+                track_ids=detections.track_ids
+            )
+        return detections.select(self.contains(detections))
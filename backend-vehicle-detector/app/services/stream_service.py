@@ -0,0 +1,425 @@
+import os
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+import cv2
+import numpy as np
+from ..core.config import settings
+from ..models.detection import InferenceOptions, StreamEndMode, StreamStatus, VehicleFilter
+from .detection_service import DetectionService, detection_service
+
+class StreamLimitReached(Exception):
+    """Raised when the maximum number of live sessions is already running"""
+
+def host_allowed(host: str, patterns: Iterable[str]) -> bool:
+    """Whether a host matches an allowed name; "*.example.com" matches its subdomains"""
+    host = host.lower().rstrip(".")
+    for pattern in patterns:
+        pattern = pattern.lower().rstrip(".")
+        if host == pattern or (pattern.startswith("*.") and host.endswith(pattern[1:])):
+            return True
+    return False
+
+def resolve_source(source: str, allowed_hosts: Iterable[str] = ()) -> Tuple[str, bool]:
+    """
+    Location to open for a stream source and whether it is a local file.
+
+    URLs must use an allowed scheme and point at an allowed host, and files
+    must be inside the stream directory, so requests can neither make the
+    server connect to internal services nor open arbitrary paths on it.
+    """
+    parts = urlsplit(source)
+    scheme = parts.scheme.lower()
+    if scheme:
+        if scheme not in settings.STREAM_ALLOWED_SCHEMES:
+            raise ValueError(f"Unsupported stream scheme: {scheme}")
+        if not parts.hostname or not host_allowed(parts.hostname, allowed_hosts):
+            raise ValueError(f"Stream host is not allowed: {parts.hostname or ''}")
+        return source, False
+    directory = os.path.realpath(settings.STREAM_FILE_DIR)
+    path = os.path.realpath(os.path.join(directory, source))
+    if os.path.commonpath([directory, path]) != directory or not os.path.isfile(path):
+        raise ValueError(f"Unknown stream file: {source}")
+    return path, True
+
+def redact_source(source: str) -> str:
+    """Source URL with its password masked, for status responses"""
+    parts = urlsplit(source)
+    if not parts.password:
+        return source
+    netloc = f"{parts.username}:***@{parts.hostname}" + (f":{parts.port}" if parts.port else "")
+    return urlunsplit(parts._replace(netloc=netloc))
+
+class LatestFrame:
+    """
+    Single-slot frame buffer. A new frame replaces one that has not been
+    taken yet, so the detector always gets the newest frame and latency
+    never accumulates when it is slower than the source.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item: Optional[Tuple[np.ndarray, float]] = None
+        self.dropped = 0
+
+    def put(self, frame: np.ndarray):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = (frame, time.monotonic())
+            self._cond.notify()
+
+    def take(self, timeout: float) -> Optional[Tuple[np.ndarray, float]]:
+        """The newest frame and when it was read, or None after timeout"""
+        with self._cond:
+            if self._item is None:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+class RateMeter:
+    """Events per second over a trailing time window"""
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._started = time.monotonic()
+        self._times: Deque[float] = deque()
+
+    def _prune(self, now: float):
+        while self._times and now - self._times[0] > self.window_seconds:
+            self._times.popleft()
+
+    def add(self, now: float):
+        self._times.append(now)
+        self._prune(now)
+
+    def rate(self, now: float) -> float:
+        self._prune(now)
+        span = min(self.window_seconds, now - self._started)
+        return len(self._times) / span if span > 0 else 0.0
+
+class RollingCounts:
+    """Distinct vehicles by class, in total and within a trailing time window"""
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self.total: Counter = Counter()
+        self._events: Deque[Tuple[float, str]] = deque()
+
+    def add(self, class_name: str, now: float):
+        self.total[class_name] += 1
+        self._events.append((now, class_name))
+
+    def window(self, now: float) -> Dict[str, int]:
+        while self._events and now - self._events[0][0] > self.window_seconds:
+            self._events.popleft()
+        return dict(Counter(class_name for _, class_name in self._events))
+
+class StreamSession:
+    """
+    One live source, read and detected on two threads.
+
+    The reader thread only keeps the newest frame; the detector thread runs
+    the model on whichever frame is newest when it becomes free, tracks the
+    vehicles and keeps rolling counts of the new ones. File sources are read
+    at their nominal frame rate so they behave like a camera.
+    """
+    def __init__(
+        self,
+        source: str,
+        location: str,
+        is_file: bool,
+        service: DetectionService,
+        filter: VehicleFilter,
+        inference: InferenceOptions,
+        on_end: StreamEndMode
+    ):
+        self.stream_id = str(uuid.uuid4())
+        self.source = redact_source(source)
+        self.is_file = is_file
+        self._location = location
+        self._service = service
+        self._filter = filter
+        self._inference = inference
+        self._on_end = on_end
+        self.state = "connecting"  # connecting, running, ended, stopped or failed
+        self.error: Optional[str] = None
+        self.started_at = datetime.utcnow()
+        self.stopped_at: Optional[datetime] = None
+        self.width: Optional[int] = None
+        self.height: Optional[int] = None
+        self.imgsz: Optional[int] = None
+        self.nominal_fps: Optional[float] = None
+        self.frames_received = 0
+        self.frames_processed = 0
+        self.latency_ms: Optional[float] = None
+        self.reconnects = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._source_done = threading.Event()
+        self._frames = LatestFrame()
+        self._received = RateMeter(settings.STREAM_RATE_WINDOW_SECONDS)
+        self._processed = RateMeter(settings.STREAM_RATE_WINDOW_SECONDS)
+        self._counts = RollingCounts(settings.STREAM_WINDOW_SECONDS)
+        self._current_counts: Dict[str, int] = {}
+        name = self.stream_id[:8]
+        self._reader = threading.Thread(target=self._read, name=f"stream-read-{name}", daemon=True)
+        self._detector = threading.Thread(target=self._detect, name=f"stream-detect-{name}", daemon=True)
+
+    @property
+    def active(self) -> bool:
+        return self.state in ("connecting", "running")
+
+    @property
+    def frames_dropped(self) -> int:
+        return self._frames.dropped
+
+    def start(self):
+        self._reader.start()
+        self._detector.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop reading and detecting; a reader blocked on the network exits at its read timeout"""
+        self._finish("stopped")
+        self._stop.set()
+        self._reader.join(timeout)
+        self._detector.join(timeout)
+
+    def _finish(self, state: str, error: Optional[str] = None):
+        with self._lock:
+            if self.active:
+                self.state = state
+                self.error = error
+                self.stopped_at = datetime.utcnow()
+
+    def _open(self) -> Optional[cv2.VideoCapture]:
+        cap = cv2.VideoCapture(self._location, cv2.CAP_ANY, [
+            cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, int(settings.STREAM_OPEN_TIMEOUT_SECONDS * 1000),
+            cv2.CAP_PROP_READ_TIMEOUT_MSEC, int(settings.STREAM_READ_TIMEOUT_SECONDS * 1000)
+        ])
+        if not cap.isOpened():
+            cap.release()
+            return None
+        return cap
+
+    def _read(self):
+        """Reader thread: open the source, reconnecting or rewinding as needed"""
+        failures = 0
+        position = 0  # Frames of a file source already read
+        try:
+            while not self._stop.is_set():
+                cap = self._open()
+                read = 0
+                if cap is not None:
+                    try:
+                        if position:
+                            cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+                        read = self._read_frames(cap)
+                    finally:
+                        cap.release()
+                if self._stop.is_set():
+                    break
+                if self.is_file and cap is not None:
+                    position += read
+                    if self._on_end is StreamEndMode.FOLLOW:
+                        self._stop.wait(settings.STREAM_FOLLOW_POLL_SECONDS)
+                        continue
+                    if self._on_end is StreamEndMode.LOOP and read:
+                        position = 0
+                        continue
+                    break
+                # The source could not be opened or stopped sending frames
+                failures = 0 if read else failures + 1
+                if failures > settings.STREAM_RECONNECT_ATTEMPTS:
+                    raise RuntimeError("Could not read from the stream source")
+                with self._lock:
+                    self.reconnects += 1
+                self._stop.wait(settings.STREAM_RECONNECT_DELAY_SECONDS)
+        except Exception as e:
+            self._finish("failed", str(e))
+        finally:
+            self._source_done.set()
+
+    def _read_frames(self, cap: cv2.VideoCapture) -> int:
+        """Read frames into the slot until the source ends or the session stops"""
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        with self._lock:
+            if self.state == "connecting":
+                self.state = "running"
+            if fps > 0:
+                self.nominal_fps = fps
+        # Files would otherwise be read as fast as they decode
+        interval = 1.0 / fps if self.is_file and fps > 0 else 0.0
+        next_due = time.monotonic()
+        read = 0
+        while not self._stop.is_set():
+            ok, frame = cap.read()
+            if not ok:
+                break
+            read += 1
+            self._frames.put(frame)
+            now = time.monotonic()
+            with self._lock:
+                self.frames_received += 1
+                self._received.add(now)
+            if interval:
+                next_due = max(next_due + interval, now)
+                self._stop.wait(max(0.0, next_due - now))
+        return read
+
+    def _detect(self):
+        """Detector thread: detect and track the newest frame whenever the model is free"""
+        names = self._service.names
+        tracker = self._service.create_tracker(keep_finished=False)
+        detect = None
+        size = None
+        counted_id = 0  # Track IDs are sequential, so higher ones are new vehicles
+        try:
+            while not self._stop.is_set():
+                item = self._frames.take(timeout=0.5)
+                if item is None:
+                    if self._source_done.is_set():
+                        break
+                    continue
+                frame, read_at = item
+                height, width = frame.shape[:2]
+                if (width, height) != size:
+                    size = (width, height)
+                    detect, imgsz = self._service.frame_detector(width, height, self._filter, self._inference)
+                    with self._lock:
+                        self.width, self.height, self.imgsz = width, height, imgsz
+
+                detections = tracker.update(self.frames_processed, detect(frame))
+                new = detections.track_ids > counted_id
+                class_ids = detections.class_ids.tolist()
+                now = time.monotonic()
+                with self._lock:
+                    for class_id in detections.class_ids[new].tolist():
+                        self._counts.add(names[class_id], now)
+                    if new.any():
+                        counted_id = int(detections.track_ids.max())
+                    self._current_counts = dict(Counter(names[class_id] for class_id in class_ids))
+                    self.frames_processed += 1
+                    self._processed.add(now)
+                    self.latency_ms = (now - read_at) * 1000.0
+        except Exception as e:
+            self._finish("failed", str(e))
+            self._stop.set()
+        else:
+            self._finish("ended")
+
+    def status(self) -> StreamStatus:
+        with self._lock:
+            now = time.monotonic()
+            return StreamStatus(
+                stream_id=self.stream_id,
+                source=self.source,
+                state=self.state,
+                error=self.error,
+                started_at=self.started_at,
+                stopped_at=self.stopped_at,
+                width=self.width,
+                height=self.height,
+                imgsz=self.imgsz,
+                nominal_fps=self.nominal_fps,
+                source_fps=round(self._received.rate(now), 2),
+                achieved_fps=round(self._processed.rate(now), 2),
+                frames_received=self.frames_received,
+                frames_processed=self.frames_processed,
+                frames_dropped=self.frames_dropped,
+                latency_ms=round(self.latency_ms, 1) if self.latency_ms is not None else None,
+                reconnects=self.reconnects,
+                window_seconds=self._counts.window_seconds,
+                current_counts=self._current_counts,
+                window_counts=self._counts.window(now),
+                total_counts=dict(self._counts.total)
+            )
+
+class StreamManager:
+    """
+    Starts, lists and stops the live sessions of this process. Sessions run
+    in the API process, so with several API processes each has its own.
+    """
+    def __init__(self, service: DetectionService, max_sessions: int, keep_finished: int):
+        self.service = service
+        self.max_sessions = max_sessions
+        self.keep_finished = keep_finished
+        self._sessions: Dict[str, StreamSession] = {}
+        self._lock = threading.Lock()
+
+    def start(
+        self,
+        source: str,
+        filter: Optional[VehicleFilter] = None,
+        inference: Optional[InferenceOptions] = None,
+        on_end: StreamEndMode = StreamEndMode.STOP
+    ) -> StreamSession:
+        """Start a session; raises ValueError for a bad source and StreamLimitReached when full"""
+        location, is_file = resolve_source(source, self.allowed_hosts())
+        with self._lock:
+            self._prune()
+            if sum(session.active for session in self._sessions.values()) >= self.max_sessions:
+                raise StreamLimitReached(f"{self.max_sessions} stream sessions are already running")
+            session = StreamSession(
+                source,
+                location,
+                is_file,
+                self.service,
+                filter or VehicleFilter(),
+                inference or InferenceOptions(),
+                on_end
+            )
+            self._sessions[session.stream_id] = session
+        session.start()
+        return session
+
+    def allowed_hosts(self) -> List[str]:
+        """Hosts of STREAM_ALLOWED_HOSTS and of the configured camera profiles"""
+        profile_hosts = [
+            urlsplit(profile.stream_url).hostname
+            for profile in self.service.camera_profiles.values()
+            if profile.stream_url
+        ]
+        return list(settings.STREAM_ALLOWED_HOSTS) + [host for host in profile_hosts if host]
+
+    def _prune(self):
+        """Forget the oldest ended sessions beyond keep_finished"""
+        finished = [stream_id for stream_id, session in self._sessions.items() if not session.active]
+        for stream_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._sessions[stream_id]
+
+    def get(self, stream_id: str) -> Optional[StreamSession]:
+        with self._lock:
+            return self._sessions.get(stream_id)
+
+    def list(self) -> List[StreamSession]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def stop(self, stream_id: str) -> Optional[StreamSession]:
+        session = self.get(stream_id)
+        if session:
+            session.stop()
+        return session
+
+    def stop_all(self):
+        for session in self.list():
+            if session.active:
+                session.stop()
+
+    def stats(self) -> Dict[str, int]:
+        sessions = self.list()
+        return {
+            "max_sessions": self.max_sessions,
+            "active": sum(session.active for session in sessions),
+            "frames_processed": sum(session.frames_processed for session in sessions),
+            "frames_dropped": sum(session.frames_dropped for session in sessions)
+        }
+
+# Create singleton instance
+stream_manager = StreamManager(
+    detection_service,
+    max_sessions=settings.STREAM_MAX_SESSIONS,
+    keep_finished=settings.STREAM_KEEP_FINISHED
+)
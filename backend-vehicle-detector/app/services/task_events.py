@@ -0,0 +1,97 @@
+import asyncio
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Events after which a task does not change any more
+FINAL_EVENTS = ("completed", "failed")
+
+@dataclass
+class TaskEvent:
+    """One pushed update of a task"""
+    event: str  # "status", "frames", "completed" or "failed"
+    data: Dict[str, Any]
+    updated_at: Optional[datetime] = None  # Task update the event reflects, None for frame events
+
+    @property
+    def final(self) -> bool:
+        return self.event in FINAL_EVENTS
+
+class Subscription:
+    """
+    Events of one task for one client, buffered on the client's event loop.
+    When the client falls behind the oldest events are dropped; status
+    events carry the whole task, so a later one replaces any it missed.
+    """
+    def __init__(self, task_id: str, max_queue: int):
+        self.task_id = task_id
+        self.dropped = 0
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+
+    def _put(self, event: TaskEvent):
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> Optional[TaskEvent]:
+        """The next event, or None if there was none within timeout"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class TaskEventBus:
+    """
+    Publish/subscribe of task events within one process.
+
+    Detection threads publish and subscribers receive the events on their
+    event loop. Publishers check has_subscribers first so events nobody
+    listens to are never built.
+    """
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self._subscriptions: Dict[str, List[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, task_id: str) -> Subscription:
+        """Subscribe to a task; must be called on the subscriber's event loop"""
+        subscription = Subscription(task_id, self.max_queue)
+        with self._lock:
+            self._subscriptions.setdefault(task_id, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.task_id, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.task_id, None)
+
+    def has_subscribers(self, task_id: str) -> bool:
+        return task_id in self._subscriptions
+
+    def publish(self, task_id: str, event: TaskEvent):
+        """Hand an event to every subscriber of the task; safe to call from any thread"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(task_id, ()))
+            if subscriptions:
+                self.published += 1
+        for subscription in subscriptions:
+            try:
+                subscription._loop.call_soon_threadsafe(subscription._put, event)
+            except RuntimeError:
+                # The subscriber's event loop has closed
+                self.unsubscribe(subscription)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "tasks": len(self._subscriptions),
+                "subscribers": sum(len(subscriptions) for subscriptions in self._subscriptions.values()),
+                "published": self.published
+            }
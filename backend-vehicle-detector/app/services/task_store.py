@@ -0,0 +1,232 @@
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from ..core.config import settings
+from ..models.detection import DetectionTask
+
+# Tasks in these states never change again, so cached copies stay valid
+TERMINAL_STATUSES = ("completed", "failed")
+
+def _epoch(value: datetime) -> float:
+    """UNIX time of a task timestamp (naive values are UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+class TaskStore(ABC):
+    """Storage of detection tasks shared by the API and the inference workers"""
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[DetectionTask]:
+        """Return the task or None"""
+
+    @abstractmethod
+    def save(self, task: DetectionTask):
+        """Insert or update a task"""
+
+    @abstractmethod
+    def delete(self, task_id: str):
+        """Forget a task"""
+
+    @abstractmethod
+    def expired(self, older_than: float, limit: int) -> List[DetectionTask]:
+        """Finished tasks last updated before the given UNIX time, oldest first"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored tasks"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, "tasks": self.count()}
+
+class MemoryTaskStore(TaskStore):
+    """Process-local store, for development and single-worker deployments"""
+    def __init__(self):
+        self._tasks: Dict[str, DetectionTask] = {}
+        self._lock = threading.Lock()
+
+    def get(self, task_id: str) -> Optional[DetectionTask]:
+        return self._tasks.get(task_id)
+
+    def save(self, task: DetectionTask):
+        with self._lock:
+            self._tasks[task.task_id] = task
+
+    def delete(self, task_id: str):
+        with self._lock:
+            self._tasks.pop(task_id, None)
+
+    def expired(self, older_than: float, limit: int) -> List[DetectionTask]:
+        with self._lock:
+            tasks = [
+                task for task in self._tasks.values()
+                if task.status in TERMINAL_STATUSES and _epoch(task.updated_at) < older_than
+            ]
+        return sorted(tasks, key=lambda task: task.updated_at)[:limit]
+
+    def count(self) -> int:
+        return len(self._tasks)
+
+class SQLiteTaskStore(TaskStore):
+    """
+    Tasks persisted in a local SQLite file with a small in-process LRU.
+
+    The file survives restarts and is shared by every uvicorn worker on the
+    host, so /status and /result work no matter which worker answers. Only
+    finished tasks are served from the LRU; running tasks are always read
+    from the database because another worker may be updating them.
+    """
+    def __init__(self, path: str, cache_size: int):
+        self.path = path
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, DetectionTask]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._local = threading.local()
+        self._counters = {"cache_hits": 0, "db_reads": 0, "db_writes": 0}
+        with self._connection() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    task_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status);
+                CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at);
+                CREATE INDEX IF NOT EXISTS idx_tasks_status_updated_at ON tasks (status, updated_at);
+            """)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers run during writes"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, task: DetectionTask):
+        with self._cache_lock:
+            if task.status not in TERMINAL_STATUSES:
+                self._cache.pop(task.task_id, None)
+                return
+            self._cache[task.task_id] = task
+            self._cache.move_to_end(task.task_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def get(self, task_id: str) -> Optional[DetectionTask]:
+        with self._cache_lock:
+            task = self._cache.get(task_id)
+            if task is not None:
+                self._cache.move_to_end(task_id)
+                self._counters["cache_hits"] += 1
+                return task
+            self._counters["db_reads"] += 1
+        row = self._connection().execute(
+            "SELECT data FROM tasks WHERE task_id = ?", (task_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        task = DetectionTask.model_validate_json(row[0])
+        self._remember(task)
+        return task
+
+    def save(self, task: DetectionTask):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tasks (task_id, status, created_at, updated_at, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    task.task_id,
+                    task.status,
+                    _epoch(task.created_at),
+                    _epoch(task.updated_at),
+                    task.model_dump_json()
+                )
+            )
+        with self._cache_lock:
+            self._counters["db_writes"] += 1
+        self._remember(task)
+
+    def delete(self, task_id: str):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+        with self._cache_lock:
+            self._cache.pop(task_id, None)
+
+    def expired(self, older_than: float, limit: int) -> List[DetectionTask]:
+        placeholders = ", ".join("?" for _ in TERMINAL_STATUSES)
+        rows = self._connection().execute(
+            f"SELECT data FROM tasks WHERE status IN ({placeholders}) AND updated_at < ? "
+            "ORDER BY updated_at LIMIT ?",
+            (*TERMINAL_STATUSES, older_than, limit)
+        ).fetchall()
+        return [DetectionTask.model_validate_json(row[0]) for row in rows]
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cache_lock:
+            counters = dict(self._counters, cached=len(self._cache))
+        return {**super().stats(), **counters}
+
+def create_task_store() -> TaskStore:
+    """Task store selected by TASK_STORE_BACKEND"""
+    if settings.TASK_STORE_BACKEND == "memory":
+        return MemoryTaskStore()
+    if settings.TASK_STORE_BACKEND == "sqlite":
+        os.makedirs(os.path.dirname(settings.TASK_DB_PATH) or ".", exist_ok=True)
+        return SQLiteTaskStore(settings.TASK_DB_PATH, settings.TASK_CACHE_SIZE)
+    raise ValueError(f"Unknown task store backend: {settings.TASK_STORE_BACKEND}")
+
+class TaskEvictor:
+    """
+    Drops finished tasks older than the TTL together with their files.
+
+    Sweeps are triggered opportunistically (at most once per interval) so
+    no extra thread is needed, and each sweep deletes a bounded batch.
+    """
+    def __init__(
+        self,
+        store: TaskStore,
+        ttl_seconds: float,
+        interval_seconds: float,
+        on_evict: Callable[[DetectionTask], None],
+        batch_size: int = 500
+    ):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.interval_seconds = interval_seconds
+        self.on_evict = on_evict
+        self.batch_size = batch_size
+        self.evicted = 0
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def maybe_sweep(self):
+        now = time.time()
+        if now - self._last_sweep < self.interval_seconds or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = now
+            self.sweep(now)
+        finally:
+            self._lock.release()
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Evict one batch of expired tasks and return how many were removed"""
+        now = now or time.time()
+        tasks = self.store.expired(now - self.ttl_seconds, self.batch_size)
+        for task in tasks:
+            self.on_evict(task)
+            self.store.delete(task.task_id)
+        self.evicted += len(tasks)
+        return len(tasks)
\ No newline at end of file
@@ -0,0 +1,74 @@
+from typing import List, Sequence, Tuple
+import numpy as np
+from .detections import Detections
+
+# Pixel window of a tile: x1, y1, x2, y2
+Tile = Tuple[int, int, int, int]
+
+def _starts(length: int, tile_size: int, step: int) -> List[int]:
+    if length <= tile_size:
+        return [0]
+    # The last tile is aligned to the edge instead of running past it
+    return list(range(0, length - tile_size, step)) + [length - tile_size]
+
+def tile_grid(width: int, height: int, tile_size: int, overlap: float, max_tiles: int) -> List[Tile]:
+    """
+    Overlapping tiles covering an image.
+
+    Neighbouring tiles share `overlap` of their size so a vehicle cut by one
+    tile border is whole in the next tile. When more than max_tiles would be
+    needed the tiles grow until the grid fits.
+    """
+    while True:
+        step = max(1, int(tile_size * (1.0 - overlap)))
+        xs = _starts(width, tile_size, step)
+        ys = _starts(height, tile_size, step)
+        if len(xs) * len(ys) <= max_tiles:
+            break
+        tile_size = int(tile_size * 1.25)
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in ys for x in xs
+    ]
+
+def suppress(detections: Detections, threshold: float) -> np.ndarray:
+    """
+    Class-aware NMS over boxes from overlapping tiles; returns kept row indices.
+
+    Overlap is intersection over the smaller box, so the truncated copy of a
+    vehicle cut by a tile border is suppressed by its whole copy from the
+    neighbouring tile even though their IoU is low.
+    """
+    order = np.argsort(-detections.confidences, kind="stable")
+    boxes = detections.boxes[order]
+    class_ids = detections.class_ids[order]
+    areas = np.maximum(boxes[:, 2] - boxes[:, 0], 0) * np.maximum(boxes[:, 3] - boxes[:, 1], 0)
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(order[i])
+        rest = np.flatnonzero(~suppressed[i + 1:] & (class_ids[i + 1:] == class_ids[i])) + i + 1
+        if len(rest) == 0:
+            continue
+        w = np.minimum(boxes[i, 2], boxes[rest, 2]) - np.maximum(boxes[i, 0], boxes[rest, 0])
+        h = np.minimum(boxes[i, 3], boxes[rest, 3]) - np.maximum(boxes[i, 1], boxes[rest, 1])
+        inter = np.clip(w, 0, None) * np.clip(h, 0, None)
+        smaller = np.maximum(np.minimum(areas[i], areas[rest]), 1e-9)
+        suppressed[rest[inter / smaller >= threshold]] = True
+    return np.asarray(keep, dtype=np.int64)
+
+def merge_tiles(parts: Sequence[Detections], tiles: Sequence[Tile], threshold: float) -> Detections:
+    """Shift tile detections into image coordinates and merge duplicates"""
+    shifted = []
+    for detections, (x, y, _, _) in zip(parts, tiles):
+        if len(detections):
+            offset = np.array([x, y, x, y], dtype=np.float32)
+            shifted.append(Detections(
+                boxes=detections.boxes + offset,
+                confidences=detections.confidences,
+                class_ids=detections.class_ids
+            ))
+    merged = Detections.concat(shifted)
+    return merged.select(np.sort(suppress(merged, threshold)))
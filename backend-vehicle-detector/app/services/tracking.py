@@ -0,0 +1,137 @@
+from typing import Dict, List, Optional
+import numpy as np
+from ..models.detection import BoundingBox, TrackSummary
+from .detections import Detections
+from .interpolation import match_detections
+
+class _Track:
+    """State of one tracked object"""
+    def __init__(self, box: np.ndarray, confidence: float, class_id: int, frame_index: int):
+        self.track_id: Optional[int] = None
+        self.class_id = class_id
+        self.box = box
+        self.first_frame = frame_index
+        self.last_frame = frame_index
+        self.best_box = box
+        self.best_confidence = confidence
+        self.best_frame = frame_index
+        self.hits = 1
+
+    def update(self, box: np.ndarray, confidence: float, frame_index: int):
+        self.box = box
+        self.last_frame = frame_index
+        self.hits += 1
+        if confidence > self.best_confidence:
+            self.best_box = box
+            self.best_confidence = confidence
+            self.best_frame = frame_index
+
+    def summary(self, names: Dict[int, str]) -> TrackSummary:
+        x1, y1, x2, y2 = self.best_box.tolist()
+        return TrackSummary(
+            track_id=self.track_id,
+            class_id=self.class_id,
+            class_name=names[self.class_id],
+            first_frame=self.first_frame,
+            last_frame=self.last_frame,
+            best_frame=self.best_frame,
+            best_confidence=self.best_confidence,
+            best_box=BoundingBox(
+                x1=x1,
+                y1=y1,
+                x2=x2,
+                y2=y2,
+                confidence=self.best_confidence,
+                class_id=self.class_id,
+                class_name=names[self.class_id],
+                track_id=self.track_id
+            )
+        )
+
+class IoUTracker:
+    """
+    CPU-only multi-object tracker that links detections across frames.
+
+    Detections are greedily matched to live tracks of the same class by IoU
+    against the track's last box. Tracks unseen for more than max_age frames
+    are closed, and a track only gets an ID (and counts as a vehicle) once it
+    has been matched on min_hits frames, which suppresses one-frame noise.
+    Live streams set keep_finished=False so closed tracks do not pile up.
+    """
+    def __init__(
+        self,
+        names: Dict[int, str],
+        iou_threshold: float = 0.3,
+        max_age: int = 30,
+        min_hits: int = 3,
+        keep_finished: bool = True
+    ):
+        self.names = names
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.keep_finished = keep_finished
+        self._active: List[_Track] = []
+        self._finished: List[_Track] = []
+        self._next_id = 1
+
+    def update(self, frame_index: int, detections: Detections) -> Detections:
+        """Associate one frame's detections with tracks; returns them with track IDs"""
+        # Close tracks that have not been seen for too long
+        alive = []
+        for track in self._active:
+            if frame_index - track.last_frame > self.max_age:
+                if self.keep_finished:
+                    self._finished.append(track)
+            else:
+                alive.append(track)
+        self._active = alive
+
+        live = Detections(
+            boxes=np.array([track.box for track in self._active], dtype=np.float32).reshape(-1, 4),
+            confidences=np.zeros(len(self._active), dtype=np.float32),
+            class_ids=np.array([track.class_id for track in self._active], dtype=np.int32)
+        )
+        matched_tracks, matched_detections, _, _, unmatched = match_detections(
+            live, detections, self.iou_threshold
+        )
+
+        assigned: List[Optional[_Track]] = [None] * len(detections)
+        for t, d in zip(matched_tracks.tolist(), matched_detections.tolist()):
+            track = self._active[t]
+            track.update(detections.boxes[d], float(detections.confidences[d]), frame_index)
+            assigned[d] = track
+        for d in unmatched.tolist():
+            track = _Track(
+                detections.boxes[d],
+                float(detections.confidences[d]),
+                int(detections.class_ids[d]),
+                frame_index
+            )
+            self._active.append(track)
+            assigned[d] = track
+
+        track_ids = np.full(len(detections), -1, dtype=np.int32)
+        for d, track in enumerate(assigned):
+            if track.track_id is None and track.hits >= self.min_hits:
+                track.track_id = self._next_id
+                self._next_id += 1
+            if track.track_id is not None:
+                track_ids[d] = track.track_id
+        return Detections(
+            boxes=detections.boxes,
+            confidences=detections.confidences,
+            class_ids=detections.class_ids,
+            track_ids=track_ids
+        )
+
+    def summaries(self) -> List[TrackSummary]:
+        """Summaries of all confirmed tracks, ordered by ID"""
+        tracks = [
+            track for track in self._finished + self._active
+            if track.track_id is not None
+        ]
+        return [
+            track.summary(self.names)
+            for track in sorted(tracks, key=lambda track: track.track_id)
+        ]
\ No newline at end of file
@@ -0,0 +1,94 @@
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+import aiofiles
+from fastapi import UploadFile
+from ..core.config import settings
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured size limit"""
+
+def _check_declared_size(file: UploadFile, max_size: int):
+    if file.size is not None and file.size > max_size:
+        raise UploadTooLarge(f"File exceeds the {max_size} byte upload limit")
+
+@dataclass
+class StoredUpload:
+    """An upload written to the upload directory"""
+    path: str
+    filename: str
+    size: int
+    sha256: str
+
+@dataclass
+class BufferedUpload:
+    """An upload held in memory"""
+    data: bytes
+    filename: str
+    size: int
+    sha256: str
+
+def safe_filename(filename: str) -> str:
+    """Strip any directory components from a client supplied filename"""
+    return Path(filename or "upload").name or "upload"
+
+async def save_upload(
+    file: UploadFile,
+    max_size: int,
+    directory: str = settings.UPLOAD_DIR
+) -> StoredUpload:
+    """
+    Stream an upload to a uniquely named file in chunks.
+
+    The size limit is enforced while reading, so memory use is bounded by
+    UPLOAD_CHUNK_SIZE and oversized uploads are rejected as soon as the
+    limit is crossed. The SHA-256 of the content is computed on the fly.
+    """
+    filename = safe_filename(file.filename)
+    _check_declared_size(file, max_size)
+
+    path = os.path.join(directory, f"{uuid.uuid4().hex}_{filename}")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(path, "wb") as buffer:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(f"File exceeds the {max_size} byte upload limit")
+                digest.update(chunk)
+                await buffer.write(chunk)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    return StoredUpload(path=path, filename=filename, size=size, sha256=digest.hexdigest())
+
+async def read_upload(file: UploadFile, max_size: int) -> BufferedUpload:
+    """
+    Read a small upload into memory in chunks.
+
+    Used for images, which are decoded straight from these bytes instead of
+    being written to disk and read back. The same size limit applies.
+    """
+    filename = safe_filename(file.filename)
+    _check_declared_size(file, max_size)
+
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if len(buffer) + len(chunk) > max_size:
+            raise UploadTooLarge(f"File exceeds the {max_size} byte upload limit")
+        digest.update(chunk)
+        buffer += chunk
+
+    return BufferedUpload(data=bytes(buffer), filename=filename, size=len(buffer), sha256=digest.hexdigest())
\ No newline at end of file
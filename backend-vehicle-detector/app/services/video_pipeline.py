@@ -0,0 +1,297 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+from .detections import Detections
+from .interpolation import KeyframeScheduler, StrideAccuracy
+
+# Marks the end of the stream on every stage queue
+_END = object()
+
+class StageStats:
+    """Busy time and item count of one pipeline stage"""
+    def __init__(self, name: str):
+        self.name = name
+        self.busy_seconds = 0.0
+        self.items = 0
+
+    def record(self, started: float, items: int = 1):
+        self.busy_seconds += time.perf_counter() - started
+        self.items += items
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "busy_seconds": self.busy_seconds,
+            "items": self.items,
+            "ms_per_item": self.busy_seconds / self.items * 1000.0 if self.items else 0.0
+        }
+
+class PipelineMetrics:
+    """Cumulative stage timings across all pipeline runs"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self.runs = 0
+
+    def add(self, stages: List[StageStats]):
+        with self._lock:
+            self.runs += 1
+            for stage in stages:
+                total = self._totals.setdefault(stage.name, {"busy_seconds": 0.0, "items": 0})
+                total["busy_seconds"] += stage.busy_seconds
+                total["items"] += stage.items
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "stages": {
+                    name: {
+                        **total,
+                        "ms_per_item": total["busy_seconds"] / total["items"] * 1000.0 if total["items"] else 0.0
+                    }
+                    for name, total in self._totals.items()
+                }
+            }
+
+class VideoPipeline:
+    """
+    Streams a video through decode -> infer -> annotate -> encode stages.
+
+    Decode, annotate and encode run on their own threads and the inference
+    stage runs on the calling thread, so codec work overlaps with the model.
+    Stages are connected by bounded queues, which keeps memory flat and
+    preserves frame order.
+    
+    With a keyframe scheduler only keyframes go through the model; boxes of
+    the frames in between are interpolated from the surrounding keyframes.
+    An optional tracker sees every frame in order before it is annotated.
+    """
+    def __init__(
+        self,
+        detect_batch: Callable[[List[np.ndarray]], List[Detections]],
+        annotate: Callable[[np.ndarray, Detections], np.ndarray],
+        batch_size: int = 1,
+        queue_size: int = 16,
+        on_progress: Optional[Callable[[int], None]] = None,
+        scheduler: Optional[KeyframeScheduler] = None,
+        interpolate: Optional[Callable[[Detections, Detections, float], Detections]] = None,
+        accuracy: Optional[StrideAccuracy] = None,
+        audit_every: int = 10,
+        track: Optional[Callable[[int, Detections], Detections]] = None
+    ):
+        self.detect_batch = detect_batch
+        self.annotate = annotate
+        self.batch_size = max(1, batch_size)
+        self.queue_size = queue_size
+        self.on_progress = on_progress
+        self.scheduler = scheduler
+        self.interpolate = interpolate
+        self.accuracy = accuracy
+        self.audit_every = max(1, audit_every)
+        self.track = track
+        self.frames = 0
+        self.keyframes = 0
+        self.interpolated_frames = 0
+        self.stages = {
+            name: StageStats(name) for name in ("decode", "infer", "annotate", "encode")
+        }
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def _put(self, q: queue.Queue, item: Any) -> bool:
+        """Put unless the pipeline was aborted"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue) -> Any:
+        """Get unless the pipeline was aborted"""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _fail(self, error: BaseException):
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _decode(self, cap: cv2.VideoCapture, out_q: queue.Queue):
+        try:
+            index = 0
+            while True:
+                started = time.perf_counter()
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                self.stages["decode"].record(started)
+                if not self._put(out_q, (index, frame)):
+                    return
+                index += 1
+            self._put(out_q, _END)
+        except BaseException as e:
+            self._fail(e)
+
+    def _annotate(self, in_q: queue.Queue, out_q: queue.Queue):
+        try:
+            while True:
+                item = self._get(in_q)
+                if item is _END:
+                    break
+                index, frame, detections = item
+                started = time.perf_counter()
+                frame = self.annotate(frame, detections)
+                self.stages["annotate"].record(started)
+                if not self._put(out_q, (index, frame)):
+                    return
+            self._put(out_q, _END)
+        except BaseException as e:
+            self._fail(e)
+
+    def _encode(self, writer: cv2.VideoWriter, in_q: queue.Queue):
+        try:
+            while True:
+                item = self._get(in_q)
+                if item is _END:
+                    break
+                index, frame = item
+                started = time.perf_counter()
+                writer.write(frame)
+                self.stages["encode"].record(started)
+                if self.on_progress:
+                    self.on_progress(index + 1)
+        except BaseException as e:
+            self._fail(e)
+
+    def _drain(self, in_q: queue.Queue):
+        """Consume inferred frames when no output video is written"""
+        try:
+            while True:
+                item = self._get(in_q)
+                if item is _END:
+                    break
+                if self.on_progress:
+                    self.on_progress(item[0] + 1)
+        except BaseException as e:
+            self._fail(e)
+
+    def _infer(self, in_q: queue.Queue, out_q: queue.Queue):
+        pending: List[Tuple[int, np.ndarray, bool]] = []
+        previous: Optional[Tuple[int, Detections]] = None
+        done = False
+        while not done and not self._stop.is_set():
+            item = self._get(in_q)
+            if item is _END:
+                done = True
+                # The last frame closes the final interpolation gap
+                if pending and not pending[-1][2]:
+                    pending[-1] = (pending[-1][0], pending[-1][1], True)
+            else:
+                index, frame = item
+                is_keyframe = self.scheduler.is_keyframe(frame) if self.scheduler else True
+                pending.append((index, frame, is_keyframe))
+
+            # Flush once the pending frames end on a keyframe and the batch is
+            # full or the decoder has nothing else ready yet
+            if not pending:
+                continue
+            keyframes = sum(1 for _, _, is_keyframe in pending if is_keyframe)
+            if not done and not (pending[-1][2] and (keyframes >= self.batch_size or in_q.empty())):
+                continue
+            previous = self._flush(pending, previous, out_q)
+            if previous is None:
+                return
+            pending = []
+        self._put(out_q, _END)
+
+    def _flush(
+        self,
+        segment: List[Tuple[int, np.ndarray, bool]],
+        previous: Optional[Tuple[int, Detections]],
+        out_q: queue.Queue
+    ) -> Optional[Tuple[int, Detections]]:
+        """Detect the keyframes of a segment, interpolate the rest and emit in order"""
+        keyframes = [(index, frame) for index, frame, is_keyframe in segment if is_keyframe]
+        audited = []
+        if self.accuracy is not None:
+            for index, frame, is_keyframe in segment:
+                if not is_keyframe:
+                    if self.interpolated_frames % self.audit_every == 0:
+                        audited.append((index, frame))
+                    self.interpolated_frames += 1
+        else:
+            self.interpolated_frames += len(segment) - len(keyframes)
+        self.keyframes += len(keyframes)
+
+        started = time.perf_counter()
+        detections = self.detect_batch([frame for _, frame in keyframes + audited])
+        self.stages["infer"].record(started, len(keyframes) + len(audited))
+        detected = {index: dets for (index, _), dets in zip(keyframes + audited, detections)}
+
+        key_indices = [index for index, _ in keyframes]
+        next_key = 0
+        for index, frame, is_keyframe in segment:
+            if is_keyframe:
+                frame_detections = detected[index]
+                previous = (index, frame_detections)
+                next_key += 1
+            else:
+                end_index = key_indices[next_key]
+                t = (index - previous[0]) / (end_index - previous[0])
+                frame_detections = self.interpolate(previous[1], detected[end_index], t)
+                if index in detected:
+                    self.accuracy.add(frame_detections, detected[index])
+            if self.track:
+                frame_detections = self.track(index, frame_detections)
+            self.frames += 1
+            if not self._put(out_q, (index, frame, frame_detections)):
+                return None
+        return previous
+
+    def run(self, cap: cv2.VideoCapture, writer: Optional[cv2.VideoWriter]) -> int:
+        """
+        Process the whole video and return the number of frames. Detections
+        are only handed to the track callback, so memory does not grow with
+        the length of the video. Without a writer the annotate and encode
+        stages are skipped.
+        """
+        decoded: queue.Queue = queue.Queue(self.queue_size)
+        inferred: queue.Queue = queue.Queue(self.queue_size)
+        annotated: queue.Queue = queue.Queue(self.queue_size)
+        threads = [
+            threading.Thread(target=self._decode, args=(cap, decoded), name="video-decode", daemon=True)
+        ]
+        if writer is not None:
+            threads += [
+                threading.Thread(target=self._annotate, args=(inferred, annotated), name="video-annotate", daemon=True),
+                threading.Thread(target=self._encode, args=(writer, annotated), name="video-encode", daemon=True)
+            ]
+        else:
+            threads.append(threading.Thread(target=self._drain, args=(inferred,), name="video-drain", daemon=True))
+        for thread in threads:
+            thread.start()
+
+        try:
+            self._infer(decoded, inferred)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            for thread in threads:
+                thread.join()
+
+        if self._error is not None:
+            raise self._error
+        return self.frames
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage timing counters of this run"""
+        return {name: stage.to_dict() for name, stage in self.stages.items()}
\ No newline at end of file
@@ -0,0 +1,35 @@
+import argparse
+import json
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inference throughput of the model backends")
+    parser.add_argument("--backends", nargs="+", default=["pytorch", "onnx", "openvino"])
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--no-verify", action="store_true", help="Skip the comparison with PyTorch detections")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    from app.services.model_backends import backend_available, benchmark, prepare_backend
+
+    paths = {}
+    report = {}
+    for name in args.backends:
+        if not backend_available(name):
+            report[name] = {"error": "not installed"}
+            continue
+        if args.no_verify:
+            settings.BACKEND_VERIFY = False
+        info = prepare_backend(settings.MODEL_PATH, name)
+        if info.error:
+            report[name] = {"error": info.error}
+            continue
+        paths[name] = info.path
+        report[name] = {"path": info.path, "verification": info.verification}
+
+    for name, result in benchmark(paths, batch_size=args.batch_size, runs=args.runs).items():
+        report[name].update(result)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,59 @@
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.api.endpoints import detection
+from app.services.detection_service import detection_service
+from app.services.inference_executor import shutdown_executors, warm_up_executors
+from app.services.job_queue import job_queue
+from app.services.stream_service import stream_manager
+
+# Time spent importing the app; torch and ultralytics are imported later, by the model loader
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+logging.basicConfig(level=settings.LOG_LEVEL, format=settings.LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+async def load_model():
+    """
+    Load and warm up the model, then start the workers of both pools. With
+    the job queue, detector workers run the model and this process only
+    needs its class names.
+    """
+    in_process = job_queue is None
+    try:
+        await asyncio.to_thread(detection_service.load, warm_up_executors if in_process else None, in_process)
+        logger.info("Model ready, startup timings: %s", detection_service.startup_timings)
+    except Exception:
+        # The traceback is logged by the service; /health reports the failure
+        logger.error("Model is not available: %s", detection_service.load_error)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Load the model on startup; on shutdown stop the live streams and wait
+    for running inference jobs before the process exits
+    """
+    detection_service.startup_timings["import_app"] = IMPORT_SECONDS
+    loading = asyncio.create_task(load_model())
+    if not settings.LOAD_MODEL_IN_BACKGROUND:
+        await loading
+    yield
+    await asyncio.to_thread(stream_manager.stop_all)
+    shutdown_executors()
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -40,6 +86,32 @@ async def root():
         "redoc_url": "/redoc"
     }
 
+@app.get("/health/live")
+async def liveness():
+    """
+    Liveness probe: the process is serving and the model did not fail to load
+    """
+    if detection_service.state == "failed":
+        return JSONResponse(
+            status_code=503,
+            content={"status": "failed", "error": detection_service.load_error}
+        )
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """
+    Readiness probe: the model is loaded and warmed up on every worker
+    """
+    content = {
+        "status": detection_service.state,
+        "backend": detection_service.backend.name if detection_service.backend else None,
+        "startup_timings": detection_service.startup_timings
+    }
+    if not detection_service.ready:
+        return JSONResponse(status_code=503, content=content)
+    return content
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -0,0 +1,128 @@
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+from typing import Optional, Sequence
+import cv2
+import numpy as np
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Tests import the app package from the backend directory
+sys.path.insert(0, BACKEND_DIR)
+
+# Settings are read when the app is imported, so the directories and databases
+# it creates go to a scratch directory instead of the working tree
+DATA_DIR = tempfile.mkdtemp(prefix="vehicle-detector-tests-")
+for name, directory in {
+    "UPLOAD_DIR": "uploads",
+    "OUTPUT_DIR": "outputs",
+    "RESULT_CACHE_DIR": "outputs/cache",
+    "RAW_DETECTIONS_DIR": "outputs/raw",
+    "FRAME_STORE_DIR": "outputs/frames",
+    "STREAM_FILE_DIR": "streams",
+    "TASK_DB_PATH": "data/tasks.db",
+    "JOB_QUEUE_PATH": "data/jobs.db"
+}.items():
+    os.environ.setdefault(name, os.path.join(DATA_DIR, directory))
+os.environ.setdefault("TASK_STORE_BACKEND", "memory")
+os.environ.setdefault("CAMERA_PROFILES_PATH", os.path.join(DATA_DIR, "camera_profiles.json"))
+
+from app.services.detections import Detections
+
+# Pure colours the fake model detects (BGR) and the class and confidence it reports
+RED = (0, 0, 255)
+BLUE = (255, 0, 0)
+FAKE_CLASSES = {RED: (2, 0.9), BLUE: (7, 0.4)}  # A confident car and an unsure truck
+
+def make_detections(
+    boxes: Sequence[Sequence[float]],
+    confidences: Optional[Sequence[float]] = None,
+    class_ids: Optional[Sequence[int]] = None
+) -> Detections:
+    """Detections from plain lists; confidence 0.9 and class 2 (car) by default"""
+    count = len(boxes)
+    return Detections(
+        boxes=np.array(boxes, dtype=np.float32).reshape(-1, 4),
+        confidences=np.array(confidences if confidences is not None else [0.9] * count, dtype=np.float32),
+        class_ids=np.array(class_ids if class_ids is not None else [2] * count, dtype=np.int32)
+    )
+
+def make_image(width: int = 320, height: int = 240, boxes: Sequence[tuple] = ()) -> np.ndarray:
+    """Black image with filled rectangles given as (x1, y1, x2, y2, colour)"""
+    img = np.zeros((height, width, 3), dtype=np.uint8)
+    for x1, y1, x2, y2, colour in boxes:
+        img[y1:y2, x1:x2] = colour
+    return img
+
+def encode_image(img: np.ndarray, ext: str = ".png") -> bytes:
+    return cv2.imencode(ext, img)[1].tobytes()
+
+def make_video(path: str, frame_count: int = 12, fps: float = 10.0) -> bytes:
+    """
+    Writes a video of a red car moving right by 5 pixels a frame and returns
+    its bytes. FFV1 is lossless, so FakeModel still finds the exact colour.
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"FFV1"), fps, (160, 120))
+    for index in range(frame_count):
+        x = 10 + 5 * index
+        writer.write(make_image(160, 120, boxes=[(x, 40, x + 30, 70, RED)]))
+    writer.release()
+    with open(path, "rb") as f:
+        return f.read()
+
+class _Tensor:
+    """The part of a torch tensor Detections.from_results uses"""
+    def __init__(self, array: np.ndarray):
+        self._array = array
+
+    def cpu(self) -> "_Tensor":
+        return self
+
+    def numpy(self) -> np.ndarray:
+        return self._array
+
+class FakeModel:
+    """
+    Stands in for a YOLO model so the service runs without weights or torch.
+    Every area of a colour in FAKE_CLASSES is reported as one box, and the
+    confidence and class arguments are applied like the real model does.
+    """
+    names = {0: "person", 1: "bicycle", 2: "car", 3: "motorcycle", 5: "bus", 7: "truck"}
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+
+    def __call__(self, source, conf=0.25, iou=0.45, classes=None, imgsz=640, verbose=True):
+        images = source if isinstance(source, list) else [source]
+        return [self._predict(img, conf, classes) for img in images]
+
+    @staticmethod
+    def _predict(img: np.ndarray, conf: float, classes) -> SimpleNamespace:
+        rows = []
+        for colour, (class_id, confidence) in FAKE_CLASSES.items():
+            ys, xs = np.nonzero(np.all(img == colour, axis=2))
+            if len(xs) and confidence >= conf and (classes is None or class_id in classes):
+                rows.append([xs.min(), ys.min(), xs.max() + 1, ys.max() + 1, confidence, class_id])
+        data = np.array(rows, dtype=np.float32).reshape(-1, 6)
+        return SimpleNamespace(boxes=SimpleNamespace(data=_Tensor(data)))
+
+@pytest.fixture(scope="session")
+def detection_service():
+    """The service singleton running FakeModel instead of the YOLO weights"""
+    from app.services import detection_service as module
+    from app.services.model_backends import BackendInfo
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(module, "select_backend", lambda path: BackendInfo(name="pytorch", path=path))
+        patch.setattr(module, "load_model", FakeModel)
+        service = module.detection_service
+        service.start_inference()
+        service.state = "ready"
+        yield service
+
+@pytest.fixture(scope="session")
+def client(detection_service):
+    """Client of the API app; the lifespan hook is not run, the fixture loads the model"""
+    from fastapi.testclient import TestClient
+    from main import app
+    return TestClient(app)
@@ -0,0 +1,85 @@
+import threading
+from conftest import BLUE, RED, encode_image, make_image
+
+API = "/api/v1/detection"
+IMAGE = encode_image(make_image(boxes=[(40, 50, 100, 90, RED), (200, 100, 260, 160, BLUE)]))
+
+def post_image(client, data: bytes = IMAGE, filename: str = "street.png", **form):
+    return client.post(f"{API}/image", files={"file": (filename, data, "image/png")}, data=form)
+
+def test_image_detection(client):
+    response = post_image(client)
+    assert response.status_code == 200
+    result = response.json()
+    # The default filter keeps cars and motorcycles above 0.5
+    assert [(d["class_name"], d["x1"], d["y1"], d["x2"], d["y2"]) for d in result["detections"]] == \
+        [("car", 40, 50, 100, 90)]
+    assert result["status"] == "completed"
+    download = client.get(f"{API}/download/{result['processed_filename']}")
+    assert download.status_code == 200
+    assert download.headers["content-type"] == "image/png"
+
+def test_image_filter(client):
+    response = post_image(client, target_classes='["truck"]', min_confidence="0.3")
+    assert [d["class_name"] for d in response.json()["detections"]] == ["truck"]
+
+def test_image_requests_share_the_worker_pool(client):
+    results = []
+
+    def upload():
+        results.append(post_image(client, render="none").status_code)
+
+    threads = [threading.Thread(target=upload) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [200] * 8
+
+def test_non_image_upload_is_rejected(client):
+    response = client.post(f"{API}/image", files={"file": ("notes.txt", b"hello", "text/plain")})
+    assert response.status_code == 400
+
+def test_image_is_rejected_while_the_model_loads(client, detection_service, monkeypatch):
+    monkeypatch.setattr(detection_service, "state", "loading")
+    response = post_image(client)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+
+def test_full_worker_pool_returns_503(client, monkeypatch):
+    from app.services.inference_executor import inference_executor
+    monkeypatch.setattr(inference_executor, "_slots", threading.BoundedSemaphore(1))
+    inference_executor._slots.acquire()
+    response = post_image(client)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+def test_full_micro_batch_queue_returns_503(client, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "BATCH_MAX_PENDING", 0)
+    response = post_image(client)
+    assert response.status_code == 503
+    assert "queue is full" in response.json()["detail"]
+
+def test_undecodable_image_returns_400(client):
+    response = post_image(client, data=b"\x89PNG\r\n\x1a\nnot really")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Could not read image file"
+
+class InlineJobQueue:
+    """Runs image jobs in the API process, like a detector worker would"""
+    def __init__(self, service):
+        self.service = service
+
+    def enqueue(self, task_id, kind, payload, data=None):
+        try:
+            self.service.process_image_data(data, payload["filename"], None, task_id=task_id)
+        except Exception:
+            pass  # The task records the failure
+
+def test_undecodable_image_returns_400_in_queue_mode(client, detection_service, monkeypatch):
+    from app.api.endpoints import detection as endpoints
+    monkeypatch.setattr(endpoints, "job_queue", InlineJobQueue(detection_service))
+    response = post_image(client, data=b"not an image")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Could not read image file"
@@ -0,0 +1,96 @@
+import threading
+import pytest
+from app.services.batching import Histogram, MicroBatcher
+
+class GatedModel:
+    """Batch function that records its batches and holds the first one until released"""
+    def __init__(self):
+        self.batches = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, key, items):
+        self.batches.append((key, list(items)))
+        self.started.set()
+        self.release.wait(5)
+        return [f"{key}:{item}" for item in items]
+
+def blocked_batcher(max_batch_size: int = 4):
+    """A batcher whose single worker is busy, so new inputs queue up"""
+    model = GatedModel()
+    batcher = MicroBatcher(model, max_batch_size=max_batch_size, max_wait_ms=50)
+    first = batcher.submit("a", 0)
+    assert model.started.wait(5)
+    return batcher, model, first
+
+def test_waiting_inputs_are_batched_up_to_the_maximum_size():
+    batcher, model, first = blocked_batcher(max_batch_size=4)
+    futures = [batcher.submit("a", i) for i in range(1, 7)]
+    assert batcher.pending == 7
+    model.release.set()
+    assert [future.result(5) for future in [first] + futures] == [f"a:{i}" for i in range(7)]
+    assert [len(items) for _, items in model.batches] == [1, 4, 2]
+    assert batcher.pending == 0
+
+def test_inputs_with_other_parameters_are_never_mixed():
+    batcher, model, first = blocked_batcher()
+    a1, b1, a2 = batcher.submit("a", 1), batcher.submit("b", 1), batcher.submit("a", 2)
+    model.release.set()
+    assert (a1.result(5), b1.result(5), a2.result(5)) == ("a:1", "b:1", "a:2")
+    assert model.batches[1:] == [("a", [1, 2]), ("b", [1])]
+
+def test_a_failing_batch_fails_only_its_inputs():
+    calls = []
+
+    def infer(key, items):
+        calls.append(items)
+        if key == "bad":
+            raise RuntimeError("model error")
+        return items
+
+    batcher = MicroBatcher(infer, max_batch_size=8, max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="model error"):
+        batcher.infer("bad", 1)
+    assert batcher.infer("good", 2) == 2
+    assert batcher.pending == 0
+
+def test_cancelled_inputs_are_skipped():
+    batcher, model, first = blocked_batcher()
+    cancelled = batcher.submit("a", 1)
+    kept = batcher.submit("a", 2)
+    assert cancelled.cancel()
+    model.release.set()
+    assert kept.result(5) == "a:2"
+    assert model.batches[1] == ("a", [2])
+
+def test_every_worker_runs_the_initializer_before_the_batcher_is_returned():
+    started = []
+    MicroBatcher(lambda key, items: items, 4, 1, num_workers=3, initializer=lambda: started.append(1))
+    assert len(started) == 3
+
+def test_a_failing_initializer_does_not_block_startup():
+    def initializer():
+        raise RuntimeError("no model")
+
+    batcher = MicroBatcher(lambda key, items: items, 4, 1, initializer=initializer)
+    assert batcher.infer("a", 1) == 1
+
+def test_stats_report_batch_sizes():
+    batcher, model, first = blocked_batcher()
+    futures = [batcher.submit("a", i) for i in range(3)]
+    model.release.set()
+    for future in [first] + futures:
+        future.result(5)
+    stats = batcher.stats()
+    assert stats["batch_size"]["count"] == 2
+    assert stats["batch_size"]["buckets"]["1"] == 1
+    assert stats["batch_size"]["buckets"]["4"] == 1
+    assert stats["pending"] == 0
+
+def test_histogram_buckets():
+    histogram = Histogram([1, 10])
+    for value in (0.5, 1, 5, 50):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"1": 2, "10": 1, "+inf": 1}
+    assert snapshot["mean"] == pytest.approx(56.5 / 4)
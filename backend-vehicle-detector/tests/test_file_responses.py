@@ -0,0 +1,94 @@
+import os
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from starlette.requests import Request as StarletteRequest
+from app.services.file_responses import RangeNotSatisfiable, byte_range, file_response
+
+ETAG = '"abc"'
+LAST_MODIFIED = "Sat, 17 Oct 2026 00:00:00 GMT"
+
+def request(**headers: str) -> StarletteRequest:
+    return StarletteRequest({
+        "type": "http",
+        "method": "GET",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    })
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=10-", (10, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=90-1000", (90, 99)),
+    ("bytes=99-99", (99, 99))
+])
+def test_byte_range(header, expected):
+    assert byte_range(request(range=header), 100, ETAG, LAST_MODIFIED) == expected
+
+@pytest.mark.parametrize("header", [
+    None,
+    "bytes=-",
+    "bytes=0-9,20-29",  # Several ranges are answered with the whole file
+    "items=0-9"
+])
+def test_whole_file(header):
+    headers = {"range": header} if header else {}
+    assert byte_range(request(**headers), 100, ETAG, LAST_MODIFIED) is None
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=100-", 100),
+    ("bytes=20-10", 100),
+    ("bytes=-0", 100),
+    ("bytes=-5", 0)
+])
+def test_unsatisfiable_range(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        byte_range(request(range=header), size, ETAG, LAST_MODIFIED)
+
+def test_if_range_must_match_the_current_file():
+    assert byte_range(request(range="bytes=0-9", if_range=ETAG), 100, ETAG, LAST_MODIFIED) == (0, 9)
+    assert byte_range(request(range="bytes=0-9", if_range=LAST_MODIFIED), 100, ETAG, LAST_MODIFIED) == (0, 9)
+    assert byte_range(request(range="bytes=0-9", if_range='"old"'), 100, ETAG, LAST_MODIFIED) is None
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "processed_video.mp4"
+    path.write_bytes(bytes(range(256)) * 4)
+    app = FastAPI()
+
+    @app.api_route("/files/{filename}", methods=["GET", "HEAD"])
+    async def serve(filename: str, request: Request):
+        return file_response(request, os.path.join(tmp_path, filename), filename)
+
+    return TestClient(app)
+
+def test_whole_file_response(client):
+    response = client.get("/files/processed_video.mp4")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "video/mp4"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-disposition"].startswith("inline")
+    assert len(response.content) == 1024
+
+def test_range_response(client):
+    response = client.get("/files/processed_video.mp4", headers={"Range": "bytes=256-259"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 256-259/1024"
+    assert response.content == bytes([0, 1, 2, 3])
+
+def test_head_range_response_has_no_body(client):
+    response = client.head("/files/processed_video.mp4", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.headers["content-length"] == "10"
+    assert response.content == b""
+
+def test_revalidation_returns_not_modified(client):
+    etag = client.get("/files/processed_video.mp4").headers["etag"]
+    assert client.get("/files/processed_video.mp4", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/files/processed_video.mp4", headers={"If-None-Match": '"other"'}).status_code == 200
+
+def test_unsatisfiable_range_response(client):
+    response = client.get("/files/processed_video.mp4", headers={"Range": "bytes=5000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
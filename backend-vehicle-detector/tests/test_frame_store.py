@@ -0,0 +1,155 @@
+import os
+import numpy as np
+import pytest
+from conftest import make_detections
+from app.core.config import settings
+from app.services.detections import Detections
+from app.services.frame_store import FrameStore
+from app.services.raw_store import RawDetectionStore
+
+def tracked(boxes, track_ids):
+    detections = make_detections(boxes)
+    detections.track_ids = np.array(track_ids, dtype=np.int32)
+    return detections
+
+# Ten frames; frames 2, 3 and 7 have detections
+FRAMES = [Detections.empty() for _ in range(10)]
+FRAMES[2] = tracked([[0, 0, 10, 10]], [1])
+FRAMES[3] = tracked([[1, 0, 11, 10], [50, 50, 60, 60]], [1, -1])
+FRAMES[7] = tracked([[5, 5, 15, 15]], [2])
+
+@pytest.fixture
+def store(tmp_path):
+    store = FrameStore(str(tmp_path), chunk_rows=2)
+    store.save("task", FRAMES, fps=5.0)
+    return store
+
+def test_frames_round_trip(store):
+    reader = store.open("task")
+    assert (reader.frame_count, reader.fps) == (10, 5.0)
+    frames = dict(reader.frames(np.arange(10)))
+    assert sorted(frames) == list(range(10))
+    for index, expected in enumerate(FRAMES):
+        np.testing.assert_allclose(frames[index].boxes.reshape(-1, 4), expected.boxes)
+        if len(expected):
+            assert frames[index].track_ids.tolist() == expected.track_ids.tolist()
+            assert frames[index].class_ids.tolist() == expected.class_ids.tolist()
+
+def test_reading_a_range_only_returns_those_frames(store):
+    reader = store.open("task")
+    frames = reader.frames(np.arange(3, 5))
+    assert [index for index, _ in frames] == [3, 4]
+    assert [len(detections) for _, detections in frames] == [2, 0]
+    assert reader.non_empty(0, 10, limit=10)[0].tolist() == [2, 3, 7]
+    assert reader.non_empty(4, 7, limit=10)[0].tolist() == []
+
+@pytest.mark.parametrize("chunk_frames", [1, 3, 4096])
+def test_non_empty_stops_after_the_limit(store, chunk_frames):
+    reader = store.open("task")
+    indexes, next_frame = reader.non_empty(0, 10, limit=1, chunk_frames=chunk_frames)
+    assert (indexes.tolist(), next_frame) == ([2], 3)
+    indexes, next_frame = reader.non_empty(next_frame, 10, limit=2, chunk_frames=chunk_frames)
+    assert (indexes.tolist(), next_frame) == ([3, 7], None)
+    assert reader.non_empty(8, 10, limit=2, chunk_frames=chunk_frames)[0].tolist() == []
+
+def test_writer_fills_skipped_and_trailing_frames(tmp_path):
+    store = FrameStore(str(tmp_path), chunk_rows=100)
+    writer = store.writer("task")
+    writer.add(3, tracked([[0, 0, 10, 10]], [1]))
+    writer.close(frame_count=6, fps=None)
+    reader = store.open("task")
+    assert reader.frame_count == 6
+    assert reader.fps is None
+    assert reader.non_empty(0, 6, limit=6)[0].tolist() == [3]
+
+def test_frames_only_exist_once_the_writer_is_closed(tmp_path):
+    store = FrameStore(str(tmp_path), chunk_rows=100)
+    writer = store.writer("task")
+    writer.add(0, tracked([[0, 0, 10, 10]], [1]))
+    assert not store.exists("task")
+    writer.discard()
+    assert not store.exists("task")
+    assert os.listdir(tmp_path) == []
+
+def test_link_and_delete(store):
+    store.link("task", "copy")
+    assert store.open("copy").non_empty(0, 10, limit=10)[0].tolist() == [2, 3, 7]
+    store.delete("task")
+    assert store.open("task") is None
+    assert store.exists("copy")
+
+def test_link_with_meta_shares_the_frames(store):
+    store.link("task", "copy", output_filename="copy.mp4")
+    reader = store.open("copy")
+    assert reader.meta["output_filename"] == "copy.mp4"
+    assert reader.non_empty(0, 10, limit=10)[0].tolist() == [2, 3, 7]
+    assert "output_filename" not in store.open("task").meta
+
+def test_raw_detections_are_streamed_to_the_store(tmp_path):
+    raw_store = RawDetectionStore(str(tmp_path), chunk_rows=2)
+    recorder = raw_store.recorder("task", {2: "car", 7: "truck"})
+    for index, detections in enumerate(FRAMES):
+        recorder.add(index, detections)
+    # Full chunks are already on disk, but the task has no detections yet
+    assert os.path.getsize(tmp_path / "task.frames.tmp") > 0
+    assert not raw_store.exists("task")
+    recorder.close(frame_count=10, fps=5.0, is_video=True)
+
+    raw = raw_store.load("task")
+    assert raw.frame_count == 10
+    assert raw.names == {2: "car"}
+    assert (raw.meta["is_video"], raw.meta["fps"]) == (True, 5.0)
+    assert raw.frames.tolist() == [2, 3, 3, 7]
+    assert [len(detections) for detections in raw.frame_detections()] == [len(d) for d in FRAMES]
+
+    raw_store.link("task", "copy", filter=None)
+    assert raw_store.load("copy").meta["filter"] is None
+    raw_store.delete("task")
+    assert not raw_store.exists("task")
+    assert raw_store.load("copy").frames.tolist() == [2, 3, 3, 7]
+
+@pytest.fixture
+def service(store, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_STORE_BACKEND", "memory")
+    from app.services.detection_service import DetectionService
+    service = DetectionService()
+    service.names = {2: "car"}
+    service.frame_store = store
+    return service
+
+def test_pages_follow_next_frame(service):
+    indexes = []
+    start = 0
+    while start is not None:
+        page = service.get_frames("task", start_frame=start, limit=4)
+        indexes += [frame.frame_index for frame in page.frames]
+        start = page.next_frame
+    assert indexes == list(range(10))
+    assert service.get_frames("task", limit=4).next_frame == 4
+
+def test_pages_skipping_empty_frames(service):
+    page = service.get_frames("task", limit=2, skip_empty=True)
+    assert [frame.frame_index for frame in page.frames] == [2, 3]
+    assert page.next_frame == 7
+    page = service.get_frames("task", start_frame=page.next_frame, limit=2, skip_empty=True)
+    assert [frame.frame_index for frame in page.frames] == [7]
+    assert page.next_frame is None
+
+def test_time_window_and_detections(service):
+    # 5 fps: 0.4s-0.8s are frames 2 to 3
+    page = service.get_frames("task", start_time=0.4, end_time=0.8)
+    assert [frame.frame_index for frame in page.frames] == [2, 3]
+    assert page.frames[0].timestamp == 0.4
+    assert [(box.class_name, box.track_id) for box in page.frames[1].detections] == [("car", 1), ("car", None)]
+
+def test_frame_range_is_clamped(service):
+    page = service.get_frames("task", start_frame=8, end_frame=100, limit=10)
+    assert [frame.frame_index for frame in page.frames] == [8, 9]
+    assert page.next_frame is None
+    assert service.get_frames("task", start_frame=50).frames == []
+
+def test_unknown_task_and_unknown_frame_rate(service, tmp_path):
+    assert service.get_frames("missing") is None
+    service.frame_store.save("no-fps", FRAMES, fps=None)
+    with pytest.raises(ValueError):
+        service.get_frames("no-fps", start_time=1.0)
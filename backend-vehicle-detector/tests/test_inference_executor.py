@@ -0,0 +1,44 @@
+import threading
+import pytest
+from app.services.inference_executor import InferenceExecutor, InferenceQueueFull
+
+def test_jobs_run_after_a_failing_initializer():
+    def initializer():
+        raise RuntimeError("no model")
+
+    executor = InferenceExecutor(max_workers=2, max_queue=2, initializer=initializer)
+    assert [executor.submit(lambda i=i: i * 2).result(5) for i in range(4)] == [0, 2, 4, 6]
+    assert executor.stats()["initializer_failures"] >= 1
+    executor.shutdown()
+
+def test_each_job_reports_the_model_load_error(detection_service, monkeypatch):
+    from app.services import detection_service as module
+    from conftest import FakeModel
+
+    def missing_weights(path):
+        raise RuntimeError("weights missing")
+
+    monkeypatch.setattr(module, "load_model", missing_weights)
+    executor = InferenceExecutor(max_workers=1, max_queue=2, initializer=detection_service.load_worker_model)
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="weights missing"):
+            executor.submit(lambda: detection_service.model).result(5)
+    assert detection_service.worker_load_error == "weights missing"
+    # Once the weights load again the same worker thread recovers
+    monkeypatch.setattr(module, "load_model", FakeModel)
+    assert isinstance(executor.submit(lambda: detection_service.model).result(5), FakeModel)
+    assert detection_service.worker_load_error is None
+    executor.shutdown()
+
+def test_full_queue_is_rejected():
+    executor = InferenceExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+    running = [executor.submit(release.wait), executor.submit(release.wait)]
+    with pytest.raises(InferenceQueueFull):
+        executor.submit(release.wait)
+    assert executor.stats()["rejected"] == 1
+    assert executor.queue_depth == 1
+    release.set()
+    for future in running:
+        future.result(5)
+    executor.shutdown()
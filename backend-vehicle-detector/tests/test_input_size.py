@@ -0,0 +1,72 @@
+import pytest
+from app.services.input_size import InputSizer, round_size
+
+API = "/api/v1/detection"
+
+def sizer(backlog: int = 0, **options) -> InputSizer:
+    sizer = InputSizer(**{
+        "default_size": 640, "min_size": 320, "max_size": 1280,
+        "steps": [640, 480, 320], "backlog_limit": 4, "refresh_seconds": 0.0, **options
+    })
+    sizer.add_backlog_source(lambda: backlog)
+    return sizer
+
+def test_round_size():
+    assert [round_size(size) for size in (1, 32, 33, 630, 640)] == [32, 32, 64, 640, 640]
+
+def test_requested_sizes_are_clamped():
+    sizes = sizer()
+    assert sizes.clamp(None) == 640
+    assert sizes.clamp(100) == 320
+    assert sizes.clamp(1000) == 1024
+    assert sizes.clamp(4000) == 1280
+
+def test_adaptive_mode_never_upscales_small_sources():
+    sizes = sizer()
+    assert sizes.for_source(1280, 400, 300, adaptive=True) == 416
+    assert sizes.for_source(1280, 400, 300, adaptive=False) == 1280
+    assert sizes.for_source(None, 4000, 3000, adaptive=True) == 640
+    # Never below the minimum
+    assert sizes.for_source(None, 100, 80, adaptive=True) == 320
+
+@pytest.mark.parametrize("backlog, expected", [(0, 640), (1, 640), (2, 480), (3, 480), (4, 320), (40, 320)])
+def test_size_steps_down_with_the_backlog(backlog, expected):
+    assert sizer(backlog).under_load(640, frames=4) == expected
+
+def test_only_smaller_steps_are_used():
+    assert sizer(40).under_load(416) == 320
+    assert sizer(40).under_load(320) == 320
+
+def test_reduced_frames_are_counted():
+    sizes = sizer(4)
+    sizes.under_load(640, frames=4)
+    sizes.under_load(320, frames=2)
+    stats = sizes.stats()
+    assert (stats["reduced_calls"], stats["reduced_frames"], stats["backlog"]) == (1, 4, 4)
+
+def test_backlog_is_cached_for_the_refresh_interval():
+    calls = []
+
+    def source():
+        calls.append(1)
+        return len(calls)
+
+    sizes = InputSizer(640, 320, 1280, [640], backlog_limit=4, refresh_seconds=3600)
+    sizes.add_backlog_source(source)
+    assert sizes.backlog() == 1
+    assert sizes.backlog() == 1
+    assert len(calls) == 1
+
+def test_failing_backlog_source_counts_as_idle():
+    sizes = sizer(2)
+    sizes.add_backlog_source(lambda: 1 / 0)
+    assert sizes.backlog() == 2
+
+def test_image_runs_at_the_requested_size(client):
+    from conftest import RED, encode_image, make_image
+    image = encode_image(make_image(boxes=[(40, 50, 100, 90, RED)]))
+    files = {"file": ("street.png", image, "image/png")}
+    assert client.post(f"{API}/image", files=files, data={"imgsz": "1000"}).json()["imgsz"] == 1024
+    # The 320x240 image is not upscaled
+    result = client.post(f"{API}/image", files=files, data={"imgsz": "1000", "adaptive_imgsz": "true"}).json()
+    assert result["imgsz"] == 320
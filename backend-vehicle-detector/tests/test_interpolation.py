@@ -0,0 +1,62 @@
+import numpy as np
+from conftest import make_detections
+from app.services.interpolation import (
+    KeyframeScheduler, StrideAccuracy, interpolate_detections, iou_matrix, match_detections
+)
+
+def test_iou_matrix():
+    a = np.array([[0, 0, 10, 10], [100, 100, 110, 110]], dtype=np.float32)
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10]], dtype=np.float32)
+    ious = iou_matrix(a, b)
+    assert ious.shape == (2, 2)
+    np.testing.assert_allclose(ious[0], [1.0, 50 / 150])
+    np.testing.assert_allclose(ious[1], [0.0, 0.0])
+    assert iou_matrix(a, np.zeros((0, 4), dtype=np.float32)).shape == (2, 0)
+
+def test_match_detections_prefers_highest_iou_of_the_same_class():
+    a = make_detections([[0, 0, 10, 10], [50, 50, 60, 60]], class_ids=[2, 7])
+    b = make_detections([[1, 0, 11, 10], [0, 0, 10, 10], [50, 50, 60, 60]], class_ids=[2, 2, 2])
+    matched_a, matched_b, ious, unmatched_a, unmatched_b = match_detections(a, b, 0.3)
+    assert matched_a.tolist() == [0]
+    assert matched_b.tolist() == [1]
+    np.testing.assert_allclose(ious, [1.0])
+    # The truck has no truck to match, however well its box overlaps
+    assert unmatched_a.tolist() == [1]
+    assert unmatched_b.tolist() == [0, 2]
+
+def test_interpolation_moves_matched_boxes_linearly():
+    start = make_detections([[0, 0, 100, 100]], confidences=[0.6])
+    end = make_detections([[20, 0, 120, 100]], confidences=[0.8])
+    middle = interpolate_detections(start, end, 0.5, iou_threshold=0.3)
+    np.testing.assert_allclose(middle.boxes, [[10, 0, 110, 100]])
+    np.testing.assert_allclose(middle.confidences, [0.7], rtol=1e-6)
+
+def test_unmatched_boxes_stay_on_the_half_closest_to_their_keyframe():
+    start = make_detections([[0, 0, 10, 10]])
+    end = make_detections([[500, 500, 510, 510]])
+    np.testing.assert_allclose(interpolate_detections(start, end, 0.25).boxes, start.boxes)
+    np.testing.assert_allclose(interpolate_detections(start, end, 0.75).boxes, end.boxes)
+
+def frames(values):
+    return [np.full((36, 64, 3), value, dtype=np.uint8) for value in values]
+
+def test_scheduler_runs_every_stride_frame():
+    scheduler = KeyframeScheduler(frame_stride=3, adaptive=False, scene_change_threshold=30.0)
+    assert [scheduler.is_keyframe(frame) for frame in frames([0] * 7)] == \
+        [True, False, False, True, False, False, True]
+
+def test_adaptive_scheduler_adds_a_keyframe_on_scene_change():
+    scheduler = KeyframeScheduler(frame_stride=10, adaptive=True, scene_change_threshold=30.0)
+    keyframes = [scheduler.is_keyframe(frame) for frame in frames([0, 5, 200, 205, 210])]
+    assert keyframes == [True, False, True, False, False]
+
+def test_stride_accuracy_report():
+    accuracy = StrideAccuracy(iou_threshold=0.5)
+    detected = make_detections([[0, 0, 10, 10], [50, 50, 60, 60]])
+    accuracy.add(make_detections([[0, 0, 10, 10], [200, 200, 210, 210]]), detected)
+    report = accuracy.report(keyframes=4, interpolated_frames=6)
+    assert report.audited_frames == 1
+    assert report.precision == 0.5
+    assert report.recall == 0.5
+    assert report.mean_iou == 1.0
+    assert StrideAccuracy().report(1, 0).precision is None
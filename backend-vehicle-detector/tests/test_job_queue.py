@@ -0,0 +1,138 @@
+import threading
+import time
+import pytest
+from app.models.detection import RenderMode, VehicleFilter
+from app.services.job_queue import JobQueueFull, SQLiteJobQueue
+from app.services.job_worker import JobWorker, job_payload
+
+def make_queue(tmp_path, lease_seconds: float = 60, max_attempts: int = 2, max_depth: int = 10) -> SQLiteJobQueue:
+    return SQLiteJobQueue(str(tmp_path / "jobs.db"), max_depth, lease_seconds, max_attempts)
+
+def image_job(queue: SQLiteJobQueue, task_id: str = "task") -> int:
+    payload = job_payload("street.png", VehicleFilter(), RenderMode.NONE, content_hash="abc")
+    return queue.enqueue(task_id, "image", payload, b"image bytes")
+
+def test_jobs_are_claimed_oldest_first_and_only_once(tmp_path):
+    queue = make_queue(tmp_path)
+    first, second = image_job(queue, "a"), image_job(queue, "b")
+    job = queue.claim("worker-1")
+    assert (job.id, job.task_id, job.kind, job.data, job.attempts) == (first, "a", "image", b"image bytes", 1)
+    assert job.payload["filename"] == "street.png"
+    assert queue.claim("worker-2").id == second
+    assert queue.claim("worker-3") is None
+    queue.finish(first)
+    queue.finish(second, "boom")
+    assert queue.stats() == {"max_depth": 10, "done": 1, "failed": 1}
+
+def test_full_queue_rejects_jobs(tmp_path):
+    queue = make_queue(tmp_path, max_depth=1)
+    image_job(queue)
+    with pytest.raises(JobQueueFull):
+        image_job(queue)
+    assert queue.queued() == 1
+
+def test_expired_lease_hands_the_job_to_another_worker(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.05)
+    job_id = image_job(queue)
+    assert queue.claim("lost-worker").attempts == 1
+    assert queue.claim("worker") is None
+    time.sleep(0.1)
+    retry = queue.claim("worker")
+    assert (retry.id, retry.attempts) == (job_id, 2)
+
+def test_renewed_lease_keeps_the_job(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.2)
+    image_job(queue)
+    job = queue.claim("worker")
+    time.sleep(0.12)
+    queue.renew(job.id, "worker")
+    # Past the first lease, within the renewed one
+    time.sleep(0.12)
+    assert queue.claim("other") is None
+    # Only the lease holder can renew
+    queue.renew(job.id, "other")
+    time.sleep(0.15)
+    assert queue.claim("other").id == job.id
+
+def test_jobs_lost_too_often_are_reaped(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.02, max_attempts=2)
+    image_job(queue, "lost")
+    queue.claim("a")
+    time.sleep(0.05)
+    queue.claim("b")
+    time.sleep(0.05)
+    assert queue.claim("c") is None
+    assert queue.reap() == ["lost"]
+    assert queue.reap() == []
+    assert queue.stats()["failed"] == 1
+
+def test_purge_removes_old_finished_jobs(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = image_job(queue)
+    image_job(queue, "waiting")
+    queue.claim("worker")
+    queue.finish(job_id)
+    assert queue.purge(time.time() + 1) == 1
+    assert queue.queued() == 1
+
+class FakeService:
+    """Records the calls a worker makes to the detection service"""
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.images = []
+        self.failed = {}
+
+    def process_image_data(self, data, filename, filter, task_id, content_hash, render, inference_options):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        self.images.append((task_id, data, filename, filter, content_hash, render))
+
+    def fail_task(self, task_id, error):
+        self.failed[task_id] = error
+
+def test_worker_runs_jobs_through_the_service(tmp_path):
+    queue = make_queue(tmp_path)
+    service = FakeService()
+    worker = JobWorker(queue, service, name="worker")
+    image_job(queue)
+    worker.run_job(queue.claim(worker.name))
+    assert service.images == [("task", b"image bytes", "street.png", VehicleFilter(), "abc", RenderMode.NONE)]
+    assert (worker.processed, worker.failed) == (1, 0)
+    assert queue.stats()["done"] == 1
+
+def test_failed_job_is_recorded(tmp_path):
+    queue = make_queue(tmp_path)
+    worker = JobWorker(queue, FakeService(error=RuntimeError("boom")), name="worker")
+    image_job(queue)
+    worker.run_job(queue.claim(worker.name))
+    assert (worker.processed, worker.failed) == (0, 1)
+    assert queue.stats()["failed"] == 1
+
+def test_worker_heartbeat_keeps_a_long_job(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.1)
+    worker = JobWorker(queue, FakeService(delay=0.4), name="worker")
+    image_job(queue)
+    job = queue.claim(worker.name)
+    running = threading.Thread(target=worker.run_job, args=(job,))
+    running.start()
+    time.sleep(0.25)
+    assert queue.claim("other") is None
+    running.join()
+    assert worker.processed == 1
+
+def test_worker_fails_the_tasks_of_reaped_jobs(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.02, max_attempts=1)
+    service = FakeService()
+    image_job(queue, "lost")
+    queue.claim("dead-worker")
+    time.sleep(0.05)
+    stop = threading.Event()
+    worker = JobWorker(queue, service, name="worker")
+    runner = threading.Thread(target=worker.run, args=(stop,))
+    runner.start()
+    time.sleep(0.1)
+    stop.set()
+    runner.join()
+    assert service.failed == {"lost": "Detector worker was lost while processing"}
@@ -0,0 +1,72 @@
+import os
+from conftest import BLUE, RED, encode_image, make_image
+from app.core.config import settings
+
+API = "/api/v1/detection"
+IMAGE = encode_image(make_image(boxes=[(40, 50, 100, 90, RED), (200, 100, 260, 160, BLUE)]))
+TRUCKS = {"target_classes": ["truck"], "min_confidence": 0.3}
+
+def detect(client, image: bytes = IMAGE, **form) -> dict:
+    # Model confidence low enough that the stored detections cover the truck;
+    # lazy tasks keep their source until the output is rendered
+    response = client.post(
+        f"{API}/image",
+        files={"file": ("street.png", image, "image/png")},
+        data={"min_confidence": "0.3", "target_classes": '["car", "truck"]', "render": "lazy", **form}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+def refilter(client, task_id: str, **request):
+    return client.post(f"{API}/refilter/{task_id}", json=request)
+
+def test_refilter_defers_rendering_to_the_download(client):
+    task = detect(client)
+    response = refilter(client, task["task_id"], filter=TRUCKS)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["task_id"] != task["task_id"]
+    assert [d["class_name"] for d in result["detections"]] == ["truck"]
+    output = os.path.join(settings.OUTPUT_DIR, result["processed_filename"])
+    assert not os.path.exists(output)
+    download = client.get(f"{API}/download/{result['processed_filename']}")
+    assert download.status_code == 200
+    assert os.path.exists(output)
+
+def test_refilter_renders_now_on_request(client):
+    task = detect(client)
+    result = refilter(client, task["task_id"], filter=TRUCKS, render=True).json()
+    assert os.path.exists(os.path.join(settings.OUTPUT_DIR, result["processed_filename"]))
+
+def test_refilter_of_a_refiltered_task_uses_its_own_filter(client):
+    task = detect(client)
+    trucks = refilter(client, task["task_id"], filter=TRUCKS).json()
+    cars = refilter(client, trucks["task_id"], filter={"target_classes": ["car"]}).json()
+    assert [d["class_name"] for d in cars["detections"]] == ["car"]
+    assert cars["processed_filename"] != trucks["processed_filename"]
+
+def test_refilter_errors(client, monkeypatch):
+    assert refilter(client, "missing").status_code == 404
+    monkeypatch.setattr(settings, "PUSH_FILTER_TO_MODEL", True)
+    # Another image, so the result is not served from the cache
+    task = detect(client, encode_image(make_image(boxes=[(10, 10, 50, 50, RED), (100, 100, 150, 150, BLUE)])))
+    # The model only kept cars and trucks, so there is nothing to find buses in
+    response = refilter(client, task["task_id"], filter={"target_classes": ["bus"]})
+    assert response.status_code == 400
+
+def test_sources_are_only_kept_until_the_deferred_render(client, detection_service):
+    task = detect(client, encode_image(make_image(boxes=[(20, 20, 60, 60, RED)])))
+    raw_store = detection_service.raw_store
+    assert raw_store.source_path(task["task_id"]) is not None
+    assert client.get(f"{API}/download/{task['processed_filename']}").status_code == 200
+    assert raw_store.source_path(task["task_id"]) is None
+    # Without a source the refiltered task has detections but no output
+    result = refilter(client, task["task_id"], filter=TRUCKS).json()
+    assert result["processed_filename"] is None
+    assert refilter(client, task["task_id"], filter=TRUCKS, render=True).status_code == 404
+
+def test_retained_sources_outlive_the_render(client, detection_service, monkeypatch):
+    monkeypatch.setattr(settings, "RETAIN_SOURCES", True)
+    task = detect(client, encode_image(make_image(boxes=[(30, 30, 70, 70, RED)])), render="eager")
+    assert detection_service.raw_store.source_path(task["task_id"]) is not None
+    assert refilter(client, task["task_id"], filter=TRUCKS, render=True).status_code == 200
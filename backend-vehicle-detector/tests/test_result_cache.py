@@ -0,0 +1,89 @@
+import os
+import time
+import pytest
+from app.models.detection import DetectionResult
+from app.services.result_cache import ResultCache, make_cache_key
+
+API = "/api/v1/detection"
+
+def result(name: str = "street.png") -> DetectionResult:
+    return DetectionResult(
+        task_id="task", filename=name, processed_filename=None, processing_time=0.1, status="completed"
+    )
+
+def cache(directory, **options) -> ResultCache:
+    return ResultCache(**{"max_entries": 2, "ttl_seconds": 60, "directory": str(directory), **options})
+
+def age(directory, key: str, seconds: float):
+    """Backdate the disk entry of a key"""
+    path = os.path.join(directory, f"{key}.json")
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+def test_entries_survive_a_restart_through_the_disk_tier(tmp_path):
+    cache(tmp_path).put("a", result())
+    restarted = cache(tmp_path)
+    assert restarted.get("a").filename == "street.png"
+    assert restarted.get("a") is not None
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.stats()["memory_hits"] == 1
+
+def test_memory_tier_is_an_lru(tmp_path):
+    results = cache(tmp_path)
+    for key in "abc":
+        results.put(key, result(key))
+    assert results.stats()["entries"] == 2
+    assert results.stats()["evictions"] == 1
+    # Evicted from memory, still on disk
+    assert results.get("a").filename == "a"
+
+def test_expired_and_unavailable_entries_miss(tmp_path):
+    results = cache(tmp_path, ttl_seconds=-1)
+    results.put("a", result())
+    assert results.get("a") is None
+    assert not os.path.exists(tmp_path / "a.json")
+    results = cache(tmp_path, is_available=lambda result: False)
+    results.put("b", result())
+    assert results.get("b") is None
+
+def test_sweep_deletes_expired_files(tmp_path):
+    results = cache(tmp_path)
+    results.put("old", result())
+    results.put("new", result())
+    age(tmp_path, "old", 120)
+    # Left behind by an interrupted put
+    (tmp_path / "old.json.1.tmp").write_text("{")
+    os.utime(tmp_path / "old.json.1.tmp", (time.time() - 120,) * 2)
+    assert results.sweep() == 2
+    assert sorted(os.listdir(tmp_path)) == ["new.json"]
+
+def test_sweep_caps_the_number_of_files(tmp_path):
+    results = cache(tmp_path, max_files=2, sweep_interval_seconds=3600)
+    for index, key in enumerate("abcd"):
+        results.put(key, result())
+        age(tmp_path, key, 10 - index)
+    assert results.sweep() == 2
+    assert sorted(os.listdir(tmp_path)) == ["c.json", "d.json"]
+    assert results.stats()["files_removed"] == 2
+
+def test_put_sweeps_at_most_once_per_interval(tmp_path):
+    results = cache(tmp_path, max_files=1, sweep_interval_seconds=3600)
+    results.put("a", result())
+    results.put("b", result())
+    assert len(os.listdir(tmp_path)) == 2
+    results = cache(tmp_path, max_files=1)
+    results.put("c", result())
+    assert len(os.listdir(tmp_path)) == 1
+
+def test_cache_key_is_independent_of_argument_order():
+    assert make_cache_key(a=1, b=[2]) == make_cache_key(b=[2], a=1)
+    assert make_cache_key(a=1) != make_cache_key(a=2)
+
+def test_repeated_upload_is_served_from_the_cache(client):
+    from conftest import RED, encode_image, make_image
+    image = encode_image(make_image(boxes=[(10, 10, 50, 50, RED)]))
+    files = {"file": ("cached.png", image, "image/png")}
+    first = client.post(f"{API}/image", files=files).json()
+    second = client.post(f"{API}/image", files=files).json()
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert second["detections"] == first["detections"]
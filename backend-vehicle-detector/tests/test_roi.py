@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from conftest import make_detections
+from app.models.detection import RegionOfInterest
+from app.services.roi import RegionMask, RegionOutsideFrame, points_in_polygon
+
+SQUARE = np.array([[0, 0], [10, 0], [10, 10], [0, 10]], dtype=np.float32)
+# An L shape whose notch covers the top right quarter
+L_SHAPE = np.array([[0, 0], [5, 0], [5, 5], [10, 5], [10, 10], [0, 10]], dtype=np.float32)
+
+def test_points_in_polygon():
+    points = np.array([[5, 5], [-1, 5], [11, 5], [5, 20]], dtype=np.float32)
+    assert points_in_polygon(points, SQUARE).tolist() == [True, False, False, False]
+
+def test_points_in_concave_polygon():
+    points = np.array([[2, 2], [8, 2], [8, 8], [2, 8]], dtype=np.float32)
+    assert points_in_polygon(points, L_SHAPE).tolist() == [True, False, True, True]
+
+def test_region_crops_to_polygon_bounds_with_margin():
+    roi = RegionOfInterest(polygons=[[[100, 200], [300, 200], [300, 400], [100, 400]]])
+    region = RegionMask(roi, width=1000, height=500, margin=10)
+    assert region.bounds == (90, 190, 310, 410)
+    assert region.size == (220, 220)
+    assert region.crop(np.zeros((500, 1000, 3), dtype=np.uint8)).shape == (220, 220, 3)
+
+def test_normalized_region_is_scaled_to_the_frame():
+    roi = RegionOfInterest(polygons=[[[0, 0.5], [1, 0.5], [1, 1], [0, 1]]], normalized=True)
+    region = RegionMask(roi, width=400, height=200, margin=0)
+    assert region.bounds == (0, 100, 400, 200)
+    assert not region.full_frame
+
+def test_restore_shifts_boxes_and_keeps_those_anchored_inside():
+    roi = RegionOfInterest(polygons=[[[100, 100], [300, 100], [300, 300], [100, 300]]])
+    region = RegionMask(roi, width=1000, height=1000, margin=0)
+    # Boxes in crop coordinates; in the frame their anchors (bottom centre) are
+    # at (150, 150), inside, and (250, 350), below the region
+    restored = region.restore(make_detections([[40, 20, 60, 50], [140, 220, 160, 250]]))
+    np.testing.assert_allclose(restored.boxes, [[140, 120, 160, 150]])
+
+def test_region_outside_the_frame_is_rejected():
+    roi = RegionOfInterest(polygons=[[[5000, 5000], [6000, 5000], [6000, 6000]]])
+    with pytest.raises(RegionOutsideFrame, match="1920x1080"):
+        RegionMask(roi, width=1920, height=1080, margin=32)
@@ -0,0 +1,110 @@
+import threading
+import time
+from datetime import datetime, timedelta
+import pytest
+from app.models.detection import DetectionTask
+from app.services.task_store import MemoryTaskStore, SQLiteTaskStore, TaskEvictor
+
+API = "/api/v1/detection"
+
+def task(task_id: str, status: str = "completed", age: float = 0.0) -> DetectionTask:
+    updated_at = datetime.utcnow() - timedelta(seconds=age)
+    return DetectionTask(task_id=task_id, filename="street.png", status=status, updated_at=updated_at)
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryTaskStore()
+    return SQLiteTaskStore(str(tmp_path / "tasks.db"), cache_size=2)
+
+def test_save_get_and_delete(store):
+    store.save(task("a", status="processing"))
+    assert store.get("a").status == "processing"
+    store.save(task("a"))
+    assert store.get("a").status == "completed"
+    assert store.count() == 1
+    store.delete("a")
+    assert store.get("a") is None
+    assert store.count() == 0
+
+def test_expired_returns_the_oldest_finished_tasks(store):
+    store.save(task("running", status="processing", age=100))
+    store.save(task("new", age=1))
+    store.save(task("old", age=50))
+    store.save(task("failed", status="failed", age=30))
+    store.save(task("older", age=80))
+    expired = store.expired(time.time() - 10, limit=2)
+    assert [t.task_id for t in expired] == ["older", "old"]
+
+def test_sqlite_tasks_survive_a_restart(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    SQLiteTaskStore(path, cache_size=2).save(task("a"))
+    assert SQLiteTaskStore(path, cache_size=2).get("a").task_id == "a"
+
+def test_only_finished_tasks_are_cached(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    store = SQLiteTaskStore(path, cache_size=2)
+    store.save(task("running", status="processing"))
+    store.save(task("done"))
+    # Another worker updates the running task
+    SQLiteTaskStore(path, cache_size=2).save(task("running"))
+    assert store.get("running").status == "completed"
+    assert store.get("done").status == "completed"
+    assert store.stats()["cache_hits"] == 1
+
+def test_sqlite_cache_is_bounded(tmp_path):
+    store = SQLiteTaskStore(str(tmp_path / "tasks.db"), cache_size=2)
+    for task_id in "abc":
+        store.save(task(task_id))
+    assert store.stats()["cached"] == 2
+    assert store.get("a").task_id == "a"
+    assert store.stats()["db_reads"] == 1
+
+def test_sqlite_store_is_shared_by_threads(tmp_path):
+    store = SQLiteTaskStore(str(tmp_path / "tasks.db"), cache_size=10)
+    threads = [
+        threading.Thread(target=lambda i=i: [store.save(task(f"{i}-{j}")) for j in range(20)])
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.count() == 80
+
+def test_evictor_deletes_expired_tasks_and_their_files():
+    store = MemoryTaskStore()
+    for index in range(5):
+        store.save(task(f"old-{index}", age=100 + index))
+    store.save(task("new"))
+    evicted = []
+    evictor = TaskEvictor(store, ttl_seconds=60, interval_seconds=3600, on_evict=evicted.append, batch_size=3)
+    assert evictor.sweep() == 3
+    assert [t.task_id for t in evicted] == ["old-4", "old-3", "old-2"]
+    assert evictor.sweep() == 2
+    assert evictor.sweep() == 0
+    assert store.count() == 1
+    assert evictor.evicted == 5
+
+def test_evictor_sweeps_at_most_once_per_interval():
+    store = MemoryTaskStore()
+    evictor = TaskEvictor(store, ttl_seconds=60, interval_seconds=3600, on_evict=lambda t: None)
+    evictor.maybe_sweep()
+    store.save(task("old", age=100))
+    evictor.maybe_sweep()
+    assert store.count() == 1
+    assert evictor.sweep() == 1
+
+def test_evicted_task_is_gone_from_the_api(client, detection_service, monkeypatch):
+    from conftest import RED, encode_image, make_image
+    image = encode_image(make_image(boxes=[(5, 5, 45, 45, RED)]))
+    result = client.post(f"{API}/image", files={"file": ("evicted.png", image, "image/png")}).json()
+    assert client.get(f"{API}/status/{result['task_id']}").status_code == 200
+    monkeypatch.setattr(detection_service.task_evictor, "ttl_seconds", -60)
+    detection_service.task_evictor.sweep()
+    assert client.get(f"{API}/status/{result['task_id']}").status_code == 404
+    assert client.get(f"{API}/download/{result['processed_filename']}").status_code == 404
+
+def test_download_only_serves_processed_outputs(client):
+    assert client.get(f"{API}/download/tasks.db").status_code == 404
+    assert client.get(f"{API}/download/..%2Fmain.py").status_code == 404
@@ -0,0 +1,52 @@
+import numpy as np
+from conftest import make_detections
+from app.services.tiling import merge_tiles, suppress, tile_grid
+
+def test_tile_grid_covers_the_image_with_overlap():
+    tiles = tile_grid(1000, 600, tile_size=400, overlap=0.25, max_tiles=64)
+    xs = sorted({x1 for x1, _, _, _ in tiles})
+    ys = sorted({y1 for _, y1, _, _ in tiles})
+    assert xs == [0, 300, 600]
+    assert ys == [0, 200]
+    # The last tiles end on the image edge instead of running past it
+    assert max(x2 for _, _, x2, _ in tiles) == 1000
+    assert max(y2 for _, _, _, y2 in tiles) == 600
+    assert all(x2 - x1 == 400 and y2 - y1 == 400 for x1, y1, x2, y2 in tiles)
+
+def test_small_image_is_one_tile():
+    assert tile_grid(300, 200, tile_size=640, overlap=0.2, max_tiles=64) == [(0, 0, 300, 200)]
+
+def test_tiles_grow_to_stay_within_max_tiles():
+    tiles = tile_grid(4000, 4000, tile_size=400, overlap=0.2, max_tiles=16)
+    assert len(tiles) <= 16
+    assert max(x2 for _, _, x2, _ in tiles) == 4000
+    assert max(y2 for _, _, _, y2 in tiles) == 4000
+
+def test_suppress_removes_truncated_copies_by_intersection_over_smaller_box():
+    detections = make_detections(
+        # A whole car, the part of it cut by a tile border and a separate car
+        [[100, 100, 200, 160], [100, 100, 130, 160], [400, 400, 500, 460]],
+        confidences=[0.9, 0.8, 0.7]
+    )
+    assert sorted(suppress(detections, 0.5).tolist()) == [0, 2]
+
+def test_suppress_keeps_the_most_confident_copy_and_other_classes():
+    detections = make_detections(
+        [[0, 0, 100, 100], [2, 2, 100, 100], [0, 0, 100, 100]],
+        confidences=[0.6, 0.9, 0.5],
+        class_ids=[2, 2, 7]
+    )
+    assert sorted(suppress(detections, 0.5).tolist()) == [1, 2]
+
+def test_merge_tiles_shifts_boxes_into_image_coordinates():
+    tiles = [(0, 0, 400, 400), (300, 0, 700, 400)]
+    parts = [
+        make_detections([[350, 50, 400, 90]], confidences=[0.6]),  # Cut by the right tile border
+        make_detections([[50, 50, 120, 90]], confidences=[0.9])
+    ]
+    merged = merge_tiles(parts, tiles, threshold=0.5)
+    np.testing.assert_allclose(merged.boxes, [[350, 50, 420, 90]])
+    np.testing.assert_allclose(merged.confidences, [0.9])
+
+def test_merge_tiles_without_detections_is_empty():
+    assert len(merge_tiles([make_detections([])], [(0, 0, 100, 100)], threshold=0.5)) == 0
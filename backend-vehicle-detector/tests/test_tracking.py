@@ -0,0 +1,60 @@
+from conftest import make_detections
+from app.services.detections import Detections
+from app.services.tracking import IoUTracker
+
+NAMES = {2: "car", 7: "truck"}
+
+def moving_box(frame_index: int, x: float = 0.0):
+    """A 100x50 box moving 5 pixels per frame"""
+    left = x + frame_index * 5
+    return [left, 100, left + 100, 150]
+
+def test_track_gets_id_after_min_hits_and_keeps_it():
+    tracker = IoUTracker(NAMES, min_hits=3)
+    track_ids = [
+        tracker.update(frame, make_detections([moving_box(frame)])).track_ids[0]
+        for frame in range(6)
+    ]
+    assert track_ids == [-1, -1, 1, 1, 1, 1]
+    summary, = tracker.summaries()
+    assert (summary.track_id, summary.first_frame, summary.last_frame) == (1, 0, 5)
+
+def test_single_frame_noise_is_never_counted():
+    tracker = IoUTracker(NAMES, min_hits=3)
+    tracker.update(0, make_detections([[500, 500, 550, 550]]))
+    for frame in range(1, 5):
+        tracker.update(frame, Detections.empty())
+    assert tracker.summaries() == []
+
+def test_overlapping_vehicles_of_different_classes_are_separate_tracks():
+    tracker = IoUTracker(NAMES, min_hits=1)
+    for frame in range(3):
+        tracked = tracker.update(frame, make_detections(
+            [moving_box(frame), moving_box(frame)],
+            class_ids=[2, 7]
+        ))
+        assert sorted(tracked.track_ids.tolist()) == [1, 2]
+    assert sorted(summary.class_name for summary in tracker.summaries()) == ["car", "truck"]
+
+def test_vehicle_returning_after_max_age_is_a_new_track():
+    tracker = IoUTracker(NAMES, min_hits=1, max_age=2)
+    box = [[0, 0, 100, 100]]
+    assert tracker.update(0, make_detections(box)).track_ids.tolist() == [1]
+    assert tracker.update(2, make_detections(box)).track_ids.tolist() == [1]
+    assert tracker.update(5, make_detections(box)).track_ids.tolist() == [2]
+    assert [summary.track_id for summary in tracker.summaries()] == [1, 2]
+
+def test_best_box_is_the_most_confident_detection():
+    tracker = IoUTracker(NAMES, min_hits=1)
+    for frame, confidence in enumerate([0.5, 0.95, 0.7]):
+        tracker.update(frame, make_detections([moving_box(frame)], confidences=[confidence]))
+    summary, = tracker.summaries()
+    assert summary.best_frame == 1
+    assert abs(summary.best_confidence - 0.95) < 1e-6
+    assert summary.best_box.x1 == moving_box(1)[0]
+
+def test_finished_tracks_are_dropped_without_keep_finished():
+    tracker = IoUTracker(NAMES, min_hits=1, max_age=1, keep_finished=False)
+    tracker.update(0, make_detections([[0, 0, 100, 100]]))
+    tracker.update(5, Detections.empty())
+    assert tracker.summaries() == []
@@ -0,0 +1,61 @@
+import asyncio
+import hashlib
+import io
+import os
+import pytest
+from starlette.datastructures import UploadFile
+from app.core.config import settings
+from app.services.upload_service import UploadTooLarge, read_upload, safe_filename, save_upload
+
+API = "/api/v1/detection"
+DATA = bytes(range(256)) * 40  # 10240 bytes
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 1000)
+
+def upload(data: bytes = DATA, filename: str = "clip.mp4", size=None) -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename=filename, size=size)
+
+def test_save_upload_streams_to_disk(tmp_path):
+    stored = asyncio.run(save_upload(upload(), max_size=len(DATA), directory=str(tmp_path)))
+    assert stored.filename == "clip.mp4"
+    assert stored.size == len(DATA)
+    assert stored.sha256 == hashlib.sha256(DATA).hexdigest()
+    assert os.path.dirname(stored.path) == str(tmp_path)
+    with open(stored.path, "rb") as f:
+        assert f.read() == DATA
+
+def test_oversized_upload_is_rejected_and_removed(tmp_path):
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(save_upload(upload(), max_size=len(DATA) - 1, directory=str(tmp_path)))
+    assert os.listdir(tmp_path) == []
+
+def test_declared_size_is_rejected_before_reading(tmp_path):
+    file = upload(size=len(DATA))
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(save_upload(file, max_size=100, directory=str(tmp_path)))
+    assert file.file.tell() == 0
+    assert os.listdir(tmp_path) == []
+
+def test_read_upload_keeps_the_bytes_in_memory():
+    buffered = asyncio.run(read_upload(upload(filename="../../etc/street.png"), max_size=len(DATA)))
+    assert buffered.data == DATA
+    assert buffered.filename == "street.png"
+    assert buffered.sha256 == hashlib.sha256(DATA).hexdigest()
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(read_upload(upload(), max_size=len(DATA) - 1))
+
+def test_safe_filename():
+    assert safe_filename("a/b/c.jpg") == "c.jpg"
+    assert safe_filename("") == "upload"
+    assert safe_filename(None) == "upload"
+
+def test_oversized_uploads_get_413(client, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 100)
+    monkeypatch.setattr(settings, "MAX_VIDEO_UPLOAD_SIZE", 100)
+    before = set(os.listdir(settings.UPLOAD_DIR))
+    image = client.post(f"{API}/image", files={"file": ("street.png", DATA, "image/png")})
+    video = client.post(f"{API}/video", files={"file": ("clip.mp4", DATA, "video/mp4")})
+    assert (image.status_code, video.status_code) == (413, 413)
+    assert set(os.listdir(settings.UPLOAD_DIR)) == before
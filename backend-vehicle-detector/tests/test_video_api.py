@@ -0,0 +1,94 @@
+import time
+import pytest
+from conftest import make_video
+
+API = "/api/v1/detection"
+
+@pytest.fixture(scope="module")
+def video(tmp_path_factory) -> bytes:
+    return make_video(str(tmp_path_factory.mktemp("video") / "street.avi"))
+
+def post_video(client, video: bytes, **form):
+    return client.post(f"{API}/video", files={"file": ("street.avi", video, "video/x-msvideo")}, data=form)
+
+def wait_for(client, task_id: str, timeout: float = 20.0) -> dict:
+    """Polls /status until the task leaves pending and processing"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        task = client.get(f"{API}/status/{task_id}").json()
+        if task["status"] in ("completed", "failed"):
+            return task
+        time.sleep(0.05)
+    raise AssertionError(f"Task {task_id} did not finish")
+
+def test_video_runs_in_the_background(client, video):
+    response = post_video(client, video)
+    assert response.status_code == 202
+    task = response.json()
+    assert task["status"] in ("pending", "processing")
+    task = wait_for(client, task["task_id"])
+    assert task["status"] == "completed", task["error"]
+    assert task["progress"] == 100.0
+    assert task["frames_processed"] == 12
+    result = client.get(f"{API}/result/{task['task_id']}").json()
+    # The moving car is one vehicle tracked through every frame
+    assert [(track["class_name"], track["first_frame"], track["last_frame"]) for track in result["tracks"]] == \
+        [("car", 0, 11)]
+    download = client.get(f"{API}/download/{result['processed_filename']}")
+    assert download.status_code == 200
+    assert download.headers["content-type"] == "video/x-msvideo"
+
+def test_frames_of_a_video(client, video):
+    task = wait_for(client, post_video(client, video, render="none").json()["task_id"])
+    page = client.get(f"{API}/frames/{task['task_id']}", params={"limit": 5}).json()
+    assert [frame["frame_index"] for frame in page["frames"]] == [0, 1, 2, 3, 4]
+    assert page["next_frame"] == 5
+    assert [box["x1"] for box in page["frames"][1]["detections"]] == [15]
+
+def test_result_of_an_unfinished_or_unknown_task(client, detection_service):
+    task = detection_service.create_task("street.avi")
+    assert client.get(f"{API}/result/{task.task_id}").status_code == 400
+    assert client.get(f"{API}/status/missing").status_code == 404
+    detection_service.remove_task(task.task_id)
+
+def test_non_video_upload_is_rejected(client):
+    response = client.post(f"{API}/video", files={"file": ("street.png", b"png", "image/png")})
+    assert response.status_code == 400
+
+def test_lazy_video_output_renders_in_the_background(client, video, monkeypatch):
+    from app.services.inference_executor import inference_executor
+    # The render must not wait for a worker of the image pool
+    monkeypatch.setattr(inference_executor, "submit", None)
+    task = wait_for(client, post_video(client, video, render="lazy").json()["task_id"])
+    url = f"{API}/download/{task['result']['processed_filename']}"
+    response = client.get(url)
+    assert response.status_code == 202
+    assert response.headers["location"].endswith(url)
+    deadline = time.monotonic() + 20
+    while response.status_code == 202 and time.monotonic() < deadline:
+        time.sleep(0.05)
+        response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "video/x-msvideo"
+
+def test_failed_background_render_is_reported(client, video, detection_service, monkeypatch):
+    # Other options than the test above, so the rendered output is not reused from the cache
+    task = wait_for(client, post_video(client, video, render="lazy", min_confidence="0.6").json()["task_id"])
+    url = f"{API}/download/{task['result']['processed_filename']}"
+
+    renders = []
+
+    def fail(*args):
+        renders.append(args)
+        raise RuntimeError("encoder crashed")
+
+    monkeypatch.setattr(detection_service, "_render", fail)
+    for attempt in (1, 2):
+        response = client.get(url)
+        while response.status_code == 202:
+            time.sleep(0.05)
+            response = client.get(url)
+        assert response.status_code == 500
+        assert "encoder crashed" in response.json()["detail"]
+        # Each failure is reported once and the next download tries again
+        assert len(renders) == attempt
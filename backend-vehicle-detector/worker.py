@@ -0,0 +1,59 @@
+import argparse
+import logging
+import multiprocessing
+import signal
+import threading
+
+logger = logging.getLogger(__name__)
+
+def run_worker(threads: int):
+    """Run one detector worker process until it is asked to stop"""
+    # Heavy imports happen in the worker process, not in the launcher
+    from app.core.config import settings
+    from app.services.detection_service import detection_service
+    from app.services.job_queue import create_job_queue
+    from app.services.job_worker import JobWorker
+
+    logging.basicConfig(level=settings.LOG_LEVEL, format=settings.LOG_FORMAT)
+    detection_service.load()
+    logger.info("Model loaded, startup timings: %s", detection_service.startup_timings)
+    queue = create_job_queue()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    workers = [JobWorker(queue, detection_service) for _ in range(threads)]
+    runners = [
+        threading.Thread(target=worker.run, args=(stop,), name=f"job-worker-{i}")
+        for i, worker in enumerate(workers)
+    ]
+    for runner in runners:
+        runner.start()
+    logger.info("Detector worker started with %d thread(s), queue %s", threads, settings.JOB_QUEUE_PATH)
+    for runner in runners:
+        runner.join()
+    logger.info("Detector worker stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run detector workers that consume the shared job queue")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes to start")
+    parser.add_argument("--threads", type=int, default=1, help="Jobs each process runs concurrently")
+    args = parser.parse_args()
+
+    if args.processes == 1:
+        run_worker(args.threads)
+        return
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(args.threads,), name=f"detector-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    # Children get SIGINT from the terminal themselves; forward SIGTERM
+    signal.signal(signal.SIGTERM, lambda *_: [process.terminate() for process in processes])
+    for process in processes:
+        process.join()
+
+if __name__ == "__main__":
+    main()
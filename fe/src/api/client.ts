@@ -1,5 +1,16 @@
 import axios, { AxiosError } from 'axios';
-import { DetectionResult, DetectionTask, DetectionStats, ApiError, VehicleClass, VehicleFilter } from '../types/api';
+import {
+    DetectionResult,
+    DetectionTask,
+    DetectionStats,
+    ApiError,
+    VehicleClass,
+    VehicleFilter,
+    FrameDetections,
+    FramePage,
+    FrameQuery,
+    TaskEventData,
+} from '../types/api';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api/v1';
 
@@ -70,7 +81,7 @@ export const uploadImage = async (
 export const uploadVideo = async (
     file: File,
     filter?: VehicleFilter
-): Promise<DetectionResult> => {
+): Promise<DetectionTask> => {
     const formData = new FormData();
     formData.append('file', file);
     
@@ -89,7 +100,7 @@ export const uploadVideo = async (
     }
     
     try {
-        const response = await client.post<DetectionResult>('/detection/video', formData, {
+        const response = await client.post<DetectionTask>('/detection/video', formData, {
             headers: {
                 'Content-Type': 'multipart/form-data',
             },
@@ -109,6 +120,34 @@ export const getTaskStatus = async (taskId: string): Promise<DetectionTask> => {
     }
 };
 
+export interface TaskEventHandlers {
+    onTask: (task: DetectionTask) => void;
+    onFrames?: (frames: FrameDetections[]) => void;
+    onError: () => void;
+}
+
+// Receive task updates as server-sent events instead of polling; returns a function that closes the connection
+export const subscribeTaskEvents = (taskId: string, handlers: TaskEventHandlers): (() => void) => {
+    const source = new EventSource(`${API_BASE_URL}/detection/events/${taskId}`);
+    const handleTask = (event: Event, final: boolean) => {
+        if (final) {
+            source.close();
+        }
+        handlers.onTask((JSON.parse((event as MessageEvent).data) as TaskEventData).task);
+    };
+    source.addEventListener('status', (event) => handleTask(event, false));
+    source.addEventListener('completed', (event) => handleTask(event, true));
+    source.addEventListener('failed', (event) => handleTask(event, true));
+    source.addEventListener('frames', (event) => {
+        handlers.onFrames?.(JSON.parse((event as MessageEvent).data).frames as FrameDetections[]);
+    });
+    source.onerror = () => {
+        source.close();
+        handlers.onError();
+    };
+    return () => source.close();
+};
+
 export const getTaskResult = async (taskId: string): Promise<DetectionResult> => {
     try {
         const response = await client.get<DetectionResult>(`/detection/result/${taskId}`);
@@ -118,6 +157,16 @@ export const getTaskResult = async (taskId: string): Promise<DetectionResult> =>
     }
 };
 
+// One page of the per-frame detections of a video task; pass next_frame as start_frame for the next page
+export const getFrames = async (taskId: string, query: FrameQuery = {}): Promise<FramePage> => {
+    try {
+        const response = await client.get<FramePage>(`/detection/frames/${taskId}`, { params: query });
+        return response.data;
+    } catch (error) {
+        throw handleError(error as AxiosError);
+    }
+};
+
 export const getDetectionStats = async (taskId: string): Promise<DetectionStats> => {
     try {
         const response = await client.get<DetectionStats>(`/detection/stats/${taskId}`);
@@ -62,7 +62,8 @@ const DetectionResult: React.FunctionComponent<DetectionResultProps> = ({ result
     const isVideo = ['.mp4', '.avi', '.mov'].some(ext => 
         result.filename.toLowerCase().endsWith(ext)
     );
-    const processedUrl = getDownloadUrl(result.processed_filename);
+    // Detections-only results have no annotated output to show
+    const processedUrl = result.processed_filename ? getDownloadUrl(result.processed_filename) : null;
 
     // Group detections by class
     const detectionsByClass = result.detections.reduce((acc, det) => {
@@ -101,6 +102,23 @@ const DetectionResult: React.FunctionComponent<DetectionResultProps> = ({ result
                                 >
                                     <CircularProgress />
                                 </Box>
+                            ) : !processedUrl ? (
+                                <Box
+                                    sx={{
+                                        position: 'absolute',
+                                        top: 0,
+                                        left: 0,
+                                        right: 0,
+                                        bottom: 0,
+                                        display: 'flex',
+                                        alignItems: 'center',
+                                        justifyContent: 'center',
+                                    }}
+                                >
+                                    <Typography variant="body2" color="text.secondary">
+                                        No annotated output was rendered
+                                    </Typography>
+                                </Box>
                             ) : isVideo ? (
                                 <video
                                     src={processedUrl}
@@ -201,7 +219,7 @@ const DetectionResult: React.FunctionComponent<DetectionResultProps> = ({ result
                                     Original: {result.filename}
                                 </Typography>
                                 <Typography variant="body2" color="text.secondary">
-                                    Processed: {result.processed_filename}
+                                    Processed: {result.processed_filename ?? 'Not rendered'}
                                 </Typography>
                                 <Typography variant="body2" color="text.secondary">
                                     Status: {result.status}
@@ -13,14 +13,15 @@ import {
 } from '@mui/material';
 import { Upload as UploadIcon } from '@mui/icons-material';
 import { uploadImage, uploadVideo } from '../api/client';
-import { DetectionResult, VehicleClass, VehicleFilter } from '../types/api';
+import { DetectionResult, DetectionTask, VehicleClass, VehicleFilter } from '../types/api';
 
 interface FileUploadProps {
     onUploadComplete: (result: DetectionResult) => void;
+    onTaskSubmitted: (task: DetectionTask) => void;
     onError: (error: string) => void;
 }
 
-const FileUpload: React.FunctionComponent<FileUploadProps> = ({ onUploadComplete, onError }) => {
+const FileUpload: React.FunctionComponent<FileUploadProps> = ({ onUploadComplete, onTaskSubmitted, onError }) => {
     const [isUploading, setIsUploading] = useState(false);
     const [selectedClasses, setSelectedClasses] = useState<VehicleClass[]>([
         VehicleClass.CAR,
@@ -57,10 +58,12 @@ const FileUpload: React.FunctionComponent<FileUploadProps> = ({ onUploadComplete
             const isVideo = ['.mp4', '.avi', '.mov'].some(ext => 
                 file.name.toLowerCase().endsWith(ext)
             );
-            const result = isVideo
-                ? await uploadVideo(file, filter)
-                : await uploadImage(file, filter);
-            onUploadComplete(result);
+            // Videos are processed in the background and tracked by task
+            if (isVideo) {
+                onTaskSubmitted(await uploadVideo(file, filter));
+            } else {
+                onUploadComplete(await uploadImage(file, filter));
+            }
         } catch (error) {
             onError(error instanceof Error ? error.message : 'Upload failed');
         } finally {
@@ -1,5 +1,5 @@
-import React, { useState } from 'react';
-import { Container, Typography, Alert, Box } from '@mui/material';
+import React, { useCallback, useEffect, useState } from 'react';
+import { Container, Typography, Alert, Box, LinearProgress } from '@mui/material';
 import { useQuery } from 'react-query';
 import { FileUpload } from '../components/FileUpload';
 import { DetectionResult as DetectionResultComponent } from '../components/DetectionResult';
@@ -8,6 +8,7 @@ import {
     uploadImage,
     uploadVideo,
     getTaskStatus,
+    subscribeTaskEvents,
     getTaskResult,
     getDetectionStats,
 } from '../api/client';
@@ -17,22 +18,40 @@ export const Home = () => {
     const [currentResult, setCurrentResult] = useState<DetectionResult | null>(null);
     const [taskStatus, setTaskStatus] = useState<DetectionTask | null>(null);
     const [error, setError] = useState<string | null>(null);
+    // Fall back to polling when the event stream cannot be used
+    const [pushFailed, setPushFailed] = useState(false);
+
+    const isTaskRunning = !!taskStatus && (taskStatus.status === 'pending' || taskStatus.status === 'processing');
+    const runningTaskId = isTaskRunning ? taskStatus!.task_id : null;
+
+    const handleTaskUpdate = useCallback((task: DetectionTask) => {
+        setTaskStatus(task);
+        if (task.status === 'completed' && task.result) {
+            setCurrentResult(task.result);
+        } else if (task.status === 'failed') {
+            setError(task.error || 'Task failed');
+        }
+    }, []);
+
+    // Pushed task updates
+    useEffect(() => {
+        if (!runningTaskId || pushFailed) {
+            return;
+        }
+        return subscribeTaskEvents(runningTaskId, {
+            onTask: handleTaskUpdate,
+            onError: () => setPushFailed(true),
+        });
+    }, [runningTaskId, pushFailed, handleTaskUpdate]);
 
     // Query for task status
     const { data: taskStatusData } = useQuery(
-        ['taskStatus', currentResult?.task_id],
-        () => getTaskStatus(currentResult!.task_id),
+        ['taskStatus', taskStatus?.task_id],
+        () => getTaskStatus(taskStatus!.task_id),
         {
-            enabled: !!currentResult?.task_id && currentResult.status === 'processing',
+            enabled: isTaskRunning && pushFailed,
             refetchInterval: 1000,
-            onSuccess: (task) => {
-                setTaskStatus(task);
-                if (task.status === 'completed' && task.result) {
-                    setCurrentResult(task.result);
-                } else if (task.status === 'failed') {
-                    setError(task.error || 'Task failed');
-                }
-            },
+            onSuccess: handleTaskUpdate,
             onError: (err: Error) => {
                 setError(err.message);
             },
@@ -41,8 +60,8 @@ export const Home = () => {
 
     // Query for task result
     const { data: taskResult } = useQuery(
-        ['taskResult', currentResult?.task_id],
-        () => getTaskResult(currentResult!.task_id),
+        ['taskResult', taskStatus?.task_id],
+        () => getTaskResult(taskStatus!.task_id),
         {
             enabled: !!taskStatus && taskStatus.status === 'completed',
             onSuccess: (result) => {
@@ -64,16 +83,14 @@ export const Home = () => {
     );
 
     const handleUploadComplete = (result: DetectionResult) => {
+        setTaskStatus(null);
         setCurrentResult(result);
-        if (result.status === 'processing') {
-            setTaskStatus({
-                task_id: result.task_id,
-                filename: result.filename,
-                status: result.status,
-                created_at: result.created_at,
-                updated_at: new Date().toISOString(),
-            });
-        }
+    };
+
+    const handleTaskSubmitted = (task: DetectionTask) => {
+        setCurrentResult(null);
+        setPushFailed(false);
+        setTaskStatus(task);
     };
 
     return (
@@ -114,9 +131,21 @@ export const Home = () => {
 
             <FileUpload
                 onUploadComplete={handleUploadComplete}
+                onTaskSubmitted={handleTaskSubmitted}
                 onError={setError}
             />
 
+            {isTaskRunning && (
+                <Box sx={{ mt: 2 }}>
+                    <LinearProgress variant="determinate" value={taskStatus!.progress} />
+                    <Typography variant="body2" color="text.secondary" sx={{ mt: 1 }}>
+                        Processing {taskStatus!.filename}: {taskStatus!.progress.toFixed(1)}%
+                        {taskStatus!.fps ? ` at ${taskStatus!.fps.toFixed(1)} fps` : ''}
+                        {taskStatus!.eta_seconds ? `, about ${Math.ceil(taskStatus!.eta_seconds)}s left` : ''}
+                    </Typography>
+                </Box>
+            )}
+
             {error && (
                 <Alert severity="error" sx={{ mt: 2 }}>
                     {error}
@@ -127,7 +156,7 @@ export const Home = () => {
                 <DetectionResultComponent
                     result={currentResult}
                     stats={stats}
-                    isLoading={taskStatus?.status === 'processing'}
+                    isLoading={isTaskRunning}
                 />
             )}
         </Container>
@@ -19,22 +19,38 @@ export interface BoundingBox {
     confidence: number;
     class_id: number;
     class_name: string;
+    track_id?: number;
+}
+
+export interface TrackSummary {
+    track_id: number;
+    class_id: number;
+    class_name: string;
+    first_frame: number;
+    last_frame: number;
+    best_frame: number;
+    best_confidence: number;
+    best_box: BoundingBox;
 }
 
 export interface DetectionResult {
     task_id: string;
     filename: string;
-    processed_filename: string;
+    processed_filename: string | null; // null when no annotated output was rendered
     detections: BoundingBox[];
+    tracks: TrackSummary[];
     processing_time: number;
     created_at: string;
     status: 'pending' | 'processing' | 'completed' | 'failed';
     error?: string;
     filter?: VehicleFilter;
+    frame_count?: number;
+    fps?: number;
 }
 
 export interface DetectionStats {
     total_vehicles: number;
+    unique_vehicles?: number;
     by_class: Record<string, number>;
     processing_time: number;
 }
@@ -47,6 +63,40 @@ export interface DetectionTask {
     updated_at: string;
     result?: DetectionResult;
     error?: string;
+    progress: number;
+    frames_processed?: number;
+    total_frames?: number;
+    fps?: number;
+    eta_seconds?: number;
+}
+
+export interface FrameDetections {
+    frame_index: number;
+    timestamp?: number;
+    detections: BoundingBox[];
+}
+
+export interface FramePage {
+    task_id: string;
+    frame_count: number;
+    fps?: number;
+    frames: FrameDetections[];
+    next_frame?: number;
+}
+
+export interface FrameQuery {
+    start_frame?: number;
+    end_frame?: number;
+    start_time?: number;
+    end_time?: number;
+    limit?: number;
+    skip_empty?: boolean;
+}
+
+// Data of the status, completed and failed events pushed by /detection/events/{task_id}
+export interface TaskEventData {
+    task: DetectionTask;
+    stats?: DetectionStats;
 }
 
 export interface ApiError {